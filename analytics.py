@@ -0,0 +1,336 @@
+"""
+Percentile analytics over call handle times and satisfaction scores.
+
+Each call file (a day partition or a monthly archive) is summarised once
+into fixed-bin histograms per (staff, day). Histograms with the same bins
+merge by addition, so the p50/p90/p99 of any staff member, team or window
+come from summing a few count rows instead of sorting raw calls. Day
+partitions only ever grow, so when today's partition has new rows only
+the appended bytes are read and their histograms are added to the cached
+ones. A file is re-read in full only if it shrinks or is replaced (as
+archives are by compaction).
+
+Handle-time bins are log-spaced, so a percentile is within about 2% of
+the exact value. Satisfaction scores are recorded to two decimals and get
+one bin per value, so their percentiles are exact.
+
+Usage:
+    python analytics.py --days 7 --by team
+"""
+import argparse
+import datetime
+import io
+import os
+import sys
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from call_store import partition_files, read_calls
+from schema import enforce, read_dtypes
+from storage import CALLS_DIR, SUCCESS_THRESHOLD
+
+# Handle time in seconds: [0, 1) then log-spaced up to a day
+HANDLE_EDGES = np.concatenate([[0.0], np.geomspace(1, 24 * 3600, 300)])
+HANDLE_VALUES = np.concatenate([[0.0], np.sqrt(HANDLE_EDGES[1:-1] * HANDLE_EDGES[2:])])
+# One bin per two-decimal score
+SAT_VALUES = np.round(np.arange(101) * 0.01, 2)
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+SKETCH_COLUMNS = ['handler_id', 'team_id', 'time_elapsed', 'sat_score', 'date']
+
+
+class DaySketches(NamedTuple):
+    """Histograms of one call file, one row per (staff, day)."""
+    staff_id: np.ndarray
+    team_id: np.ndarray
+    day: np.ndarray          # datetime64[D]
+    handle: np.ndarray       # (rows, len(HANDLE_VALUES)) counts
+    sat: np.ndarray          # (rows, len(SAT_VALUES)) counts
+
+
+def handle_bins(seconds: np.ndarray) -> np.ndarray:
+    """Histogram bin of each handle time; out-of-range times are clipped."""
+    bins = np.searchsorted(HANDLE_EDGES, seconds, side='right') - 1
+    return np.clip(bins, 0, len(HANDLE_VALUES) - 1)
+
+
+def sat_bins(scores: np.ndarray) -> np.ndarray:
+    """Histogram bin of each satisfaction score; scores are clipped to [0, 1]."""
+    return np.clip(np.rint(np.asarray(scores, dtype='float64') * 100), 0, 100).astype('int64')
+
+
+def sketch_calls(calls: pd.DataFrame) -> DaySketches:
+    """
+    Build per-(staff, day) histograms from raw calls.
+
+    Args:
+        calls: Calls with handler_id, team_id, time_elapsed, sat_score and
+            datetime columns.
+
+    Returns:
+        DaySketches: One row per (handler, team, day) present in the calls.
+    """
+    days = calls['datetime'].to_numpy().astype('datetime64[D]')
+    keys = pd.MultiIndex.from_arrays([calls['handler_id'].to_numpy(), calls['team_id'].to_numpy(), days])
+    codes, uniques = pd.factorize(keys)
+    handle = np.zeros((len(uniques), len(HANDLE_VALUES)), dtype='int64')
+    sat = np.zeros((len(uniques), len(SAT_VALUES)), dtype='int64')
+    np.add.at(handle, (codes, handle_bins(calls['time_elapsed'].to_numpy())), 1)
+    np.add.at(sat, (codes, sat_bins(calls['sat_score'].to_numpy())), 1)
+    return DaySketches(uniques.get_level_values(0).to_numpy(), uniques.get_level_values(1).to_numpy(),
+                       uniques.get_level_values(2).to_numpy().astype('datetime64[D]'), handle, sat)
+
+
+EMPTY_SKETCHES = DaySketches(np.empty(0, dtype='int64'), np.empty(0, dtype='int64'),
+                             np.empty(0, dtype='datetime64[D]'),
+                             np.zeros((0, len(HANDLE_VALUES)), dtype='int64'),
+                             np.zeros((0, len(SAT_VALUES)), dtype='int64'))
+
+
+def merge_sketches(*parts: DaySketches) -> DaySketches:
+    """
+    Add histograms of the same (staff, team, day) together.
+
+    Args:
+        parts: Sketches to merge, e.g. a file's cached sketches and those
+            of rows appended to it since.
+
+    Returns:
+        DaySketches: One row per distinct (staff, team, day).
+    """
+    merged = DaySketches(*(np.concatenate(arrays) for arrays in zip(*parts)))
+    keys = pd.MultiIndex.from_arrays([merged.staff_id, merged.team_id, merged.day])
+    codes, uniques = pd.factorize(keys)
+    if len(uniques) == len(codes):
+        return merged
+    handle = np.zeros((len(uniques), merged.handle.shape[1]), dtype='int64')
+    sat = np.zeros((len(uniques), merged.sat.shape[1]), dtype='int64')
+    np.add.at(handle, codes, merged.handle)
+    np.add.at(sat, codes, merged.sat)
+    return DaySketches(uniques.get_level_values(0).to_numpy(), uniques.get_level_values(1).to_numpy(),
+                       uniques.get_level_values(2).to_numpy().astype('datetime64[D]'), handle, sat)
+
+
+def percentiles(counts: np.ndarray, values: np.ndarray,
+                qs: Sequence[float] = PERCENTILES) -> np.ndarray:
+    """
+    Percentiles of merged histograms.
+
+    Args:
+        counts: (groups, bins) histogram counts.
+        values: Representative value of each bin.
+        qs: Quantiles wanted, between 0 and 1.
+
+    Returns:
+        (groups, len(qs)) array; NaN for empty groups.
+    """
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1:]
+    out = np.empty((len(counts), len(qs)))
+    for i, q in enumerate(qs):
+        # First bin whose cumulative count reaches the q-th call
+        index = (cumulative < np.maximum(np.ceil(q * total), 1)).sum(axis=1)
+        out[:, i] = values[np.minimum(index, len(values) - 1)]
+    out[total[:, 0] == 0] = np.nan
+    return out
+
+
+class _FileSketch(NamedTuple):
+    """Sketches of one call file and how much of it they cover."""
+    inode: int
+    offset: int              # bytes summarised; always the end of a complete line
+    header: bytes            # CSV header line, to parse appended rows on their own
+    sketches: DaySketches
+
+
+def _sketch_csv(data: bytes) -> DaySketches:
+    calls = pd.read_csv(io.BytesIO(data), usecols=lambda c: c in SKETCH_COLUMNS, dtype=read_dtypes('calls'))
+    return sketch_calls(enforce(calls, 'calls'))
+
+
+class SketchStore:
+    def __init__(self, calls_path: str = CALLS_DIR) -> None:
+        """
+        Per-file cache of call histograms for one calls directory.
+
+        Args:
+            calls_path: Calls directory, or a single call CSV file.
+        """
+        self.calls_path = calls_path
+        self._files: Dict[str, _FileSketch] = {}
+        self._lock = threading.Lock()
+
+    def _sketch_file(self, path: str) -> DaySketches:
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._files.get(path)
+        if cached is not None and cached.inode == stat.st_ino and cached.offset == stat.st_size:
+            return cached.sketches
+        if not path.endswith('.csv'):
+            # Archives are only ever replaced whole
+            entry = _FileSketch(stat.st_ino, stat.st_size, b'',
+                                sketch_calls(read_calls(path, columns=SKETCH_COLUMNS)))
+        elif (cached is not None and cached.header and cached.inode == stat.st_ino
+              and cached.offset < stat.st_size):
+            entry = self._sketch_appended(path, cached)
+        else:
+            entry = self._sketch_csv_file(path, stat.st_ino)
+        with self._lock:
+            self._files[path] = entry
+        return entry.sketches
+
+    @staticmethod
+    def _sketch_csv_file(path: str, inode: int) -> _FileSketch:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # A row still being written is left for the next refresh
+        end = data.rfind(b'\n') + 1
+        header = data[:data.find(b'\n') + 1] if end else b''
+        return _FileSketch(inode, end, header, _sketch_csv(data[:end]) if end else EMPTY_SKETCHES)
+
+    @staticmethod
+    def _sketch_appended(path: str, cached: _FileSketch) -> _FileSketch:
+        with open(path, 'rb') as f:
+            f.seek(cached.offset)
+            tail = f.read()
+        end = tail.rfind(b'\n') + 1
+        if not end:
+            return cached
+        sketches = merge_sketches(cached.sketches, _sketch_csv(cached.header + tail[:end]))
+        return cached._replace(offset=cached.offset + end, sketches=sketches)
+
+    def _files_for(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> list:
+        if not os.path.isdir(self.calls_path):
+            return [self.calls_path] if os.path.exists(self.calls_path) else []
+        as_datetime = lambda d: datetime.datetime.combine(d, datetime.time()) if d is not None else None
+        return partition_files(self.calls_path, as_datetime(start), as_datetime(end))
+
+    def _merged(self, start: Optional[datetime.date],
+                end: Optional[datetime.date]) -> Optional[Tuple[DaySketches, np.ndarray]]:
+        # Sketch rows of every file overlapping the window, and which rows fall inside it
+        parts = [self._sketch_file(f) for f in self._files_for(start, end)]
+        parts = [p for p in parts if len(p.day)]
+        if not parts:
+            return None
+        merged = DaySketches(*(np.concatenate(arrays) for arrays in zip(*parts)))
+        keep = np.ones(len(merged.day), dtype=bool)
+        if start is not None:
+            keep &= merged.day >= np.datetime64(start, 'D')
+        if end is not None:
+            keep &= merged.day <= np.datetime64(end, 'D')
+        return merged, keep
+
+    def summary(self, by: str = 'staff',
+                start: Optional[datetime.date] = None,
+                end: Optional[datetime.date] = None,
+                team_id: Optional[int] = None,
+                qs: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+        """
+        Handle-time and satisfaction percentiles per staff member or team.
+
+        Windows are whole days, so 'Last 7 Days' includes all of the first
+        day rather than starting at the current minute.
+
+        Args:
+            by: 'staff' or 'team'.
+            start: First day included, or None for no lower bound.
+            end: Last day included, or None for no upper bound.
+            team_id: Only include calls handled for this team.
+            qs: Quantiles wanted.
+
+        Returns:
+            pd.DataFrame indexed by staff_id or team_id with a 'calls' column
+            and handle_pNN / sat_pNN columns for each quantile.
+        """
+        if by not in ('staff', 'team'):
+            raise ValueError("by must be 'staff' or 'team'")
+        group_field = 'staff_id' if by == 'staff' else 'team_id'
+        names = [f"p{round(q * 100):d}" for q in qs]
+        columns = ['calls'] + [f"handle_{n}" for n in names] + [f"sat_{n}" for n in names]
+        found = self._merged(start, end)
+        if found is None:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name=group_field))
+
+        merged, keep = found
+        if team_id is not None:
+            keep &= merged.team_id == team_id
+        groups = getattr(merged, group_field)[keep]
+        codes, uniques = pd.factorize(groups, sort=True)
+
+        handle = np.zeros((len(uniques), len(HANDLE_VALUES)), dtype='int64')
+        sat = np.zeros((len(uniques), len(SAT_VALUES)), dtype='int64')
+        np.add.at(handle, codes, merged.handle[keep])
+        np.add.at(sat, codes, merged.sat[keep])
+
+        data = np.column_stack([handle.sum(axis=1), percentiles(handle, HANDLE_VALUES, qs),
+                                percentiles(sat, SAT_VALUES, qs)])
+        df = pd.DataFrame(data, columns=columns, index=pd.Index(uniques, name=group_field))
+        return df.astype({'calls': 'int64'})
+
+    def daily(self, start: Optional[datetime.date] = None,
+              end: Optional[datetime.date] = None) -> pd.DataFrame:
+        """
+        Calls and successful calls per team and day, from the cached sketches.
+
+        Args:
+            start: First day included, or None for no lower bound.
+            end: Last day included, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame with team_id, day (datetime64), calls and successful
+            columns, sorted by team and day. Days without calls are absent.
+        """
+        found = self._merged(start, end)
+        if found is None:
+            return pd.DataFrame({'team_id': pd.Series(dtype='int64'), 'day': pd.Series(dtype='datetime64[s]'),
+                                 'calls': pd.Series(dtype='int64'), 'successful': pd.Series(dtype='int64')})
+        merged, keep = found
+        successful_bin = int(round(SUCCESS_THRESHOLD * 100))
+        df = pd.DataFrame({
+            'team_id': merged.team_id[keep].astype('int64'),
+            'day': merged.day[keep],
+            'calls': merged.sat[keep].sum(axis=1),
+            'successful': merged.sat[keep][:, successful_bin:].sum(axis=1),
+        })
+        return df.groupby(['team_id', 'day'], as_index=False).sum()
+
+
+_stores: Dict[str, SketchStore] = {}
+
+
+def get_sketch_store(calls_path: str = CALLS_DIR) -> SketchStore:
+    """
+    Return the shared SketchStore for a calls directory.
+
+    Args:
+        calls_path: Calls directory, or a single call CSV file.
+
+    Returns:
+        The SketchStore for that path, created on first use.
+    """
+    key = os.path.abspath(calls_path)
+    if key not in _stores:
+        _stores[key] = SketchStore(calls_path)
+    return _stores[key]
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Handle-time and satisfaction percentiles")
+    parser.add_argument('--calls-path', default=CALLS_DIR)
+    parser.add_argument('--by', choices=['staff', 'team'], default='team')
+    parser.add_argument('--days', type=int, help="Only the last N days (including today)")
+    parser.add_argument('--team-id', type=int)
+    args = parser.parse_args(argv)
+
+    start = datetime.date.today() - datetime.timedelta(days=args.days - 1) if args.days else None
+    summary = get_sketch_store(args.calls_path).summary(args.by, start=start, team_id=args.team_id)
+    print(summary.to_string(float_format=lambda x: f"{x:,.2f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+Lightweight asyncio HTTP/JSON API over the tracker data.
+
+Serves wallboards and integrations from the same CSV tables as the
+Streamlit app. Every response carries an ETag derived from the data
+version, so a poller that sends If-None-Match gets an empty 304 until
+something is written, and identical requests between writes are answered
+from an in-memory response cache. Connections are kept alive between
+requests.
+
+Usage:
+    python api.py --port 8502 [--shard north]
+
+Endpoints:
+    GET  /staff                    all staff with call stats
+    GET  /staff/<id>               one staff member
+    GET  /teams                    success rate per team
+    GET  /teams/<id>/stats?days=N  windowed aggregates for one team
+    GET  /aggregates?days=N        windowed aggregates for every team
+    POST /calls                    ingest one call or a batch of calls (JSON)
+"""
+import argparse
+import asyncio
+import json
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from call_ingest import ingest_calls
+from call_store import read_calls
+from shards import shard_paths
+from status_events import status_bus
+from storage import (CALLS_DIR, STAFF_FILE, TEAMS_FILE, SUCCESS_THRESHOLD,
+                     data_version, read_staff, read_teams)
+
+KEEP_ALIVE_TIMEOUT = 30
+MAX_BODY = 16 * 1024 * 1024
+
+REASONS = {200: 'OK', 201: 'Created', 304: 'Not Modified', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class TrackerData:
+    def __init__(self, staff_file: str = STAFF_FILE, calls_path: str = CALLS_DIR,
+                 teams_file: str = TEAMS_FILE) -> None:
+        """
+        Version-aware cache of the tables and of rendered responses.
+
+        Tables are only re-read when data_version() changes, and a rendered
+        response body is reused for as long as the version it was built from
+        is current.
+
+        Args:
+            staff_file: Staff CSV file.
+            calls_path: Calls directory, or a legacy single call CSV.
+            teams_file: Team CSV file.
+        """
+        self.files = (staff_file, calls_path, teams_file)
+        self._version: Optional[str] = None
+        self._frames: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] = ()
+        self._responses: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def version(self) -> str:
+        """Current data version, used as the ETag."""
+        return data_version(*self.files)
+
+    def frames(self) -> Tuple[str, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Return the current version with the staff, call and team tables."""
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                staff_file, calls_path, teams_file = self.files
+                calls = read_calls(calls_path)
+                calls['success'] = calls['sat_score'] >= SUCCESS_THRESHOLD
+                self._frames = (read_staff(staff_file), calls, read_teams(teams_file))
+                self._responses = {}
+                self._version = version
+            return (self._version,) + self._frames
+
+    def cached(self, key: str, version: str) -> Optional[bytes]:
+        with self._lock:
+            return self._responses.get(key) if version == self._version else None
+
+    def store(self, key: str, version: str, body: bytes) -> None:
+        with self._lock:
+            if version == self._version:
+                self._responses[key] = body
+
+
+def _call_stats(calls: pd.DataFrame, by: str) -> pd.DataFrame:
+    return calls.groupby(by).agg(
+        calls=('call_id', 'size'),
+        successful=('success', 'sum'),
+        avg_sat_score=('sat_score', 'mean'),
+        avg_handle_time=('time_elapsed', 'mean'),
+    ).assign(success_rate=lambda d: d['successful'] / d['calls'])
+
+
+def _window(calls: pd.DataFrame, query: Dict[str, List[str]]) -> pd.DataFrame:
+    days = query.get('days', [None])[0]
+    if days is None:
+        return calls
+    try:
+        days = float(days)
+    except ValueError:
+        raise HTTPError(400, "days must be a number")
+    if not math.isfinite(days) or days < 0:
+        raise HTTPError(400, "days must be a non-negative number")
+    try:
+        cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
+    except (OverflowError, ValueError):
+        return calls  # reaches back past the earliest representable time: every call
+    return calls[calls['datetime'] >= cutoff]
+
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    return json.loads(df.to_json(orient='records'))
+
+
+def staff_view(staff: pd.DataFrame, calls: pd.DataFrame, staff_id: Optional[int] = None) -> object:
+    stats = _call_stats(calls, 'handler_id')
+    df = staff.drop(columns='avg_sat_score').join(stats, on='staff_id')
+    df['status'] = [status_bus.status_of(s, v) for s, v in zip(df['staff_id'], df['status'])]
+    if staff_id is None:
+        return _records(df)
+    match = df[df['staff_id'] == staff_id]
+    if match.empty:
+        raise HTTPError(404, f"Staff with ID {staff_id} not found")
+    return _records(match)[0]
+
+
+def teams_view(teams: pd.DataFrame, calls: pd.DataFrame) -> object:
+    return _records(teams.join(_call_stats(calls, 'team_id'), on='team_id'))
+
+
+def team_stats_view(teams: pd.DataFrame, calls: pd.DataFrame, team_id: int) -> object:
+    if team_id not in set(teams['team_id']):
+        raise HTTPError(404, f"Team with ID {team_id} not found")
+    team_calls = calls[calls['team_id'] == team_id]
+    stats = _call_stats(team_calls.assign(team_id=team_id), 'team_id')
+    daily = _call_stats(team_calls.assign(day=team_calls['datetime'].dt.strftime('%Y-%m-%d')), 'day')
+    summary = _records(stats.reset_index())
+    return {'team_id': team_id,
+            'summary': summary[0] if summary else {'calls': 0},
+            'daily': _records(daily.reset_index())}
+
+
+def ingest_view(data: TrackerData, body: bytes) -> object:
+    try:
+        payload = json.loads(body or b'null')
+    except ValueError:
+        raise HTTPError(400, "Body must be JSON")
+    rows = payload if isinstance(payload, list) else [payload]
+    if not rows or not all(isinstance(r, dict) for r in rows):
+        raise HTTPError(400, "Expected a call object or a list of call objects")
+    staff_file, calls_path, teams_file = data.files
+    try:
+        # object columns keep 63-bit call IDs exact when some rows omit them
+        result = ingest_calls(pd.DataFrame(rows, dtype=object), calls_path, staff_file, teams_file)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    if result.accepted.empty:
+        raise HTTPError(400, f"All {len(result.rejected)} calls rejected: "
+                             f"{', '.join(result.rejected['error'].unique())}")
+    return {'accepted': len(result.accepted),
+            'rejected': _records(result.rejected.astype(str))}
+
+
+def route(data: TrackerData, method: str, target: str, body: bytes) -> Tuple[int, object, Optional[str]]:
+    """
+    Resolve one request to a status code, a JSON-able payload and an ETag.
+
+    Args:
+        data: Shared table cache.
+        method: HTTP method.
+        target: Request target (path and query string).
+        body: Request body.
+
+    Returns:
+        Status code, payload and the data version it was computed from.
+    """
+    url = urlsplit(target)
+    parts = [p for p in url.path.split('/') if p]
+    query = parse_qs(url.query)
+
+    if parts == ['calls']:
+        if method != 'POST':
+            raise HTTPError(405, "Use POST to ingest calls")
+        return 201, ingest_view(data, body), None
+
+    if method not in ('GET', 'HEAD'):
+        raise HTTPError(405, f"{method} not allowed")
+
+    version, staff, calls, teams = data.frames()
+    if parts == ['staff']:
+        return 200, staff_view(staff, calls), version
+    if len(parts) == 2 and parts[0] == 'staff' and parts[1].isdigit():
+        return 200, staff_view(staff, calls, int(parts[1])), version
+    if parts == ['teams']:
+        return 200, teams_view(teams, calls), version
+    if len(parts) == 3 and parts[0] == 'teams' and parts[1].isdigit() and parts[2] == 'stats':
+        return 200, team_stats_view(teams, _window(calls, query), int(parts[1])), version
+    if parts == ['aggregates']:
+        return 200, teams_view(teams, _window(calls, query)), version
+    raise HTTPError(404, f"No route for {url.path}")
+
+
+def _response(status: int, body: bytes, keep_alive: bool, etag: Optional[str] = None) -> bytes:
+    headers = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+               f"Content-Length: {len(body)}",
+               f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if status != 304:
+        headers.append("Content-Type: application/json")
+    if etag is not None:
+        headers.append(f'ETag: "{etag}"')
+        headers.append("Cache-Control: no-cache")
+    if keep_alive:
+        headers.append(f"Keep-Alive: timeout={KEEP_ALIVE_TIMEOUT}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+
+async def handle_connection(data: TrackerData, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    """Serve requests on one connection until the client closes or goes idle."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not request_line.strip():
+                break
+            try:
+                method, target, protocol = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_response(400, b'{"error": "Malformed request line"}', False))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' if protocol == 'HTTP/1.0' else connection != 'close'
+
+            length = int(headers.get('content-length', 0) or 0)
+            if length > MAX_BODY:
+                writer.write(_response(413, b'{"error": "Body too large"}', False))
+                break
+            body = await reader.readexactly(length) if length else b''
+
+            key = f"{method} {target}"
+            version = data.version() if method in ('GET', 'HEAD') else None
+            if version is not None and headers.get('if-none-match', '').strip('"') == version:
+                writer.write(_response(304, b'', keep_alive, version))
+            else:
+                payload = data.cached(key, version) if version is not None else None
+                if payload is not None:
+                    status, etag = 200, version
+                else:
+                    try:
+                        # pandas work runs off the event loop so other connections keep flowing
+                        status, result, etag = await loop.run_in_executor(
+                            None, route, data, method, target, body)
+                    except HTTPError as e:
+                        status, result, etag = e.status, {'error': str(e)}, None
+                    except Exception as e:
+                        status, result, etag = 500, {'error': f"{type(e).__name__}: {e}"}, None
+                    payload = json.dumps(result).encode()
+                    if status == 200 and etag is not None:
+                        data.store(key, etag, payload)
+                writer.write(_response(status, b'' if method == 'HEAD' else payload, keep_alive, etag))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8502, data: Optional[TrackerData] = None) -> None:
+    """Run the API server forever."""
+    data = data or TrackerData()
+    server = await asyncio.start_server(lambda r, w: handle_connection(data, r, w), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def start_in_thread(host: str = '127.0.0.1', port: int = 8502,
+                    data: Optional[TrackerData] = None) -> threading.Thread:
+    """
+    Start the API on a daemon thread with its own event loop.
+
+    Running inside the Streamlit process lets the API report live statuses
+    from the shared status bus.
+
+    Args:
+        host: Interface to bind.
+        port: Port to bind.
+        data: Tables to serve; defaults to the unsharded data directory.
+
+    Returns:
+        The server thread.
+    """
+    thread = threading.Thread(target=asyncio.run, args=(serve(host, port, data),),
+                              name="tracker-api", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tracker REST/JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--shard', help="Serve this site's shard instead of the unsharded data directory")
+    args = parser.parse_args()
+    shard = shard_paths(args.shard)
+    asyncio.run(serve(args.host, args.port, TrackerData(shard.staff_file, shard.calls_dir, shard.teams_file)))
@@ -0,0 +1,189 @@
+"""
+Collision-free, time-ordered call IDs.
+
+IDs are 63-bit integers laid out snowflake-style:
+
+    | 41 bits: ms since ID_EPOCH | 10 bits: worker | 12 bits: sequence |
+
+Each process claims its own worker number by taking an exclusive lock on
+one of the lease files under the data directory, so IDs are unique across
+threads (a lock guards the sequence) and across processes on the node (no
+two live processes hold the same lease). Because the timestamp is the high
+part, IDs sort in creation order and are always larger than the legacy
+second-based IDs, so appending new calls keeps the call table sorted.
+"""
+import datetime
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from storage import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ID_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+_EPOCH_MS = int(ID_EPOCH.timestamp() * 1000)
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+LEASE_DIR = os.path.join(DATA_DIR, ".call_id_workers")
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def claim_worker_id(lease_dir: str = LEASE_DIR) -> Tuple[int, int]:
+    """
+    Claim a worker number no other live process on this node holds.
+
+    The lock is released by the OS when the process exits, so leases from
+    crashed processes are reused automatically.
+
+    Args:
+        lease_dir: Directory holding one lease file per worker number.
+
+    Returns:
+        The worker number and the open lease file descriptor, which must be
+        kept open for as long as the worker number is in use.
+    """
+    os.makedirs(lease_dir, exist_ok=True)
+    for worker_id in range(MAX_WORKER + 1):
+        fd = os.open(os.path.join(lease_dir, f"{worker_id}.lease"), os.O_RDWR | os.O_CREAT, 0o644)
+        if _try_lock(fd):
+            return worker_id, fd
+        os.close(fd)
+    raise RuntimeError(f"All {MAX_WORKER + 1} call ID worker leases are taken")
+
+
+class CallIdGenerator:
+    def __init__(self, worker_id: int) -> None:
+        """
+        Thread-safe generator of snowflake call IDs for one worker.
+
+        Args:
+            worker_id: Number in [0, MAX_WORKER] unique to this process.
+        """
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER}")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _reserve(self, count: int) -> Tuple[int, int, int]:
+        # Returns (ms, first sequence, how many) from the current millisecond
+        with self._lock:
+            now = int(time.time() * 1000) - _EPOCH_MS
+            if now < self._last_ms:
+                # Clock stepped back; keep issuing from the last millisecond
+                now = self._last_ms
+            if now == self._last_ms:
+                if self._sequence > MAX_SEQUENCE:
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000) - _EPOCH_MS
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            first = self._sequence
+            taken = min(count, MAX_SEQUENCE + 1 - first)
+            self._sequence += taken
+            return now, first, taken
+
+    def next_id(self) -> int:
+        """Return a new unique call ID."""
+        ms, sequence, _ = self._reserve(1)
+        return (ms << TIMESTAMP_SHIFT) | (self.worker_id << SEQUENCE_BITS) | sequence
+
+    def next_ids(self, count: int) -> List[int]:
+        """
+        Return several new call IDs in ascending order.
+
+        Args:
+            count: Number of IDs wanted.
+
+        Returns:
+            List of unique, increasing IDs.
+        """
+        ids: List[int] = []
+        while len(ids) < count:
+            ms, first, taken = self._reserve(count - len(ids))
+            base = (ms << TIMESTAMP_SHIFT) | (self.worker_id << SEQUENCE_BITS)
+            ids.extend(range(base + first, base + first + taken))
+        return ids
+
+
+def id_to_datetime(call_id: int) -> datetime.datetime:
+    """Return the UTC time a snowflake call ID was issued."""
+    ms = (int(call_id) >> TIMESTAMP_SHIFT) + _EPOCH_MS
+    return datetime.datetime.fromtimestamp(ms / 1000, tz=datetime.timezone.utc)
+
+
+def id_range(start: datetime.datetime, end: datetime.datetime) -> Tuple[int, int]:
+    """
+    Smallest and largest call IDs that can be issued in [start, end).
+
+    Lets a time window be answered with a binary search over the sorted
+    call_id column instead of parsing dates.
+
+    Args:
+        start: Window start; naive datetimes are taken as local time.
+        end: Window end (exclusive).
+
+    Returns:
+        (low, high) bounds, both inclusive.
+    """
+    low_ms = max(int(start.timestamp() * 1000) - _EPOCH_MS, 0)
+    high_ms = max(int(end.timestamp() * 1000) - _EPOCH_MS, 0)
+    return low_ms << TIMESTAMP_SHIFT, (high_ms << TIMESTAMP_SHIFT) - 1
+
+
+_generator: Optional[CallIdGenerator] = None
+_generator_lock = threading.Lock()
+_lease_fd: Optional[int] = None
+
+
+def get_generator(lease_dir: str = LEASE_DIR) -> CallIdGenerator:
+    """
+    Return this process's call ID generator, claiming a worker lease on first use.
+
+    The CALL_ID_WORKER environment variable pins the worker number instead,
+    for deployments that assign them centrally.
+
+    Args:
+        lease_dir: Directory holding the worker lease files.
+
+    Returns:
+        The shared CallIdGenerator.
+    """
+    global _generator, _lease_fd
+    with _generator_lock:
+        if _generator is None:
+            if os.environ.get('CALL_ID_WORKER'):
+                worker_id = int(os.environ['CALL_ID_WORKER'])
+            else:
+                worker_id, _lease_fd = claim_worker_id(lease_dir)
+            _generator = CallIdGenerator(worker_id)
+        return _generator
+
+
+def new_call_id() -> int:
+    """Return a new unique call ID from this process's generator."""
+    return get_generator().next_id()
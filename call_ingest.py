@@ -0,0 +1,250 @@
+"""
+Bulk ingestion of call-detail records (CDRs).
+
+A batch is validated in one vectorized pass, de-duplicated on call_id,
+appended to the call table in a single write and rolled up into the staff
+counters with a single rewrite of the staff table.
+
+Usage:
+    python call_ingest.py cdrs_0900.csv cdrs_1000.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from call_ids import get_generator
+from call_store import append_calls, existing_call_ids
+from classes import get_staff_repository
+from event_log import log_event
+from leaderboard import get_leaderboard
+from query_cache import get_query_cache
+from wal import get_journal
+from storage import (CALLS_DIR, STAFF_FILE, TEAMS_FILE, CALL_COLUMNS, CALL_STATUSES,
+                     DATE_FORMAT, SUCCESS_THRESHOLD, atomic_write)
+
+
+class IngestResult(NamedTuple):
+    """Outcome of a call ingestion batch."""
+    accepted: pd.DataFrame
+    rejected: pd.DataFrame
+
+
+def read_cdr(path: str) -> pd.DataFrame:
+    """
+    Read a CDR batch from a CSV or JSON-lines file.
+
+    Args:
+        path: File ending in .csv, .jsonl or .ndjson.
+
+    Returns:
+        The raw batch.
+    """
+    # call_id stays text (or Python ints) until validate_calls(): snowflake IDs
+    # are 63-bit and a column with gaps would otherwise be read as float64
+    if path.endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            return pd.DataFrame([json.loads(line) for line in f if line.strip()], dtype=object)
+    return pd.read_csv(path, dtype={'call_id': str})
+
+
+def parse_call_ids(values: pd.Series) -> pd.Series:
+    """
+    Parse call IDs exactly, without passing through float64.
+
+    Args:
+        values: Raw call_id values (ints or text).
+
+    Returns:
+        Nullable Int64 series; NA where a value is missing or not an
+        integer in the int64 range.
+    """
+    text = values.astype('string').str.strip()
+    numeric = text.str.fullmatch(r'[+-]?\d+').fillna(False).astype(bool)
+    parsed = text[numeric].map(int)
+    limits = np.iinfo('int64')
+    parsed = parsed[(parsed >= limits.min) & (parsed <= limits.max)]
+    ids = pd.Series(pd.NA, index=values.index, dtype='Int64')
+    ids[parsed.index] = parsed.to_numpy(dtype='int64')
+    return ids
+
+
+def validate_calls(batch: pd.DataFrame,
+                   staff_teams: pd.Series,
+                   known_team_ids: np.ndarray,
+                   existing_call_ids: np.ndarray) -> IngestResult:
+    """
+    Check a CDR batch in one vectorized pass.
+
+    Rows without a call_id get a fresh one from the call ID generator, rows
+    without a team_id take their handler's team and rows without a date are
+    stamped with the current time.
+
+    Args:
+        batch: Raw CDR rows.
+        staff_teams: Team of each known staff member, indexed by staff_id.
+        known_team_ids: Valid team IDs.
+        existing_call_ids: Call IDs already stored.
+
+    Returns:
+        IngestResult: Rows ready to append (in CALL_COLUMNS order) and
+        rejected rows with an 'error' column.
+    """
+    missing = [c for c in ('status', 'time_elapsed', 'sat_score', 'handler_id')
+               if c not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    df = batch.copy()
+    raw_ids = df['call_id'] if 'call_id' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    unnumbered = raw_ids.isna()
+    df['call_id'] = parse_call_ids(raw_ids)
+    if unnumbered.any():
+        df.loc[unnumbered, 'call_id'] = np.array(get_generator().next_ids(int(unnumbered.sum())),
+                                                 dtype='int64')
+    for column in ('time_elapsed', 'sat_score', 'handler_id'):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    handler_team = df['handler_id'].map(staff_teams)
+    if 'team_id' in df.columns:
+        df['team_id'] = pd.to_numeric(df['team_id'], errors='coerce').fillna(handler_team)
+    else:
+        df['team_id'] = handler_team
+    if 'date' in df.columns:
+        parsed = pd.to_datetime(df['date'], format=DATE_FORMAT, errors='coerce')
+    else:
+        parsed = pd.Series(pd.Timestamp.now().floor('min'), index=df.index)
+    df['date'] = parsed.dt.strftime(DATE_FORMAT)
+
+    error = pd.Series('', index=df.index, dtype=object)
+
+    def flag(mask: pd.Series, message: str) -> None:
+        error[mask & (error == '')] = message
+
+    flag(df['call_id'].isna(), "invalid call_id")
+    flag(~df['status'].isin(CALL_STATUSES), "invalid status")
+    flag(~df['sat_score'].between(0, 1), "sat_score out of range")
+    flag(df['time_elapsed'].isna() | (df['time_elapsed'] < 0), "invalid time_elapsed")
+    flag(~df['handler_id'].isin(staff_teams.index), "unknown handler_id")
+    flag(~df['team_id'].isin(known_team_ids), "unknown team_id")
+    flag(parsed.isna(), "invalid date")
+    flag(df['call_id'].isin(existing_call_ids), "duplicate call_id")
+    flag(df['call_id'].duplicated(keep='first'), "duplicate call_id in batch")
+
+    ok = (error == '').to_numpy()
+    accepted = df.loc[ok, CALL_COLUMNS]
+    accepted = accepted.astype({'call_id': 'int64', 'handler_id': 'int64', 'team_id': 'int64'})
+    # Generated IDs are time-ordered, so sorting keeps appends in call_id order
+    accepted = accepted.sort_values('call_id', kind='stable')
+    rejected = batch.loc[~ok].assign(error=error[~ok])
+    return IngestResult(accepted, rejected)
+
+
+def rollup_staff(staff_df: pd.DataFrame, calls: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add a batch of calls to the staff counters.
+
+    Args:
+        staff_df: Staff table.
+        calls: Accepted calls.
+
+    Returns:
+        The staff table with calls_taken, successful_calls, failed_calls and
+        avg_sat_score updated.
+    """
+    success = calls['sat_score'] >= SUCCESS_THRESHOLD
+    totals = pd.DataFrame({
+        'calls': calls.groupby('handler_id').size(),
+        'successful': success.groupby(calls['handler_id']).sum(),
+        'sat_sum': calls.groupby('handler_id')['sat_score'].sum(),
+    })
+    totals = totals.reindex(staff_df['staff_id'], fill_value=0).to_numpy()
+    new_calls, new_success, sat_sum = totals[:, 0], totals[:, 1], totals[:, 2]
+
+    staff_df = staff_df.copy()
+    old_calls = staff_df['calls_taken'].to_numpy()
+    calls_taken = old_calls + new_calls
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = (staff_df['avg_sat_score'].to_numpy() * old_calls + sat_sum) / calls_taken
+    staff_df['avg_sat_score'] = np.where(new_calls > 0, avg, staff_df['avg_sat_score'])
+    staff_df['calls_taken'] = calls_taken.astype('int64')
+    staff_df['successful_calls'] = (staff_df['successful_calls'] + new_success).astype('int64')
+    staff_df['failed_calls'] = (staff_df['failed_calls'] + new_calls - new_success).astype('int64')
+    return staff_df
+
+
+def ingest_calls(batch: pd.DataFrame,
+                 calls_path: str = CALLS_DIR,
+                 staff_file: str = STAFF_FILE,
+                 teams_file: str = TEAMS_FILE) -> IngestResult:
+    """
+    Validate, de-duplicate and store a batch of calls.
+
+    The handlers' new counters are pushed to the shard's leaderboard.
+
+    Each day partition the batch touches gets one append and the staff
+    table one rewrite, whatever the batch size. Only those day partitions
+    are read to find duplicate call IDs. The whole cycle holds the shard's
+    write lock, and the batch is logged to the write-ahead log before
+    anything is written.
+
+    Args:
+        batch: Raw CDR rows.
+        calls_path: Calls directory (or legacy single call CSV) to append to.
+        staff_file: Staff CSV file whose counters are updated.
+        teams_file: Team CSV file holding the known team IDs.
+
+    Returns:
+        IngestResult: The rows stored and the rows rejected.
+    """
+    with get_journal(staff_file).transaction() as journal:
+        staff_df = pd.read_csv(staff_file)
+        teams = pd.read_csv(teams_file, usecols=['team_id'])['team_id'].to_numpy()
+        dates = batch['date'] if 'date' in batch.columns else pd.Series([pd.Timestamp.now().strftime(DATE_FORMAT)])
+        existing = existing_call_ids(calls_path, dates.astype(str))
+
+        result = validate_calls(batch, staff_df.set_index('staff_id')['team_id'], teams, existing)
+        if result.accepted.empty:
+            return result
+
+        journal.append('call_end', {'calls_path': calls_path, 'calls': result.accepted.to_dict('records')})
+        append_calls(result.accepted, calls_path)
+        staff_df = rollup_staff(staff_df, result.accepted)
+        with atomic_write(staff_file) as f:
+            staff_df.to_csv(f, index=False)
+        get_staff_repository(staff_file).reload()
+        get_leaderboard(staff_file).update_frame(
+            staff_df[staff_df['staff_id'].isin(result.accepted['handler_id'])])
+    get_query_cache(staff_file).invalidate_teams(result.accepted['team_id'])
+    # One summary event per batch rather than one per call
+    log_event('calls.ingested', calls_path=calls_path, accepted=len(result.accepted),
+              rejected=len(result.rejected), handlers=result.accepted['handler_id'].nunique())
+    return result
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk call-detail record ingestion")
+    parser.add_argument('paths', nargs='+', help="CSV or JSONL CDR files")
+    parser.add_argument('--calls-path', default=CALLS_DIR)
+    parser.add_argument('--staff-file', default=STAFF_FILE)
+    parser.add_argument('--teams-file', default=TEAMS_FILE)
+    parser.add_argument('--rejects', help="Write rejected rows to this CSV file")
+    args = parser.parse_args(argv)
+
+    batch = pd.concat([read_cdr(p) for p in args.paths], ignore_index=True)
+    start = time.perf_counter()
+    result = ingest_calls(batch, args.calls_path, args.staff_file, args.teams_file)
+    elapsed = time.perf_counter() - start
+
+    print(f"Ingested {len(result.accepted)} calls, rejected {len(result.rejected)} "
+          f"in {elapsed:.2f}s ({len(batch) / elapsed:,.0f} calls/sec).")
+    if args.rejects and not result.rejected.empty:
+        result.rejected.to_csv(args.rejects, index=False)
+    return 1 if not result.rejected.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Time-partitioned call archive.
+
+Calls are stored one CSV per day under the calls directory:
+
+    data/calls/2025-07-19.csv
+    data/calls/archive/2025-06.csv.gz
+
+Reads for a time window only open the partitions that overlap it, so
+"Today" touches a single small file. compact() folds day partitions older
+than the retention policy's threshold into one gzip archive per month and
+drops archives past the retention limit. Compaction rewrites and deletes
+day files, so it must not run while another process is appending calls
+to the same directory; the compact command below (and the dashboard)
+therefore compact inside a journal transaction, which journaled writers
+in every process wait on.
+
+For backwards compatibility every function here also accepts the path of
+a single call CSV file and then behaves like the old flat table.
+
+Usage:
+    python call_store.py migrate
+    python call_store.py compact --archive-after 31 --retain-days 730
+"""
+import argparse
+import datetime
+import os
+import sys
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from schema import enforce, for_disk, read_dtypes
+import wal
+from storage import CALLS_DIR, CALLS_FILE, CALL_COLUMNS, STAFF_FILE, write_lock
+
+ARCHIVE_DIR = 'archive'
+
+
+class RetentionPolicy(NamedTuple):
+    """How long call partitions stay hot and how long they are kept at all."""
+    archive_after_days: int = 31
+    retain_days: Optional[int] = None
+
+
+def _day_keys(dates: pd.Series) -> pd.Series:
+    # 'dd/mm/YYYY HH:MM' -> 'YYYY-MM-DD' without parsing
+    return dates.str[6:10] + '-' + dates.str[3:5] + '-' + dates.str[0:2]
+
+
+def _partitions(calls_dir: str) -> List[str]:
+    if not os.path.isdir(calls_dir):
+        return []
+    return sorted(name[:-4] for name in os.listdir(calls_dir) if name.endswith('.csv'))
+
+
+def _archives(calls_dir: str) -> List[str]:
+    path = os.path.join(calls_dir, ARCHIVE_DIR)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name[:-7] for name in os.listdir(path) if name.endswith('.csv.gz'))
+
+
+def _partition_path(calls_dir: str, day: str) -> str:
+    return os.path.join(calls_dir, f"{day}.csv")
+
+
+def _archive_path(calls_dir: str, month: str) -> str:
+    return os.path.join(calls_dir, ARCHIVE_DIR, f"{month}.csv.gz")
+
+
+def partition_files(calls_dir: str,
+                    start: Optional[datetime.datetime] = None,
+                    end: Optional[datetime.datetime] = None) -> List[str]:
+    """
+    Files that may hold calls in [start, end), archives first.
+
+    Args:
+        calls_dir: Calls directory.
+        start: Window start, or None for no lower bound.
+        end: Window end (exclusive), or None for no upper bound.
+
+    Returns:
+        Paths of the overlapping archives and day partitions.
+    """
+    first_day = start.strftime('%Y-%m-%d') if start is not None else None
+    last_day = end.strftime('%Y-%m-%d') if end is not None else None
+    first_month = first_day[:7] if first_day else None
+    last_month = last_day[:7] if last_day else None
+
+    files = [_archive_path(calls_dir, month) for month in _archives(calls_dir)
+             if (first_month is None or month >= first_month) and (last_month is None or month <= last_month)]
+    files += [_partition_path(calls_dir, day) for day in _partitions(calls_dir)
+              if (first_day is None or day >= first_day) and (last_day is None or day <= last_day)]
+    return files
+
+
+def read_calls(calls_path: str = CALLS_DIR,
+               start: Optional[datetime.datetime] = None,
+               end: Optional[datetime.datetime] = None,
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read calls, opening only the partitions that overlap the window.
+
+    Args:
+        calls_path: Calls directory, or a single call CSV file.
+        start: Only return calls at or after this time.
+        end: Only return calls before this time.
+        columns: Columns to read; defaults to all CALL_COLUMNS.
+
+    Returns:
+        The calls typed by the schema, with the 'date' string replaced by a
+        parsed 'datetime' column.
+    """
+    usecols = [c for c in CALL_COLUMNS if columns is None or c in columns or c == 'date']
+    if os.path.isdir(calls_path):
+        files = partition_files(calls_path, start, end)
+    else:
+        files = [calls_path] if os.path.exists(calls_path) else []
+    dtypes = read_dtypes('calls')
+    frames = [pd.read_csv(f, usecols=lambda c: c in usecols, dtype=dtypes) for f in files]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=usecols)
+    df = enforce(df, 'calls')
+    if start is not None:
+        df = df[df['datetime'] >= start]
+    if end is not None:
+        df = df[df['datetime'] < end]
+    return df.reset_index(drop=True)
+
+
+def existing_call_ids(calls_path: str, dates: Optional[pd.Series] = None) -> np.ndarray:
+    """
+    Call IDs already stored, for de-duplication.
+
+    Args:
+        calls_path: Calls directory, or a single call CSV file.
+        dates: 'date' strings of an incoming batch; only the matching day
+            partitions (and their month archives) are read.
+
+    Returns:
+        Array of stored call IDs.
+    """
+    if os.path.isdir(calls_path) and dates is not None:
+        days = set(_day_keys(dates.dropna()))
+        months = {d[:7] for d in days}
+        files = [_archive_path(calls_path, m) for m in _archives(calls_path) if m in months]
+        files += [_partition_path(calls_path, d) for d in _partitions(calls_path) if d in days]
+    elif os.path.isdir(calls_path):
+        files = partition_files(calls_path)
+    else:
+        files = [calls_path] if os.path.exists(calls_path) else []
+    ids = [pd.read_csv(f, usecols=['call_id'])['call_id'].to_numpy() for f in files]
+    return np.concatenate(ids) if ids else np.empty(0, dtype='int64')
+
+
+def append_calls(calls: pd.DataFrame, calls_path: str = CALLS_DIR) -> None:
+    """
+    Append call rows without rewriting existing data.
+
+    Each day partition touched by the batch gets a single append.
+
+    Args:
+        calls: Rows holding the CALL_COLUMNS, or typed rows with 'datetime'
+            in place of 'date'.
+        calls_path: Calls directory, or a single call CSV file.
+    """
+    calls = for_disk(calls, 'calls')
+    if not os.path.isdir(calls_path) and os.path.splitext(calls_path)[1] == '.csv':
+        _append_file(calls, calls_path)
+        return
+    os.makedirs(calls_path, exist_ok=True)
+    for day, rows in calls.groupby(_day_keys(calls['date']), sort=True):
+        _append_file(rows, _partition_path(calls_path, day))
+
+
+def _append_file(rows: pd.DataFrame, path: str) -> None:
+    exists = os.path.exists(path)
+    rows.to_csv(path, mode='a' if exists else 'w', header=not exists, index=False)
+
+
+def compact(calls_dir: str = CALLS_DIR, policy: RetentionPolicy = RetentionPolicy(),
+            today: Optional[datetime.date] = None) -> List[str]:
+    """
+    Fold old day partitions into monthly archives and apply retention.
+
+    Runs under the data directory's write lock, so appends from this
+    process (ingest_calls holds the same lock) wait until the partitions are
+    folded. That lock does not reach other processes: callers wrap this in
+    a journal transaction, as the compact command and the dashboard do, so
+    journaled writers in the API server and ingest CLIs wait too.
+
+    Args:
+        calls_dir: Calls directory.
+        policy: When to archive and when to delete.
+        today: Reference date; defaults to today.
+
+    Returns:
+        Paths of the archives written or deleted.
+    """
+    with write_lock(calls_dir):
+        today = today or datetime.date.today()
+        archive_before = (today - datetime.timedelta(days=policy.archive_after_days)).isoformat()
+        touched = []
+
+        old_days = [d for d in _partitions(calls_dir) if d < archive_before]
+        by_month = {}
+        for day in old_days:
+            by_month.setdefault(day[:7], []).append(day)
+        if by_month:
+            os.makedirs(os.path.join(calls_dir, ARCHIVE_DIR), exist_ok=True)
+        for month, days in by_month.items():
+            path = _archive_path(calls_dir, month)
+            frames = [pd.read_csv(path)] if os.path.exists(path) else []
+            frames += [pd.read_csv(_partition_path(calls_dir, d)) for d in days]
+            merged = pd.concat(frames, ignore_index=True).sort_values('call_id', kind='stable')
+            tmp = path + '.tmp'
+            merged.to_csv(tmp, index=False, compression='gzip')
+            os.replace(tmp, path)
+            for day in days:
+                os.remove(_partition_path(calls_dir, day))
+            touched.append(path)
+
+        if policy.retain_days is not None:
+            drop_before = (today - datetime.timedelta(days=policy.retain_days)).isoformat()
+            for month in _archives(calls_dir):
+                # An archive goes once its whole month is past the retention limit
+                if month < drop_before[:7]:
+                    os.remove(_archive_path(calls_dir, month))
+                    touched.append(_archive_path(calls_dir, month))
+            for day in _partitions(calls_dir):
+                if day < drop_before:
+                    os.remove(_partition_path(calls_dir, day))
+    return touched
+
+
+def migrate_single_file(calls_file: str = CALLS_FILE, calls_dir: str = CALLS_DIR) -> bool:
+    """
+    Split a flat call CSV into day partitions.
+
+    The flat file is renamed with a '.migrated' suffix rather than deleted.
+
+    Args:
+        calls_file: The old single call CSV.
+        calls_dir: Calls directory to populate.
+
+    Returns:
+        True if a migration took place.
+    """
+    if not os.path.exists(calls_file):
+        return False
+    calls = pd.read_csv(calls_file, usecols=lambda c: c in CALL_COLUMNS)
+    append_calls(calls.sort_values('call_id', kind='stable'), calls_dir)
+    os.replace(calls_file, calls_file + '.migrated')
+    return True
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Call partition maintenance")
+    parser.add_argument('--calls-dir', default=CALLS_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate = commands.add_parser('migrate', help="Split the flat call table into partitions")
+    migrate.add_argument('--calls-file', default=CALLS_FILE)
+    comp = commands.add_parser('compact', help="Archive old partitions and apply retention")
+    comp.add_argument('--archive-after', type=int, default=RetentionPolicy().archive_after_days)
+    comp.add_argument('--retain-days', type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        print("Migrated." if migrate_single_file(args.calls_file, args.calls_dir) else "Nothing to migrate.")
+    else:
+        # The journal's lock is shared with the dashboard, API and ingest processes
+        staff_file = os.path.join(os.path.dirname(os.path.abspath(args.calls_dir)), os.path.basename(STAFF_FILE))
+        with wal.get_journal(staff_file).transaction():
+            touched = compact(args.calls_dir, RetentionPolicy(args.archive_after, args.retain_days))
+        print(f"Compacted {len(touched)} archive(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
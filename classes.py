@@ -3,8 +3,17 @@ Created by <REDACTED FOR ANONYMITY>
 Created on 18/07/2025 at 15:35
 """
 import csv
+import logging
+import os
 import time
-from typing import List, Dict, Union, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Union, Optional, Iterable, Iterator, Set, Tuple
+
+from event_log import log_event
+from query_cache import get_query_cache
+from status_events import status_bus
+from storage import SUCCESS_THRESHOLD, atomic_write
+from wal import Journal, get_journal
 
 
 def handle_csv(filename: str, mode: str,
@@ -22,17 +31,217 @@ def handle_csv(filename: str, mode: str,
     Returns:
         List of dictionaries when reading, None when writing.
     """
+    if mode == 'w':
+        # Replace the whole file atomically so a crash never leaves half a table
+        with atomic_write(filename) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(data)
+        return None
     with open(filename, mode, newline='') as csvfile:
         if mode == 'r':
             return list(csv.DictReader(csvfile))
-        elif mode in ('w', 'a'):
+        elif mode == 'a':
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if mode == 'w':
-                writer.writeheader()
             writer.writerows(data)
             return None
         return None
 
+
+STAFF_FIELDS = ['staff_id', 'first_name', 'last_name']
+
+
+class StaffRepository:
+    def __init__(self, filename: str = 'staff_details.csv',
+                 fieldnames: Optional[List[str]] = None) -> None:
+        """
+        In-memory index over a staff CSV file, keyed by staff_id.
+
+        The file is read once on first access; every lookup afterwards is a
+        dict hit. Mutations are written back immediately unless they happen
+        inside a batch(), in which case a single write is made when the
+        outermost batch exits. If the data directory is journaled, each
+        mutation is logged to the write-ahead log before it is applied.
+
+        Args:
+            filename: Name of the CSV file backing the repository.
+            fieldnames: Columns to use when the file does not exist yet.
+        """
+        self.filename = filename
+        self.fieldnames = list(fieldnames or STAFF_FIELDS)
+        self._rows: Dict[str, Dict] = {}
+        self._loaded = False
+        self._batch_depth = 0
+        self._dirty = False
+
+    @property
+    def journal(self) -> Journal:
+        """Write-ahead log of the data directory holding the file."""
+        return get_journal(self.filename)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r', newline='') as csvfile:
+                reader = csv.DictReader(csvfile)
+                if reader.fieldnames:
+                    self.fieldnames = list(reader.fieldnames)
+                self._rows = {row['staff_id']: row for row in reader}
+        self._loaded = True
+
+    def reload(self) -> None:
+        """Drop the in-memory index so the next access re-reads the file."""
+        self._rows = {}
+        self._loaded = False
+
+    def get(self, staff_id: int) -> Optional[Dict]:
+        """
+        Look up a staff row by ID.
+
+        Args:
+            staff_id: ID of the staff member.
+
+        Returns:
+            The row as a dictionary, or None if the ID is unknown.
+        """
+        self._ensure_loaded()
+        return self._rows.get(str(staff_id))
+
+    def __contains__(self, staff_id: object) -> bool:
+        self._ensure_loaded()
+        return str(staff_id) in self._rows
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._rows)
+
+    def add(self, row: Dict) -> bool:
+        """
+        Insert a new staff row.
+
+        Args:
+            row: Row to insert; must contain a 'staff_id' key.
+
+        Returns:
+            True if the row was inserted, False if the ID already exists.
+        """
+        with self.journal.transaction():
+            self._ensure_loaded()
+            key = str(row['staff_id'])
+            if key in self._rows:
+                return False
+            self.journal.append('staff_add', {'rows': [row]})
+            for field in row:
+                if field not in self.fieldnames:
+                    self.fieldnames.append(field)
+            self._rows[key] = {k: str(v) for k, v in row.items()}
+            self._changed()
+        self._invalidate(self._rows[key])
+        log_event('staff.added', staff_id=int(key), fields=self._rows[key])
+        return True
+
+    def remove(self, staff_id: int) -> bool:
+        """
+        Delete a staff row.
+
+        Args:
+            staff_id: ID of the staff member to delete.
+
+        Returns:
+            True if a row was deleted, False if the ID was unknown.
+        """
+        with self.journal.transaction():
+            self._ensure_loaded()
+            if str(staff_id) not in self._rows:
+                return False
+            self.journal.append('staff_remove', {'staff_id': staff_id})
+            removed = self._rows.pop(str(staff_id))
+            self._changed()
+        self._invalidate(removed)
+        log_event('staff.removed', staff_id=int(staff_id))
+        return True
+
+    def update(self, staff_id: int, fields: Dict[str, object], op: str = 'staff_update') -> bool:
+        """
+        Overwrite some fields of an existing staff row.
+
+        Args:
+            staff_id: ID of the staff member to update.
+            fields: Mapping of field name to new value.
+            op: Operation name recorded in the write-ahead log.
+
+        Returns:
+            True if the row was updated, False if the ID was unknown.
+        """
+        with self.journal.transaction():
+            self._ensure_loaded()
+            row = self._rows.get(str(staff_id))
+            if row is None:
+                return False
+            self.journal.append(op, {'staff_id': staff_id, 'fields': fields})
+            previous_team = row.get('team_id')
+            row.update({k: str(v) for k, v in fields.items()})
+            self._changed()
+        if previous_team != row.get('team_id'):
+            self._invalidate({'team_id': previous_team})
+        self._invalidate(row)
+        log_event('staff.updated', staff_id=int(staff_id), op=op, fields=fields)
+        return True
+
+    def _invalidate(self, row: Dict) -> None:
+        # Cached query results of the row's team are stale now
+        cache = get_query_cache(self.filename)
+        if row.get('team_id') in (None, ''):
+            cache.clear()
+        else:
+            cache.invalidate_team(int(float(row['team_id'])))
+
+    @contextmanager
+    def batch(self) -> Iterator['StaffRepository']:
+        """
+        Group several mutations into a single write of the backing file.
+        """
+        with self.journal.transaction():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self.save()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self._batch_depth == 0:
+            self.save()
+
+    def save(self) -> None:
+        """Write every row back to the backing CSV file."""
+        with self.journal.transaction():
+            handle_csv(self.filename, 'w', list(self._rows.values()), self.fieldnames)
+        self._dirty = False
+
+
+_staff_repositories: Dict[str, StaffRepository] = {}
+
+
+def get_staff_repository(filename: str = 'staff_details.csv') -> StaffRepository:
+    """
+    Return the repository shared by everything that reads the given staff file.
+
+    Args:
+        filename: Name of the staff CSV file.
+
+    Returns:
+        The StaffRepository for that file, created on first use.
+    """
+    key = os.path.abspath(filename)
+    if key not in _staff_repositories:
+        _staff_repositories[key] = StaffRepository(filename)
+    return _staff_repositories[key]
+
+
 class Employee:
     def __init__(self, id: int, first_name: str, last_name: str) -> None:
         """
@@ -69,7 +278,9 @@ class Call:
 
 
 class Manager(Employee):
-    def __init__(self, id: int, first_name: str, last_name: str, staff_list: List[int]) -> None:
+    def __init__(self, id: int, first_name: str, last_name: str, staff_list: Iterable[int],
+                 repository: Optional[StaffRepository] = None,
+                 staff_file: str = 'staff_details.csv') -> None:
         """
         Manager class inheriting from Employee.
 
@@ -77,14 +288,25 @@ class Manager(Employee):
             id: Manager's unique ID.
             first_name: Manager's first name.
             last_name: Manager's last name.
-            staff_list: List of staff IDs under this manager.
+            staff_list: IDs of the staff under this manager.
+            repository: Staff repository to read and write; defaults to the
+                shared repository for staff_file.
+            staff_file: Staff CSV file whose shared repository is used when
+                no repository is given.
         """
         super().__init__(id, first_name, last_name)
-        self.staff_list = staff_list
-        print(f"New Manager Created: ID: {self.id}, First Name: {self.first_name}, "
-              f"Last Name: {self.last_name}, Staff_List: {self.staff_list}")
-
-    def add_staff(self, new_staff_id: int, first_name: str, last_name: str) -> None:
+        self.staff_list: Set[int] = set(staff_list)
+        self._repository = repository
+        self._staff_file = staff_file
+        log_event('manager.created', logging.DEBUG, manager_id=self.id, first_name=self.first_name,
+                  last_name=self.last_name, staff=len(self.staff_list))
+
+    @property
+    def repository(self) -> StaffRepository:
+        # Resolved on use so that copies of a Manager (e.g. cached ones) never hold stale rows
+        return self._repository if self._repository is not None else get_staff_repository(self._staff_file)
+
+    def add_staff(self, new_staff_id: int, first_name: str, last_name: str) -> bool:
         """
         Add a new staff member to the team.
 
@@ -92,40 +314,66 @@ class Manager(Employee):
             new_staff_id: ID of the new staff member.
             first_name: First name of the new staff.
             last_name: Last name of the new staff.
+
+        Returns:
+            True if the staff member was added, False if already in the team
+            or already in the staff table.
         """
-        if new_staff_id not in self.staff_list:
-            self.staff_list.append(new_staff_id)
-            new_staff = {
-                'staff_id': str(new_staff_id),
-                'first_name': first_name,
-                'last_name': last_name
-            }
-            print(f"Added staff with ID {new_staff_id} and name {first_name} {last_name}.")
-        else:
-            print(f"Staff with ID {new_staff_id} already exists.")
+        if new_staff_id not in self.staff_list and self.repository.add({
+            'staff_id': str(new_staff_id),
+            'first_name': first_name,
+            'last_name': last_name
+        }):
+            self.staff_list.add(new_staff_id)
+            return True
+        log_event('staff.exists', logging.WARNING, manager_id=self.id, staff_id=new_staff_id)
+        return False
+
+    def add_staff_many(self, new_staff: Iterable[Tuple[int, str, str]]) -> List[int]:
+        """
+        Add several staff members with a single write of the staff file.
 
-    def remove_staff(self, staff_id: int) -> None:
+        Args:
+            new_staff: (staff_id, first_name, last_name) tuples.
+
+        Returns:
+            IDs of the staff members that were actually added.
+        """
+        with self.repository.batch():
+            return [staff_id for staff_id, first_name, last_name in new_staff
+                    if self.add_staff(staff_id, first_name, last_name)]
+
+    def remove_staff(self, staff_id: int) -> bool:
         """
         Remove a staff member from the team.
 
         Args:
             staff_id: ID of the staff member to remove.
+
+        Returns:
+            True if the staff member was removed, False if not in the team.
         """
         if staff_id in self.staff_list:
-            self.staff_list.remove(staff_id)
-            staff_data = handle_csv('staff_details.csv', 'r')
-            updated_data = [row for row in staff_data if row['staff_id'] != str(staff_id)]
-
-            if updated_data:
-                handle_csv('staff_details.csv', 'w', updated_data, list(updated_data[0].keys()))
-            else:
-                # If no data left, write empty file with headers
-                handle_csv('staff_details.csv', 'w', [], ['staff_id', 'first_name', 'last_name'])
-            print(f"Removed staff with ID {staff_id}.")
-        else:
-            print(f"Staff with ID {staff_id} not found.")
+            self.staff_list.discard(staff_id)
+            self.repository.remove(staff_id)
+            return True
+        log_event('staff.not_found', logging.WARNING, manager_id=self.id, staff_id=staff_id)
+        return False
 
-    def edit_staff_name(self, staff_id: int, new_first_name: str, new_last_name: str) -> None:
+    def remove_staff_many(self, staff_ids: Iterable[int]) -> List[int]:
+        """
+        Remove several staff members with a single write of the staff file.
+
+        Args:
+            staff_ids: IDs of the staff members to remove.
+
+        Returns:
+            IDs of the staff members that were actually removed.
+        """
+        with self.repository.batch():
+            return [staff_id for staff_id in staff_ids if self.remove_staff(staff_id)]
+
+    def edit_staff_name(self, staff_id: int, new_first_name: str, new_last_name: str) -> bool:
         """
         Edit a staff member's name.
 
@@ -133,22 +381,34 @@ class Manager(Employee):
             staff_id: ID of the staff member.
             new_first_name: New first name.
             new_last_name: New last name.
+
+        Returns:
+            True if the staff member was found and updated.
         """
-        staff_data = handle_csv('staff_details.csv', 'r')
-        updated = False
+        if self.repository.update(staff_id, {'first_name': new_first_name,
+                                             'last_name': new_last_name}):
+            return True
+        log_event('staff.not_found', logging.WARNING, manager_id=self.id, staff_id=staff_id)
+        return False
 
-        for row in staff_data:
-            if row['staff_id'] == str(staff_id):
-                row['first_name'] = new_first_name
-                row['last_name'] = new_last_name
-                updated = True
-                break
+    def edit_many(self, changes: Dict[int, Dict[str, object]]) -> List[int]:
+        """
+        Apply field edits to several staff members with a single write.
 
-        if updated:
-            handle_csv('staff_details.csv', 'w', staff_data, list(staff_data[0].keys()))
-            print(f"Staff {staff_id} name updated to {new_first_name} {new_last_name}")
-        else:
-            print(f"Staff with ID {staff_id} not found.")
+        Args:
+            changes: Mapping of staff ID to the fields to overwrite.
+
+        Returns:
+            IDs of the staff members that were found and updated.
+        """
+        updated = []
+        with self.repository.batch():
+            for staff_id, fields in changes.items():
+                if self.repository.update(staff_id, fields):
+                    updated.append(staff_id)
+                else:
+                    log_event('staff.not_found', logging.WARNING, manager_id=self.id, staff_id=staff_id)
+        return updated
 
     def view_staff_detail(self, staff_id: int) -> None:
         """
@@ -157,11 +417,10 @@ class Manager(Employee):
         Args:
             staff_id: ID of the staff member to view.
         """
-        staff_data = handle_csv('staff_details.csv', 'r')
-        for row in staff_data:
-            if row['staff_id'] == str(staff_id):
-                print(",".join(f"{k}: {v}" for k, v in row.items()))
-                return
+        row = self.repository.get(staff_id)
+        if row is not None:
+            print(",".join(f"{k}: {v}" for k, v in row.items()))
+            return
         print(f"Staff with ID {staff_id} not found.")
 
     def view_staff_detail_selected(self, staff_id: int, fields_list: List[str]) -> None:
@@ -172,16 +431,15 @@ class Manager(Employee):
             staff_id: ID of the staff member to view.
             fields_list: List of fields to display.
         """
-        staff_data = handle_csv('staff_details.csv', 'r')
-        for row in staff_data:
-            if row['staff_id'] == str(staff_id):
-                selected = {k: v for k, v in row.items() if k in fields_list}
-                if selected:
-                    print("\n".join(f"{k}: {v}" for k, v in selected.items()))
-                else:
-                    print("None of the requested fields exist for this staff member.")
-                return
-        print(f"Staff with ID {staff_id} not found.")
+        row = self.repository.get(staff_id)
+        if row is None:
+            print(f"Staff with ID {staff_id} not found.")
+            return
+        selected = {k: v for k, v in row.items() if k in fields_list}
+        if selected:
+            print("\n".join(f"{k}: {v}" for k, v in selected.items()))
+        else:
+            print("None of the requested fields exist for this staff member.")
 
 
 class Staff(Employee):
@@ -215,7 +473,19 @@ class Staff(Employee):
         self.working_time_elapsed = working_time_elapsed
         self.avg_sat_score = avg_sat_score
         self.status = status
-        print(f"New Staff created with id: {self.id}, first name: {self.first_name}, last name: {self.last_name}")
+        self.workday_started_at: Optional[float] = None
+        log_event('staff.created', logging.DEBUG, staff_id=self.id, first_name=self.first_name,
+                  last_name=self.last_name)
+
+    def set_status(self, status: str) -> None:
+        """
+        Change this staff member's status and publish it to the status bus.
+
+        Args:
+            status: New status from ['Free', 'On Call', 'Lunch', 'Out of Office'].
+        """
+        self.status = status
+        status_bus.publish(self.id, status)
 
     def accept_call(self, call: Call) -> None:
         """
@@ -227,8 +497,8 @@ class Staff(Employee):
         call.status = "In Progress"
         call.time_elapsed = time.time()
         call.handler_id = self.id
-        self.status = "On Call"
-        print(f"Call {call.id} accepted by {self.id}")
+        self.set_status("On Call")
+        log_event('call.accepted', call_id=call.id, staff_id=self.id)
 
     def end_call(self, call: Call, user_sat_score:float) -> None:
         """
@@ -241,14 +511,15 @@ class Staff(Employee):
         call.time_elapsed = time.time() - call.time_elapsed
         self.calls_taken += 1
         call.sat_score = user_sat_score
-        if call.sat_score > 0.8:
+        if call.sat_score >= SUCCESS_THRESHOLD:
             self.successful_calls += 1
             call.status = "Successful"
         else:
             self.failed_calls += 1
             call.status = "Failed"
-        self.status = "Free"
-        print(f"Call {call.id} ended by staff_id {self.id}")
+        self.set_status("Free")
+        log_event('call.ended', call_id=call.id, staff_id=self.id, status=call.status,
+                  time_elapsed=round(call.time_elapsed, 1), sat_score=call.sat_score)
 
     def see_call_history(self) -> None:
         """
@@ -259,7 +530,7 @@ class Staff(Employee):
         in a formatted manner if calls are found, otherwise displays a not found message.
 
         Returns:
-            None: This method only prints output to console
+            None
         """
         call_data = handle_csv('call_details.csv', 'r')
         staff_calls = [row for row in call_data if row['handler_id'] == str(self.id)]
@@ -275,21 +546,24 @@ class Staff(Employee):
         """
         Record the start time of a workday for this staff member.
 
-        Sets the working_time_elapsed attribute to the current system time in seconds.
-        This serves as the baseline for calculating total work duration when end_workday() is called.
+        The start is kept in workday_started_at until end_workday() is called.
         """
-        self.working_time_elapsed = time.time()
+        self.workday_started_at = time.time()
 
     def end_workday(self) -> float:
         """
-        Calculate and record the end of a workday, returning total duration worked.
+        Calculate and record the end of a workday, returning the duration worked.
 
-        Computes the difference between current time and the start time recorded by
-        start_workday(), then prints completion notification with timestamp.
+        Adds the time since start_workday() to working_time_elapsed, which
+        totals every workday, then emits a 'workday.ended' event with the duration.
 
         Returns:
-            float: Total working duration in seconds
+            float: Duration of this workday in seconds; 0.0 if no workday was started
         """
-        self.working_time_elapsed = time.time() - self.working_time_elapsed
-        print(f"Staff ID {self.id} finished working at {time.gmtime(time.time())}")
-        return self.working_time_elapsed
\ No newline at end of file
+        if self.workday_started_at is None:
+            return 0.0
+        duration = time.time() - self.workday_started_at
+        self.working_time_elapsed += duration
+        self.workday_started_at = None
+        log_event('workday.ended', staff_id=self.id, duration=round(duration, 1))
+        return duration
\ No newline at end of file
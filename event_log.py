@@ -0,0 +1,148 @@
+"""
+Structured event log for the domain classes.
+
+Events are JSON lines such as
+
+    {"ts": 1752932100.52, "level": "INFO", "event": "call.ended", "call_id": 7, "staff_id": 101, ...}
+
+written by a background thread: log_event() only puts a record on a queue
+(QueueHandler) and a QueueListener does the formatting and I/O, so a
+Streamlit rerun or a bulk load never waits on the terminal or disk.
+
+Object construction is logged at DEBUG, below the default INFO level, so
+loading 100k staff is silent unless asked for. High-frequency events can
+be sampled, and the per-call events are by default; a sampled event
+carries its sample_rate so consumers can scale counts back up.
+
+Configured from the environment on first use, or explicitly with
+configure():
+
+    TRACKER_LOG_LEVEL=DEBUG
+    TRACKER_LOG_FILE=data/events.jsonl     (default: stderr)
+    TRACKER_LOG_SAMPLE=call.accepted=0.1,call.ended=0.5
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Dict, Mapping, Optional
+
+LOGGER_NAME = 'tracker'
+
+# Fraction of each event kept; events not listed are always kept
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {'call.accepted': 0.1, 'call.ended': 0.1}
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_rates: Dict[str, float] = dict(DEFAULT_SAMPLE_RATES)
+_configure_lock = threading.RLock()
+
+
+def _json_default(value: object) -> object:
+    # numpy scalars and anything else json does not know
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        """Render a record as one JSON object: ts, level, event, then its fields."""
+        entry = {'ts': round(record.created, 3), 'level': record.levelname, 'event': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=_json_default)
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        event, _, rate = part.partition('=')
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+def configure(level: Optional[int] = None, path: Optional[str] = None,
+              sample_rates: Optional[Mapping[str, float]] = None) -> logging.handlers.QueueListener:
+    """
+    (Re)start the event log.
+
+    Args:
+        level: Lowest level emitted; defaults to TRACKER_LOG_LEVEL or INFO.
+        path: File the JSON lines are appended to; defaults to
+            TRACKER_LOG_FILE, or stderr if that is unset too.
+        sample_rates: Fraction of each event name to keep; defaults to
+            TRACKER_LOG_SAMPLE or DEFAULT_SAMPLE_RATES.
+
+    Returns:
+        The running QueueListener.
+    """
+    global _listener
+    with _configure_lock:
+        shutdown()
+        level = level if level is not None else logging.getLevelName(os.environ.get('TRACKER_LOG_LEVEL', 'INFO'))
+        path = path or os.environ.get('TRACKER_LOG_FILE')
+        if sample_rates is None:
+            spec = os.environ.get('TRACKER_LOG_SAMPLE')
+            sample_rates = _parse_sample_rates(spec) if spec is not None else DEFAULT_SAMPLE_RATES
+        _sample_rates.clear()
+        _sample_rates.update(sample_rates)
+
+        output = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter())
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(level)
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        return _listener
+
+
+def shutdown() -> None:
+    """Write out every queued event and stop the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+atexit.register(shutdown)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: object) -> bool:
+    """
+    Emit one structured event.
+
+    Disabled levels and events dropped by sampling return before a log
+    record is built, so calls in hot paths cost a level check.
+
+    Args:
+        event: Dotted event name, e.g. 'call.ended'.
+        level: logging level of the event.
+        fields: JSON-serialisable event data.
+
+    Returns:
+        True if the event was queued for output.
+    """
+    if _listener is None:
+        with _configure_lock:
+            if _listener is None:
+                configure()
+    if not logger.isEnabledFor(level):
+        return False
+    rate = _sample_rates.get(event, 1.0)
+    if rate < 1.0:
+        if random.random() >= rate:
+            return False
+        fields['sample_rate'] = rate
+    logger.log(level, event, extra={'fields': fields})
+    return True
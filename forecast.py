@@ -0,0 +1,293 @@
+"""
+Call volume and success rate forecasts per team.
+
+Forecasts are fitted on the daily per-team rollups the analytics sketches
+already keep, for all teams at once as NumPy arrays of shape
+(teams, days):
+
+- Volume: day-of-week seasonal indices from the history, then Holt's
+  linear (level + trend) smoothing of the deseasonalised series. The
+  forecast for a day is (level + h * trend) * index of its weekday.
+- Success rate: exponentially smoothed successful calls over
+  exponentially smoothed calls, so quiet days weigh less than busy ones.
+
+Fitting is done by a background job that refreshes every team's forecast
+when the calls change (checked every REFRESH_SECONDS) and keeps the
+results in memory. The dashboard only reads the cached rows.
+
+Usage:
+    python forecast.py --team-id 1
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics import get_sketch_store
+from event_log import log_event
+from storage import CALLS_DIR, data_version
+
+HISTORY_DAYS = 56        # eight weeks: eight samples per weekday
+HORIZON_DAYS = 7
+ALPHA = 0.3              # level smoothing
+BETA = 0.05              # trend smoothing
+RATE_ALPHA = 0.2         # success rate smoothing
+REFRESH_SECONDS = 3600
+
+FORECAST_COLUMNS = ['team_id', 'date', 'calls', 'success_rate']
+
+
+def daily_matrix(daily: pd.DataFrame, first: datetime.date,
+                 last: datetime.date) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pivot daily rollups into dense (teams, days) arrays, with zeros for days without calls.
+
+    Args:
+        daily: Rows with team_id, day, calls and successful columns.
+        first: First day of the matrix.
+        last: Last day of the matrix.
+
+    Returns:
+        The team IDs and the calls and successful arrays.
+    """
+    n_days = (last - first).days + 1
+    offsets = (daily['day'].to_numpy().astype('datetime64[D]') - np.datetime64(first, 'D')).astype('int64')
+    inside = (offsets >= 0) & (offsets < n_days)
+    team_ids, rows = np.unique(daily['team_id'].to_numpy()[inside], return_inverse=True)
+    calls = np.zeros((len(team_ids), n_days))
+    successful = np.zeros((len(team_ids), n_days))
+    np.add.at(calls, (rows, offsets[inside]), daily['calls'].to_numpy()[inside])
+    np.add.at(successful, (rows, offsets[inside]), daily['successful'].to_numpy()[inside])
+    return team_ids, calls, successful
+
+
+def seasonal_indices(calls: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+    """
+    Day-of-week volume relative to each team's average day.
+
+    Args:
+        calls: (teams, days) daily calls.
+        weekdays: Weekday (Monday = 0) of each day.
+
+    Returns:
+        (teams, 7) indices; 1 where a team has no calls at all.
+    """
+    by_weekday = np.stack([calls[:, weekdays == d].mean(axis=1) if (weekdays == d).any()
+                           else calls.mean(axis=1) for d in range(7)], axis=1)
+    mean = calls.mean(axis=1, keepdims=True)
+    return np.divide(by_weekday, mean, out=np.ones_like(by_weekday), where=mean > 0)
+
+
+def holt(series: np.ndarray, alpha: float = ALPHA, beta: float = BETA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Holt's linear exponential smoothing of many series at once.
+
+    Args:
+        series: (series, days) values.
+        alpha: Level smoothing factor.
+        beta: Trend smoothing factor.
+
+    Returns:
+        Final level and trend of each series.
+    """
+    level = series[:, :min(7, series.shape[1])].mean(axis=1)
+    trend = np.zeros(len(series))
+    for t in range(series.shape[1]):
+        previous = level
+        level = alpha * series[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    return level, trend
+
+
+def smooth(series: np.ndarray, alpha: float = RATE_ALPHA) -> np.ndarray:
+    """Final value of simple exponential smoothing of each row."""
+    value = series[:, 0]
+    for t in range(1, series.shape[1]):
+        value = alpha * series[:, t] + (1 - alpha) * value
+    return value
+
+
+def fit_forecast(daily: pd.DataFrame, today: Optional[datetime.date] = None,
+                 history_days: int = HISTORY_DAYS, horizon_days: int = HORIZON_DAYS) -> pd.DataFrame:
+    """
+    Forecast each team's daily calls and success rate.
+
+    Today is treated as incomplete: the history ends yesterday and the
+    forecast covers the horizon_days from tomorrow.
+
+    Args:
+        daily: Daily rollups with team_id, day, calls and successful columns.
+        today: Reference date; defaults to today.
+        history_days: Days of history fitted.
+        horizon_days: Days forecast.
+
+    Returns:
+        pd.DataFrame with the FORECAST_COLUMNS, one row per team and day.
+        Teams without calls in the history are left out.
+    """
+    today = today or datetime.date.today()
+    last = today - datetime.timedelta(days=1)
+    first = today - datetime.timedelta(days=history_days)
+    team_ids, calls, successful = daily_matrix(daily, first, last)
+    if not len(team_ids):
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    weekdays = (np.arange(history_days) + first.weekday()) % 7
+    indices = seasonal_indices(calls, weekdays)
+    level, trend = holt(calls / np.where(indices[:, weekdays] > 0, indices[:, weekdays], 1))
+    smoothed_calls = smooth(calls)
+    rate = np.divide(smooth(successful), smoothed_calls,
+                     out=np.full(len(team_ids), np.nan), where=smoothed_calls > 0)
+
+    steps = np.arange(2, horizon_days + 2)              # days after the last observed day
+    dates = [last + datetime.timedelta(days=int(h)) for h in steps]
+    target_weekdays = np.array([d.weekday() for d in dates])
+    volume = np.maximum((level[:, None] + trend[:, None] * steps) * indices[:, target_weekdays], 0)
+    return pd.DataFrame({
+        'team_id': np.repeat(team_ids, len(dates)),
+        'date': np.tile(np.array(dates, dtype='datetime64[D]'), len(team_ids)),
+        'calls': volume.ravel(),
+        'success_rate': np.repeat(rate, len(dates)),
+    })
+
+
+class TeamForecast(NamedTuple):
+    """A team's forecast and when it was fitted."""
+    team_id: int
+    days: pd.DataFrame       # date, calls, success_rate
+    computed_at: float
+
+    @property
+    def next_day(self) -> float:
+        return float(self.days['calls'].iloc[0])
+
+    @property
+    def next_week(self) -> float:
+        return float(self.days['calls'].iloc[:7].sum())
+
+
+class Forecaster:
+    def __init__(self, calls_path: str = CALLS_DIR) -> None:
+        """
+        Background-refreshed forecasts for every team of one calls directory.
+
+        Args:
+            calls_path: Calls directory, or a single call CSV file.
+        """
+        self.calls_path = calls_path
+        self._teams: Dict[int, TeamForecast] = {}
+        self._fitted_on: Optional[Tuple[str, datetime.date]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self, today: Optional[datetime.date] = None, force: bool = False) -> bool:
+        """
+        Refit every team if the calls (or the date) changed since the last fit.
+
+        Args:
+            today: Reference date; defaults to today.
+            force: Refit even if nothing changed.
+
+        Returns:
+            True if the forecasts were refitted.
+        """
+        today = today or datetime.date.today()
+        fitted_on = (data_version(self.calls_path), today)
+        if not force and fitted_on == self._fitted_on:
+            return False
+        start = today - datetime.timedelta(days=HISTORY_DAYS)
+        daily = get_sketch_store(self.calls_path).daily(start, today - datetime.timedelta(days=1))
+        forecast = fit_forecast(daily, today)
+        computed_at = time.time()
+        teams = {int(team_id): TeamForecast(int(team_id), rows.drop(columns='team_id').reset_index(drop=True),
+                                            computed_at)
+                 for team_id, rows in forecast.groupby('team_id')}
+        with self._lock:
+            self._teams = teams
+            self._fitted_on = fitted_on
+        return True
+
+    def forecast(self, team_id: int) -> Optional[TeamForecast]:
+        """Return a team's latest precomputed forecast, or None if there is none yet."""
+        with self._lock:
+            return self._teams.get(int(team_id))
+
+    def _run(self, interval: float) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:  # keep the job alive; the next run may succeed
+                log_event('forecast.failed', logging.ERROR, calls_path=self.calls_path, error=repr(e))
+            if self._stop.wait(interval):
+                return
+
+    def start(self, interval: float = REFRESH_SECONDS) -> threading.Thread:
+        """
+        Fit now and then every interval seconds on a daemon thread.
+
+        Args:
+            interval: Seconds between checks for new calls.
+
+        Returns:
+            The job thread (already running if start() was called before).
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, args=(interval,),
+                                                name="tracker-forecast", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        """Stop the background job."""
+        self._stop.set()
+
+
+_forecasters: Dict[str, Forecaster] = {}
+_forecasters_lock = threading.Lock()
+
+
+def get_forecaster(calls_path: str = CALLS_DIR) -> Forecaster:
+    """
+    Return the Forecaster shared by everything that reads the given calls directory.
+
+    Args:
+        calls_path: Calls directory, or a single call CSV file.
+
+    Returns:
+        The Forecaster for that path, created on first use.
+    """
+    key = os.path.abspath(calls_path)
+    with _forecasters_lock:
+        if key not in _forecasters:
+            _forecasters[key] = Forecaster(calls_path)
+        return _forecasters[key]
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Call volume and success rate forecast per team")
+    parser.add_argument('--calls-path', default=CALLS_DIR)
+    parser.add_argument('--team-id', type=int)
+    args = parser.parse_args(argv)
+
+    today = datetime.date.today()
+    daily = get_sketch_store(args.calls_path).daily(today - datetime.timedelta(days=HISTORY_DAYS),
+                                                    today - datetime.timedelta(days=1))
+    forecast = fit_forecast(daily, today)
+    if args.team_id is not None:
+        forecast = forecast[forecast['team_id'] == args.team_id]
+    print(forecast.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
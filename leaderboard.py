@@ -0,0 +1,363 @@
+"""
+Staff leaderboard kept in rank order as calls end.
+
+Staff are ordered by success rate, then calls taken, then average
+satisfaction (best first). Each team and the whole shard have an
+indexable skip list of those keys, so updating one staff member, finding
+their rank or percentile and reading the top or bottom K are all
+O(log n) instead of a sort per page view. Staff who have not taken a
+call yet are not ranked.
+"""
+import math
+import os
+import random
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from storage import STAFF_FILE, read_staff
+
+MAX_LEVELS = 24  # plenty for millions of entries
+
+
+class _Infinity:
+    # Key of the tail sentinel; compares greater than every real key
+    def __lt__(self, other: object) -> bool:
+        return False
+
+    def __le__(self, other: object) -> bool:
+        return False
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key: object, levels: int) -> None:
+        self.key = key
+        self.next: List[Optional['_Node']] = [None] * levels
+        self.width = [1] * levels
+
+
+class RankedList:
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """
+        Indexable skip list of unique, comparable keys in ascending order.
+
+        Every link stores how many positions it skips, which gives
+        O(log n) insertion, removal, rank lookup and positional access.
+
+        Args:
+            seed: Seed for the level generator, for reproducible layouts.
+        """
+        self._tail = _Node(_Infinity(), 0)
+        self._head = _Node(None, MAX_LEVELS)
+        self._head.next = [self._tail] * MAX_LEVELS
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_levels(self) -> int:
+        return min(MAX_LEVELS, 1 - int(math.log(1.0 - self._random.random(), 2.0)))
+
+    def insert(self, key: object) -> None:
+        """Add a key; it must not already be present."""
+        chain = [self._head] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new = _Node(key, levels)
+        skipped = 0
+        for level in range(levels):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - skipped
+            previous.width[level] = skipped + 1
+            skipped += steps[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: object) -> None:
+        """
+        Remove a key.
+
+        Raises:
+            KeyError: If the key is not present.
+        """
+        chain = [self._head] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is self._tail or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key: object) -> int:
+        """
+        Zero-based position of a key.
+
+        Raises:
+            KeyError: If the key is not present.
+        """
+        position = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is self._tail or target.key != key:
+            raise KeyError(key)
+        return position
+
+    def iter_from(self, index: int) -> Iterator[object]:
+        """Yield keys in order starting at a zero-based position."""
+        if not 0 <= index < self._size:
+            return
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+
+    def __getitem__(self, index: int) -> object:
+        if index < 0:
+            index += self._size
+        for key in self.iter_from(index):
+            return key
+        raise IndexError("RankedList index out of range")
+
+
+class Standing(NamedTuple):
+    """A staff member's leaderboard entry."""
+    staff_id: int
+    team_id: int
+    success_rate: float
+    calls_taken: int
+    avg_sat_score: float
+
+
+def _key(standing: Standing) -> Tuple[float, int, float, int]:
+    # Ascending order of this key is best-first
+    return (-standing.success_rate, -standing.calls_taken, -standing.avg_sat_score, standing.staff_id)
+
+
+class Leaderboard:
+    def __init__(self, filename: str = STAFF_FILE) -> None:
+        """
+        Team and shard-wide staff rankings backed by a staff CSV file.
+
+        The file is read once, on first use; after that the board is kept
+        current by update() and remove() as calls end and staff change.
+
+        Args:
+            filename: Staff CSV file to load the initial standings from.
+        """
+        self.filename = filename
+        self._standings: Dict[int, Standing] = {}
+        self._overall = RankedList()
+        self._teams: Dict[int, RankedList] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            if os.path.exists(self.filename):
+                self.update_frame(read_staff(self.filename))
+
+    def _unrank(self, standing: Standing) -> None:
+        if standing.calls_taken > 0:
+            self._overall.remove(_key(standing))
+            self._teams[standing.team_id].remove(_key(standing))
+
+    def update(self, staff_id: int, team_id: int, calls_taken: int,
+               successful_calls: int, avg_sat_score: float) -> Standing:
+        """
+        Record a staff member's latest counters and move them to their new rank.
+
+        Args:
+            staff_id: Staff member to update.
+            team_id: Their team.
+            calls_taken: Total calls taken.
+            successful_calls: Total successful calls.
+            avg_sat_score: Average satisfaction score.
+
+        Returns:
+            Standing: The new entry.
+        """
+        staff_id, team_id, calls_taken = int(staff_id), int(team_id), int(calls_taken)
+        avg = float(avg_sat_score) if pd.notna(avg_sat_score) else 0.0
+        rate = int(successful_calls) / calls_taken if calls_taken > 0 else 0.0
+        standing = Standing(staff_id, team_id, rate, calls_taken, avg)
+        with self._lock:
+            self._ensure_loaded()
+            previous = self._standings.get(staff_id)
+            if previous is not None:
+                self._unrank(previous)
+            self._standings[staff_id] = standing
+            if calls_taken > 0:
+                self._overall.insert(_key(standing))
+                self._teams.setdefault(team_id, RankedList()).insert(_key(standing))
+        return standing
+
+    def update_frame(self, staff_df: pd.DataFrame) -> None:
+        """
+        Apply update() to every row of a staff frame.
+
+        Args:
+            staff_df: Rows with staff_id, team_id, calls_taken,
+                successful_calls and avg_sat_score columns.
+        """
+        columns = ['staff_id', 'team_id', 'calls_taken', 'successful_calls', 'avg_sat_score']
+        with self._lock:
+            self._ensure_loaded()
+            for row in staff_df[columns].itertuples(index=False):
+                self.update(*row)
+
+    def remove(self, staff_id: int) -> bool:
+        """
+        Drop a staff member from the board.
+
+        Returns:
+            True if they were on it.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            standing = self._standings.pop(int(staff_id), None)
+            if standing is None:
+                return False
+            self._unrank(standing)
+            return True
+
+    def _ranking(self, team_id: Optional[int]) -> RankedList:
+        if team_id is None:
+            return self._overall
+        return self._teams.get(int(team_id)) or RankedList()
+
+    def standing(self, staff_id: int) -> Optional[Standing]:
+        """Return a staff member's entry, or None if unknown."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._standings.get(int(staff_id))
+
+    def size(self, team_id: Optional[int] = None) -> int:
+        """Number of ranked staff in a team, or overall if team_id is None."""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._ranking(team_id))
+
+    def rank(self, staff_id: int, within_team: bool = False) -> Optional[int]:
+        """
+        A staff member's 1-based rank.
+
+        Args:
+            staff_id: Staff member to look up.
+            within_team: Rank within their own team instead of overall.
+
+        Returns:
+            The rank, or None if they are unknown or have no calls yet.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            standing = self._standings.get(int(staff_id))
+            if standing is None or standing.calls_taken == 0:
+                return None
+            ranking = self._ranking(standing.team_id if within_team else None)
+            return ranking.index(_key(standing)) + 1
+
+    def percentile(self, staff_id: int, within_team: bool = False) -> Optional[float]:
+        """
+        Percentage of ranked staff a staff member is ahead of.
+
+        Args:
+            staff_id: Staff member to look up.
+            within_team: Compare within their own team instead of overall.
+
+        Returns:
+            A value in [0, 100], or None if they are not ranked.
+        """
+        with self._lock:
+            rank = self.rank(staff_id, within_team)
+            if rank is None:
+                return None
+            standing = self._standings[int(staff_id)]
+            size = len(self._ranking(standing.team_id if within_team else None))
+            return 100.0 * (size - rank) / size
+
+    def top(self, k: int, team_id: Optional[int] = None) -> List[Standing]:
+        """
+        The best K staff, best first.
+
+        Args:
+            k: How many to return.
+            team_id: Only this team, or everyone if None.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            ranking = self._ranking(team_id)
+            keys = []
+            for key in ranking.iter_from(0):
+                if len(keys) == k:
+                    break
+                keys.append(key)
+            return [self._standings[key[-1]] for key in keys]
+
+    def bottom(self, k: int, team_id: Optional[int] = None) -> List[Standing]:
+        """
+        The worst K staff, worst first.
+
+        Args:
+            k: How many to return.
+            team_id: Only this team, or everyone if None.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            ranking = self._ranking(team_id)
+            keys = list(ranking.iter_from(max(len(ranking) - k, 0)))
+            return [self._standings[key[-1]] for key in reversed(keys)]
+
+
+_leaderboards: Dict[str, Leaderboard] = {}
+_leaderboards_lock = threading.Lock()
+
+
+def get_leaderboard(filename: str = STAFF_FILE) -> Leaderboard:
+    """
+    Return the leaderboard shared by everything that uses the given staff file.
+
+    Args:
+        filename: Staff CSV file.
+
+    Returns:
+        The Leaderboard for that file, created on first use.
+    """
+    key = os.path.abspath(filename)
+    with _leaderboards_lock:
+        if key not in _leaderboards:
+            _leaderboards[key] = Leaderboard(filename)
+        return _leaderboards[key]
@@ -11,6 +11,23 @@ import seaborn as sns
 import random
 
 from classes import * # import classes
+from storage import (STAFF_COLUMNS, CALL_COLUMNS, MANAGER_COLUMNS, STAFF_STATUS_FALLBACK, STAFF_STATUSES,
+                     SUCCESS_THRESHOLD, read_staff, read_teams, read_managers)
+from call_store import RetentionPolicy, append_calls, compact, migrate_single_file, read_calls
+from membership import get_membership_table, migrate_legacy_staff_lists
+from staff_io import import_staff, iter_staff_export, validate_staff_batch
+from status_events import status_bus
+from call_ingest import ingest_calls
+from call_ids import get_generator, new_call_id
+from dispatcher import dispatcher
+from analytics import get_sketch_store
+from forecast import get_forecaster
+from leaderboard import get_leaderboard
+from query_cache import get_query_cache
+from wal import get_journal
+from shards import compare_teams, current_shard
+from shifts import record_session, shift_report
+import api
 
 st.set_page_config(
     page_title="Employee Performance Tracker",
@@ -27,44 +44,48 @@ if 'current_call' not in st.session_state:
 if 'workday_started' not in st.session_state:
     st.session_state.workday_started = False
 
-DATA_DIR = "data"
-os.makedirs(DATA_DIR, exist_ok=True)
+# This process serves one site's shard (TRACKER_SHARD), or the unsharded data directory
+SHARD = current_shard()
+DATA_DIR = SHARD.root
+STAFF_FILE = SHARD.staff_file
+CALLS_FILE = os.path.join(DATA_DIR, "call_details.csv")  # pre-partitioning flat call table
+CALLS_DIR = SHARD.calls_dir
+TEAMS_FILE = SHARD.teams_file
+MANAGERS_FILE = SHARD.managers_file
+MEMBERSHIP_FILE = SHARD.membership_file
+SESSIONS_FILE = SHARD.sessions_file
 
-# File paths
-STAFF_FILE = os.path.join(DATA_DIR, "staff_details.csv")
-CALLS_FILE = os.path.join(DATA_DIR, "call_details.csv")
-TEAMS_FILE = os.path.join(DATA_DIR, "team_details.csv")
-MANAGERS_FILE = os.path.join(DATA_DIR, "manager_details.csv")
+os.makedirs(DATA_DIR, exist_ok=True)
 
 
 # Initialize CSV files if they don't exist
 def initialize_files():
     """Initialize CSV files with default data if they don't exist.
 
-    Creates four CSV files (staff_details.csv, call_details.csv, team_details.csv,
-    manager_details.csv) in the data directory with sample data if they don't already exist.
+    Creates four CSV files (staff_details.csv, team_details.csv, manager_details.csv,
+    manager_staff.csv) and the partitioned calls/ directory in the data directory with
+    sample data if they don't already exist.
     """
     if not os.path.exists(STAFF_FILE):
         with open(STAFF_FILE, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['staff_id', 'first_name', 'last_name', 'manager_id', 'calls_taken',
-                             'successful_calls', 'failed_calls', 'target_successful_calls',
-                             'working_time_elapsed', 'avg_sat_score', 'status', 'team_id'])
+            writer.writerow(STAFF_COLUMNS)
             # Sample staff data
             writer.writerow(['101', 'John', 'Doe', '1', '2', '0', '0', '10', '0', '0.825', 'Free', '1'])
             writer.writerow(['102', 'Jane', 'Smith', '1', '1', '0', '0', '10', '0', '0.8', 'Free', '1'])
             writer.writerow(['201', 'Mike', 'Johnson', '2', '1', '0', '0', '10', '0', '0.6', 'Free', '2'])
 
-    if not os.path.exists(CALLS_FILE):
-        with open(CALLS_FILE, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['call_id', 'status', 'time_elapsed', 'sat_score', 'handler_id', 'date', 'team_id'])
+    if not os.path.exists(CALLS_DIR):
+        # Older data directories hold every call in one flat file
+        if not migrate_single_file(CALLS_FILE, CALLS_DIR):
             # Sample call data
-            now = int(time.time())
-            writer.writerow([f'{now}001', 'Completed', '120', '0.95', '101', '26/06/2025 15:36', '1'])
-            writer.writerow([f'{now}002', 'Completed', '180', '0.7', '101', '19/07/2025 18:16', '1'])
-            writer.writerow([f'{now}003', 'Completed', '90', '0.8', '102', '07/07/2025 08:07', '1'])
-            writer.writerow([f'{now}004', 'Completed', '150', '0.6', '201', '10/07/2025 16:49', '2'])
+            ids = get_generator().next_ids(4)
+            append_calls(pd.DataFrame([
+                [ids[0], 'Completed', 120, 0.95, 101, '26/06/2025 15:36', 1],
+                [ids[1], 'Completed', 180, 0.7, 101, '19/07/2025 18:16', 1],
+                [ids[2], 'Completed', 90, 0.8, 102, '07/07/2025 08:07', 1],
+                [ids[3], 'Completed', 150, 0.6, 201, '10/07/2025 16:49', 2],
+            ], columns=CALL_COLUMNS), CALLS_DIR)
 
     if not os.path.exists(TEAMS_FILE):
         with open(TEAMS_FILE, 'w', newline='') as f:
@@ -76,9 +97,12 @@ def initialize_files():
     if not os.path.exists(MANAGERS_FILE):
         with open(MANAGERS_FILE, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['manager_id', 'manager_first_name', 'manager_last_name', 'staff_list'])
-            writer.writerow([1, 'David', 'Cooper', [101, 102]])
-            writer.writerow([2, 'Shirley', 'McDonald', [201]])
+            writer.writerow(MANAGER_COLUMNS)
+            writer.writerow([1, 'David', 'Cooper'])
+            writer.writerow([2, 'Shirley', 'McDonald'])
+
+    if not os.path.exists(MEMBERSHIP_FILE):
+        get_membership_table(MEMBERSHIP_FILE).add_many([(1, 101), (1, 102), (2, 201)])
 
 
 # Load data functions with class instantiation
@@ -91,7 +115,7 @@ def load_staff_data() -> tuple[pd.DataFrame, list[Staff]]:
             - pd.DataFrame: DataFrame with raw staff data
             - list[Staff]: List of Staff objects initialized with the data
     """
-    df = pd.read_csv(STAFF_FILE)
+    df = read_staff(STAFF_FILE)
     staff_objects = []
     for _, row in df.iterrows():
         staff = Staff(
@@ -119,8 +143,7 @@ def load_calls_data() -> tuple[pd.DataFrame, list[Call]]:
             - pd.DataFrame: DataFrame with raw call data (includes datetime conversion)
             - list[Call]: List of Call objects initialized with the data
     """
-    df = pd.read_csv(CALLS_FILE)
-    df['datetime'] = pd.to_datetime(df['date'], format='%d/%m/%Y %H:%M')
+    df = read_calls(CALLS_DIR)
     call_objects = []
     for _, row in df.iterrows():
         call = Call(
@@ -135,6 +158,64 @@ def load_calls_data() -> tuple[pd.DataFrame, list[Call]]:
     return df, call_objects
 
 
+@st.cache_data(ttl=60)
+def load_calls_since(start: pd.Timestamp) -> pd.DataFrame:
+    """Load calls made at or after a given time, reading only the partitions that can hold them.
+
+    Args:
+        start: Start of the window.
+
+    Returns:
+        pd.DataFrame: DataFrame with the call data in the window (includes datetime conversion)
+    """
+    return read_calls(CALLS_DIR, start=start)
+
+
+@st.cache_data(ttl=60)
+def load_shift_stats(start: pd.Timestamp | None, team_id: int) -> pd.DataFrame:
+    """Occupancy, idle time and calls per working hour of a team's staff since a given time.
+
+    Args:
+        start: Start of the window, or None for all time.
+        team_id: Team whose workday sessions are included.
+
+    Returns:
+        pd.DataFrame: One row per staff member with a workday in the window
+    """
+    return shift_report(SESSIONS_FILE, CALLS_DIR, start=start, team_id=team_id)
+
+
+def team_query(query: str, team_id: int, window, compute):
+    """Per-team query result shared by every session, recomputed only after a write for the team.
+
+    Args:
+        query: Name of the query.
+        team_id: Team the result belongs to.
+        window: Anything else the result depends on (time window, staff ID), or None.
+        compute: Function producing the result on a miss.
+
+    Returns:
+        The cached result; it must not be modified.
+    """
+    return get_query_cache(STAFF_FILE).get_or_compute(query, team_id, window, compute)
+
+
+def calls_where(column: str, value) -> pd.DataFrame:
+    """Calls whose column equals a value, e.g. a team's or a handler's calls."""
+    calls_df, _ = load_calls_data()
+    return calls_df[calls_df[column] == value]
+
+
+def daily_sat_avg(calls: pd.DataFrame) -> pd.DataFrame:
+    """Average satisfaction score per day."""
+    return calls.groupby(calls['datetime'].dt.date)['sat_score'].mean().reset_index()
+
+
+def success_counts(calls: pd.DataFrame) -> tuple[int, int]:
+    """Successful and total number of calls."""
+    return int((calls['sat_score'] >= SUCCESS_THRESHOLD).sum()), len(calls)
+
+
 @st.cache_data
 def load_teams_data() -> pd.DataFrame:
     """Load team data from CSV file.
@@ -142,7 +223,7 @@ def load_teams_data() -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame containing team information
     """
-    return pd.read_csv(TEAMS_FILE)
+    return read_teams(TEAMS_FILE)
 
 
 @st.cache_data
@@ -154,16 +235,19 @@ def load_managers_data() -> tuple[pd.DataFrame, list[Manager]]:
             - pd.DataFrame: DataFrame with raw manager data
             - list[Manager]: List of Manager objects initialized with the data
     """
-    df = pd.read_csv(MANAGERS_FILE)
+    # Older data directories keep each manager's staff as a list repr column
+    migrate_legacy_staff_lists(MANAGERS_FILE, MEMBERSHIP_FILE)
+
+    df = read_managers(MANAGERS_FILE)
+    membership = get_membership_table(MEMBERSHIP_FILE)
     manager_objects = []
     for _, row in df.iterrows():
-        # Convert staff_list string to actual list
-        staff_list = eval(row['staff_list']) if isinstance(row['staff_list'], str) else row['staff_list']
         manager = Manager(
             id=row['manager_id'],
             first_name=row['manager_first_name'],
             last_name=row['manager_last_name'],
-            staff_list=staff_list
+            staff_list=membership.members(row['manager_id']),
+            staff_file=STAFF_FILE
         )
         manager_objects.append(manager)
     return df, manager_objects
@@ -256,29 +340,38 @@ def staff_dashboard():
         if not st.session_state.workday_started:
             if st.button("Start Workday"):
                 staff.start_workday()
+                staff.set_status("Free")
+                dispatcher.register(staff, user['team_id'])
                 st.session_state.workday_started = True
-                st.session_state.workday_start_time = time.time()
                 st.success("Workday started!")
         else:
-            work_time = time.time() - st.session_state.workday_start_time
+            work_time = time.time() - (staff.workday_started_at or time.time())
             st.metric("Time Elapsed", f"{int(work_time // 3600)}h {int((work_time % 3600) // 60)}m")
             if st.button("End Workday"):
                 total_time = staff.end_workday()
+                staff.set_status("Out of Office")
+                dispatcher.unregister(staff.id)
                 st.session_state.workday_started = False
 
-                # Update CSV
-                staff_df, _ = load_staff_data()
-                staff_df.loc[staff_df['staff_id'] == staff.id, 'working_time_elapsed'] = total_time
-                staff_df.to_csv(STAFF_FILE, index=False)
+                # Keep the workday as an interval and add it to the running total
+                ended_at = datetime.datetime.now()
+                record_session(staff.id, user['team_id'], ended_at - datetime.timedelta(seconds=total_time),
+                               ended_at, SESSIONS_FILE)
+                repository = get_staff_repository(STAFF_FILE)
+                worked = float((repository.get(staff.id) or {}).get('working_time_elapsed') or 0)
+                repository.update(staff.id, {'working_time_elapsed': worked + total_time}, op='workday_end')
 
                 st.success(f"Workday ended! Total time: {int(total_time // 3600)}h {int((total_time % 3600) // 60)}m")
 
     # Call simulation (RS6, RS7)
     with col2:
         if st.session_state.workday_started:
+            if st.session_state.current_call is None:
+                # Pick up a call the dispatcher routed to us from another session
+                st.session_state.current_call = dispatcher.claim(staff.id)
             if st.session_state.current_call is None:
                 if st.button("Simulate Incoming Call"):
-                    call_id = int(time.time())
+                    call_id = new_call_id()
                     new_call = Call(
                         id=call_id,
                         status="Incoming",
@@ -287,8 +380,15 @@ def staff_dashboard():
                         handler_id=0
                     )
                     new_call.start_time = time.time()
-                    st.session_state.current_call = new_call
-                    st.rerun()
+
+                    # Route the call to whichever free team member has waited longest
+                    dispatcher.submit(new_call, user['team_id'])
+                    dispatcher.dispatch(user['team_id'])
+                    st.session_state.current_call = dispatcher.claim(staff.id)
+                    if st.session_state.current_call is None:
+                        st.info(f"Call {call_id} routed to a colleague")
+                    else:
+                        st.rerun()
             else:
                 call = st.session_state.current_call
                 call_duration = time.time() - call.time_elapsed
@@ -303,8 +403,7 @@ def staff_dashboard():
                     # Get current date/time in the correct format
                     now = datetime.datetime.now().strftime('%d/%m/%Y %H:%M')
 
-                    # Update calls CSV
-                    calls_df, _ = load_calls_data()
+                    # Append the call and roll it into our counters
                     new_call_data = {
                         'call_id': current_call.id,
                         'status': current_call.status,
@@ -314,23 +413,37 @@ def staff_dashboard():
                         'date': now,
                         'team_id': user['team_id']
                     }
-                    calls_df.loc[len(calls_df)] = new_call_data
-                    calls_df.to_csv(CALLS_FILE, index=False)
-
-                    st.session_state.current_call = None
+                    ingest_calls(pd.DataFrame([new_call_data]), CALLS_DIR, STAFF_FILE, TEAMS_FILE)
+                    load_calls_data.clear()
+                    load_calls_since.clear()
+                    load_staff_data.clear()
+
+                    # We are Free again, so any queued team call can be routed now
+                    dispatcher.dispatch(user['team_id'])
+                    st.session_state.current_call = dispatcher.claim(staff.id)
                     st.rerun()
 
     # Performance metrics (RS1, RS3)
     st.subheader("Performance Metrics")
 
-    calls_df, _ = load_calls_data()
-    staff_calls = calls_df[calls_df['handler_id'] == staff.id]
-    team_calls = calls_df[calls_df['team_id'] == user['team_id']]
+    board = get_leaderboard(STAFF_FILE)
+    team_rank = board.rank(staff.id, within_team=True)
+    if team_rank is not None:
+        col1, col2 = st.columns(2)
+        col1.metric("Team Rank", f"{team_rank} of {board.size(user['team_id'])}",
+                    f"Ahead of {board.percentile(staff.id, within_team=True):.0f}% of your team",
+                    delta_color="off")
+        col2.metric("Overall Rank", f"{board.rank(staff.id)} of {board.size()}",
+                    f"Ahead of {board.percentile(staff.id):.0f}% of staff", delta_color="off")
+
+    # Shared with the rest of the team; only reloaded after a write for this team
+    team_id = user['team_id']
+    staff_calls = team_query('staff_calls', team_id, staff.id, lambda: calls_where('handler_id', staff.id))
 
     if not staff_calls.empty:
         # Success rate pie chart (RS1)
-        successful = len(staff_calls[staff_calls['sat_score'] >= 0.8])
-        unsuccessful = len(staff_calls) - successful
+        successful, total = success_counts(staff_calls)
+        unsuccessful = total - successful
 
         fig, ax = plt.subplots(1, 2, figsize=(12, 4))
 
@@ -342,8 +455,9 @@ def staff_dashboard():
         ax[0].set_title('Your Call Success Rate')
 
         # Satisfaction trend line chart (RS3)
-        daily_avg = staff_calls.groupby(staff_calls['datetime'].dt.date)['sat_score'].mean().reset_index()
-        team_daily_avg = team_calls.groupby(team_calls['datetime'].dt.date)['sat_score'].mean().reset_index()
+        daily_avg = team_query('staff_daily_avg', team_id, staff.id, lambda: daily_sat_avg(staff_calls))
+        team_daily_avg = team_query('team_daily_avg', team_id, None, lambda: daily_sat_avg(
+            team_query('team_calls', team_id, None, lambda: calls_where('team_id', team_id))))
 
         ax[1].plot(daily_avg['datetime'], daily_avg['sat_score'], label='Your Score')
         ax[1].plot(team_daily_avg['datetime'], team_daily_avg['sat_score'], label='Team Average')
@@ -360,7 +474,7 @@ def staff_dashboard():
         recent_calls = staff_calls.sort_values('datetime', ascending=False).head(5)
         recent_calls['duration'] = recent_calls['time_elapsed'].apply(lambda x: f"{x // 60}m {x % 60}s")
         recent_calls['status'] = recent_calls['sat_score'].apply(
-            lambda x: "✅ Successful" if x >= 0.8 else "❌ Unsuccessful")
+            lambda x: "✅ Successful" if x >= SUCCESS_THRESHOLD else "❌ Unsuccessful")
 
         st.dataframe(recent_calls[['datetime', 'duration', 'sat_score', 'status']].rename(columns={
             'datetime': 'Time',
@@ -370,6 +484,47 @@ def staff_dashboard():
         }), hide_index=True)
 
 
+@st.fragment(run_every=2)
+def status_board(team_staff: pd.DataFrame) -> None:
+    """Render the live team status board.
+
+    Runs as a fragment, so its periodic refresh does not rerun the rest of the
+    dashboard. Between refreshes only the rows whose status changed on the
+    status bus are updated.
+
+    Args:
+        team_staff: Staff rows of the manager's team.
+    """
+    staff_ids = tuple(team_staff['staff_id'])
+    board = st.session_state.get('status_board')
+    if board is None or st.session_state.get('status_board_ids') != staff_ids:
+        status_bus.seed(dict(zip(team_staff['staff_id'], team_staff['status'])))
+        version, statuses = status_bus.snapshot()
+        board = pd.DataFrame({
+            'Name': (team_staff['first_name'].astype(str) + ' ' + team_staff['last_name'].astype(str)).values,
+            'Status': [statuses.get(int(s), 'Out of Office') for s in staff_ids],
+        }, index=pd.Index(staff_ids, name='Staff ID'))
+        st.session_state.status_board_ids = staff_ids
+    else:
+        version, changed = status_bus.changes_since(st.session_state.status_board_version)
+        if changed is None:
+            version, changed = status_bus.snapshot()
+        changed = {k: v for k, v in changed.items() if k in board.index}
+        if changed:
+            board.loc[list(changed), 'Status'] = list(changed.values())
+    st.session_state.status_board = board
+    st.session_state.status_board_version = version
+
+    counts = board['Status'].value_counts()
+    queue = dispatcher.metrics(st.session_state.current_user['team_id'])
+    cols = st.columns(len(STAFF_STATUSES) + 2)
+    for col, status in zip(cols, STAFF_STATUSES):
+        col.metric(status, int(counts.get(status, 0)))
+    cols[-2].metric("Calls Waiting", queue.queue_depth)
+    cols[-1].metric("Avg Wait", f"{queue.avg_wait:.1f}s")
+    st.dataframe(board)
+
+
 # Manager Dashboard using Manager class methods
 def manager_dashboard():
     """Render the manager dashboard with team overview and staff management functionality."""
@@ -378,48 +533,53 @@ def manager_dashboard():
     st.title(f"Manager Dashboard - {manager.first_name} {manager.last_name}")
 
     staff_df, staff_objects = load_staff_data()
-    calls_df, _ = load_calls_data()
     teams_df = load_teams_data()
     manager_df, manager_objects = load_managers_data()
 
     team_staff = staff_df[staff_df['team_id'] == user['team_id']]
-    team_calls = calls_df[calls_df['team_id'] == user['team_id']]
+    team_calls = team_query('team_calls', user['team_id'], None, lambda: calls_where('team_id', user['team_id']))
 
     st.subheader("Team Overview")
 
+    # Time period selector; the period also drives the distribution and shift sections,
+    # so it is shown even when the team has no calls yet
+    time_period = st.selectbox(
+        "Time Period",
+        ["All Time", "Today", "Last 7 Days", "Last 30 Days", "Last 90 Days"],
+        key="time_period_selector"  # Added key to avoid duplicate widget issues
+    )
+
+    # Calculate filtered calls based on selected time period
+    # Windows only read the call partitions they cover
+    if time_period == "Today":
+        cutoff_date = pd.Timestamp.today().normalize()
+    elif time_period == "Last 7 Days":
+        cutoff_date = (pd.Timestamp.today() - pd.Timedelta(days=7)).floor('min')
+    elif time_period == "Last 30 Days":
+        cutoff_date = (pd.Timestamp.today() - pd.Timedelta(days=30)).floor('min')
+    elif time_period == "Last 90 Days":
+        cutoff_date = (pd.Timestamp.today() - pd.Timedelta(days=90)).floor('min')
+    else:  # "All Time"
+        cutoff_date = None
+
     # Team success rate (RM2)
     if not team_calls.empty:
 
         col1, col2= st.columns([2, 2])  # Adjusted relative widths
 
         with col1:
-            # Time period selector - now properly contained within col1
-            time_period = st.selectbox(
-                "Time Period",
-                ["All Time", "Today", "Last 7 Days", "Last 30 Days", "Last 90 Days"],
-                key="time_period_selector"  # Added key to avoid duplicate widget issues
-            )
+            def window_success() -> tuple[int, int]:
+                if cutoff_date is None:
+                    return success_counts(team_calls)
+                window_calls = load_calls_since(cutoff_date)
+                return success_counts(window_calls[window_calls['team_id'] == user['team_id']])
 
-            # Calculate filtered calls based on selected time period
-            if time_period == "Today":
-                cutoff_date = pd.to_datetime('today')
-                filtered_calls = team_calls[team_calls['datetime'] >= cutoff_date]
-            elif time_period == "Last 7 Days":
-                cutoff_date = pd.to_datetime('today') - pd.Timedelta(days=7)
-                filtered_calls = team_calls[team_calls['datetime'] >= cutoff_date]
-            elif time_period == "Last 30 Days":
-                cutoff_date = pd.to_datetime('today') - pd.Timedelta(days=30)
-                filtered_calls = team_calls[team_calls['datetime'] >= cutoff_date]
-            elif time_period == "Last 90 Days":
-                cutoff_date = pd.to_datetime('today') - pd.Timedelta(days=90)
-                filtered_calls = team_calls[team_calls['datetime'] >= cutoff_date]
-            else:  # "All Time"
-                filtered_calls = team_calls.copy()
+            filtered_successful, filtered_total = team_query('window_success', user['team_id'], cutoff_date,
+                                                             window_success)
 
             # Now create the pie chart with filtered data
-            if not filtered_calls.empty:
-                filtered_successful = len(filtered_calls[filtered_calls['sat_score'] >= 0.8])
-                filtered_unsuccessful = len(filtered_calls) - filtered_successful
+            if filtered_total:
+                filtered_unsuccessful = filtered_total - filtered_successful
 
                 fig, ax = plt.subplots()
                 ax.pie([filtered_successful, filtered_unsuccessful],
@@ -428,47 +588,32 @@ def manager_dashboard():
                        colors=['#4CAF50', '#F44336'],
                        wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
 
-                ax.set_title(f'Team Success Rate\n({time_period}: {len(filtered_calls)} calls)')
+                ax.set_title(f'Team Success Rate\n({time_period}: {filtered_total} calls)')
 
                 # centre_circle = plt.Circle((0, 0), 0.7, color='white', fc='white', linewidth=0)
                 # ax.add_artist(centre_circle)
 
                 st.pyplot(fig)
 
-                success_rate = filtered_successful / len(filtered_calls) * 100 if len(filtered_calls) > 0 else 0
+                success_rate = filtered_successful / filtered_total * 100
                 st.metric("Success Rate",
                           f"{success_rate:.1f}%",
-                          f"{filtered_successful} of {len(filtered_calls)} calls")
+                          f"{filtered_successful} of {filtered_total} calls")
             else:
                 st.warning(f"No call data available for {time_period.lower()}")
 
         with col2:
             # Team comparison chart
             st.write("**Team Comparison**")
-            if len(teams_df) > 1:
-                team_success = []
-                for _, team in teams_df.iterrows():
-                    team_calls = calls_df[calls_df['team_id'] == team['team_id']]
-                    if len(team_calls) > 0:
-                        success_rate = len(team_calls[team_calls['sat_score'] >= 0.8]) / len(team_calls)
-                        team_success.append({
-                            'Team': '.'.join(re.findall(r'\b(\w)\w*\b', team['team_name'])) + '.',
-                            'Success Rate': success_rate
-                        })
-
-                    if not team_staff.empty and not team_calls.empty:
-                        performance_data = []
-                        for _, staff in team_staff.iterrows():
-                            staff_calls = calls_df[calls_df['handler_id'] == staff['staff_id']]
-                            if len(staff_calls) > 0:
-                                success_rate = len(staff_calls[staff_calls['sat_score'] >= 0.8]) / len(staff_calls)
-                                performance_data.append({
-                                    'Staff ID': staff['staff_id'],
-                                    'Name': f"{staff['first_name']} {staff['last_name']}",
-                                    'Calls Taken': staff['calls_taken'],
-                                    'Success Rate': success_rate,
-                                    'Avg Satisfaction': staff['avg_sat_score']
-                                })
+            # Every site's teams, read from each shard in parallel
+            team_stats = compare_teams()
+            team_stats = team_stats[team_stats['calls'] > 0]
+            if len(teams_df) > 1 or len(team_stats) > 1:
+                team_success = [{
+                    'Team': (f"{team['shard']}: " if team['shard'] else '')
+                            + '.'.join(re.findall(r'\b(\w)\w*\b', team['team_name'])) + '.',
+                    'Success Rate': team['success_rate']
+                } for _, team in team_stats.iterrows()]
 
                 if team_success:
                     comparison_df = pd.DataFrame(team_success)
@@ -478,13 +623,86 @@ def manager_dashboard():
                     ax.set_ylim(0, 1)
                     st.pyplot(fig)
 
+    # Live staff status
+    st.subheader("Staff Status")
+    status_board(team_staff)
+
+    # Handle-time and satisfaction percentiles for the selected period
+    st.subheader("Call Distribution")
+    sketches = get_sketch_store(CALLS_DIR)
+    start_day = cutoff_date.date() if cutoff_date is not None else None
+    staff_pct = sketches.summary('staff', start=start_day, team_id=user['team_id'])
+    team_pct = sketches.summary('team', start=start_day, team_id=user['team_id'])
+    names = team_staff.set_index('staff_id')
+    names = names['first_name'].astype(str) + ' ' + names['last_name'].astype(str)
+    if not team_pct.empty:
+        staff_pct.index = staff_pct.index.map(lambda s: names.get(s, f"Staff {s}"))
+        team_pct.index = ['Whole Team']
+        pct_df = pd.concat([team_pct, staff_pct])
+        pct_df = pct_df.round({'handle_p50': 0, 'handle_p90': 0, 'handle_p99': 0})
+        st.dataframe(pct_df.rename(columns={
+            'calls': 'Calls',
+            'handle_p50': 'Handle p50 (s)', 'handle_p90': 'Handle p90 (s)', 'handle_p99': 'Handle p99 (s)',
+            'sat_p50': 'Sat p50', 'sat_p90': 'Sat p90', 'sat_p99': 'Sat p99'
+        }))
+    else:
+        st.info(f"No call data available for {time_period.lower()}")
+
+    # Workday sessions joined against the calls taken during them
+    st.subheader("Shift Utilisation")
+    shift_df = load_shift_stats(cutoff_date, user['team_id'])
+    if not shift_df.empty:
+        worked, busy = shift_df['worked_seconds'].sum(), shift_df['busy_seconds'].sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Occupancy", f"{busy / worked:.1%}")
+        col2.metric("Idle Time", f"{int((worked - busy) // 3600)}h {int((worked - busy) % 3600 // 60)}m")
+        col3.metric("Calls per Hour", f"{shift_df['calls'].sum() / (worked / 3600):.1f}")
+        shift_df.index = shift_df.index.map(lambda s: names.get(s, f"Staff {s}"))
+        st.dataframe(pd.DataFrame({
+            'Workdays': shift_df['sessions'],
+            'Hours Worked': (shift_df['worked_seconds'] / 3600).round(1),
+            'Idle Hours': (shift_df['idle_seconds'] / 3600).round(1),
+            'Occupancy': (shift_df['occupancy'] * 100).round(1).astype(str) + '%',
+            'Calls per Hour': shift_df['calls_per_hour'].round(1),
+        }))
+    else:
+        st.info(f"No workdays recorded for {time_period.lower()}")
+
+    # Precomputed by the background forecast job; nothing is fitted on this rerun
+    st.subheader("Forecast")
+    team_forecast = get_forecaster(CALLS_DIR).forecast(user['team_id'])
+    if team_forecast is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Calls Tomorrow", f"{team_forecast.next_day:.0f}")
+        col2.metric("Calls Next 7 Days", f"{team_forecast.next_week:.0f}")
+        col3.metric("Expected Success Rate", f"{team_forecast.days['success_rate'].iloc[0] * 100:.1f}%")
+        fig, ax = plt.subplots()
+        sns.barplot(x=team_forecast.days['date'].dt.strftime('%a %d'), y=team_forecast.days['calls'], ax=ax)
+        ax.set(xlabel='Day', ylabel='Calls', title='Forecast Call Volume')
+        st.pyplot(fig)
+    else:
+        st.info("No forecast for this team yet")
+
     # Top/worst performers (RM4)
     st.subheader("Performance Highlights")
 
 
-    if performance_data:
-        perf_df = pd.DataFrame(performance_data)
-        perf_df = perf_df.sort_values(['Success Rate', 'Calls Taken', 'Avg Satisfaction'], ascending=False)
+    # Ranks are kept current by the leaderboard as calls end
+    board = get_leaderboard(STAFF_FILE)
+    top_staff = board.top(3, team_id=user['team_id'])
+    if top_staff:
+        names = staff_df.set_index('staff_id')
+
+        def highlight_rows(standings):
+            return pd.DataFrame([{
+                'Staff ID': s.staff_id,
+                'Name': f"{names.at[s.staff_id, 'first_name']} {names.at[s.staff_id, 'last_name']}"
+                        if s.staff_id in names.index else f"Staff {s.staff_id}",
+                'Calls Taken': s.calls_taken,
+                'Success Rate': s.success_rate,
+                'Avg Satisfaction': s.avg_sat_score,
+                'Overall Rank': board.rank(s.staff_id)
+            } for s in standings])
 
         col1, col2 = st.columns(2)
 
@@ -492,7 +710,7 @@ def manager_dashboard():
             st.write("Top Performers")
             # Apply green background to top performers
             st.dataframe(
-                perf_df.head(3).style.map(
+                highlight_rows(top_staff).style.map(
                     lambda x: 'background-color: #95b36b',  # Mint green pastel
                     subset=pd.IndexSlice[:, :]  # Apply to all cells
                 ),
@@ -503,7 +721,7 @@ def manager_dashboard():
             st.write("Need Improvement")
             # Apply red background to bottom performers and sort by Success Rate
             st.dataframe(
-                perf_df.tail(3)[::-1].style.map(
+                highlight_rows(board.bottom(3, team_id=user['team_id'])).style.map(
                     lambda x: 'background-color: #fab6b6',  # Pastel red
                     subset=pd.IndexSlice[:, :]  # Apply to all cells
                 ),
@@ -536,16 +754,17 @@ def manager_dashboard():
             st.write(f"**Success Rate:** {staff_details['successful_calls'] / staff_details['calls_taken'] * 100:.1f}%"
                      if staff_details['calls_taken'] > 0 else "**Success Rate:** N/A")
             st.write(f"**Avg Satisfaction:** {staff_details['avg_sat_score']}")
-            st.write(f"**Status:** {staff_details['status']}")
+            st.write(f"**Status:** {status_bus.status_of(staff_id, staff_details['status'])}")
 
             # Staff call history
-            staff_calls = calls_df[calls_df['handler_id'] == staff_id]
+            staff_calls = team_query('staff_calls', user['team_id'], staff_id,
+                                     lambda: calls_where('handler_id', staff_id))
             if not staff_calls.empty:
                 st.write("**Recent Calls:**")
                 recent_calls = staff_calls.sort_values('datetime', ascending=False).head(5)
                 recent_calls['duration'] = recent_calls['time_elapsed'].apply(lambda x: f"{x // 60}m {x % 60}s")
                 recent_calls['status'] = recent_calls['sat_score'].apply(
-                    lambda x: "✅ Successful" if x >= 0.8 else "❌ Unsuccessful")
+                    lambda x: "✅ Successful" if x >= SUCCESS_THRESHOLD else "❌ Unsuccessful")
 
                 st.dataframe(recent_calls[['datetime', 'duration', 'sat_score', 'status']].rename(columns={
                     'datetime': 'Time',
@@ -598,19 +817,46 @@ def manager_dashboard():
                         'status': 'Free',
                         'team_id': user['team_id']
                     }
-                    staff_df.loc[len(staff_df)] = new_row
-                    staff_df.to_csv(STAFF_FILE, index=False)
+                    get_staff_repository(STAFF_FILE).add(new_row)
+                    load_staff_data.clear()
+                    get_leaderboard(STAFF_FILE).update(staff_id, user['team_id'], 0, 0, 0)
 
                     # Update manager's staff list
-                    manager.staff_list.append(staff_id)
+                    manager.staff_list.add(staff_id)
 
-                    # Update manager CSV
-                    manager_df.loc[manager_df['manager_id'] == manager.id, 'staff_list'] = str(manager.staff_list)
-                    manager_df.to_csv(MANAGERS_FILE, index=False)
+                    # Record the membership without touching other managers
+                    get_membership_table(MEMBERSHIP_FILE).add(manager.id, staff_id)
 
                     st.success("Staff member added successfully!")
                     st.rerun()
 
+        # Bulk import/export for onboarding whole teams
+        with st.expander("Bulk Import / Export"):
+            uploaded = st.file_uploader(
+                "Staff CSV (staff_id, first_name, last_name, optional target_successful_calls)",
+                type="csv")
+            if uploaded is not None:
+                batch = pd.read_csv(uploaded)
+                preview = validate_staff_batch(batch, staff_df['staff_id'],
+                                               manager_id=manager.id, team_id=user['team_id'])
+                st.write(f"{len(preview.accepted)} rows ready, {len(preview.rejected)} rejected")
+                if not preview.rejected.empty:
+                    st.dataframe(preview.rejected, hide_index=True)
+                if not preview.accepted.empty and st.button("Import Staff"):
+                    result = import_staff(batch, STAFF_FILE, MANAGERS_FILE, MEMBERSHIP_FILE,
+                                          manager_id=manager.id, team_id=user['team_id'],
+                                          managers=[manager])
+                    load_staff_data.clear()
+                    load_managers_data.clear()
+                    st.success(f"Imported {len(result.accepted)} staff members!")
+                    st.rerun()
+
+            st.download_button(
+                "Export Team Staff",
+                data="".join(iter_staff_export(STAFF_FILE, team_id=user['team_id'])),
+                file_name=f"team_{user['team_id']}_staff.csv",
+                mime="text/csv")
+
     with tab3:
         # Edit staff (RM8)
         staff_to_edit = st.selectbox(
@@ -632,16 +878,20 @@ def manager_dashboard():
                     value=int(staff_details['target_successful_calls']))
                 new_status = st.selectbox(
                     "Status",
-                    ['Free', 'On Call', 'Lunch', 'Out of Office'],
-                    index=['Free', 'On Call', 'Lunch', 'Out of Office'].index(staff_details['status']))
+                    STAFF_STATUSES,
+                    index=STAFF_STATUSES.index(staff_details['status'] if staff_details['status'] in STAFF_STATUSES
+                                               else STAFF_STATUS_FALLBACK))
 
                 submitted = st.form_submit_button("Update Staff")
                 if submitted:
-                    staff_df.loc[staff_df['staff_id'] == staff_id, 'first_name'] = new_first
-                    staff_df.loc[staff_df['staff_id'] == staff_id, 'last_name'] = new_last
-                    staff_df.loc[staff_df['staff_id'] == staff_id, 'target_successful_calls'] = new_target
-                    staff_df.loc[staff_df['staff_id'] == staff_id, 'status'] = new_status
-                    staff_df.to_csv(STAFF_FILE, index=False)
+                    get_staff_repository(STAFF_FILE).update(staff_id, {
+                        'first_name': new_first,
+                        'last_name': new_last,
+                        'target_successful_calls': new_target,
+                        'status': new_status,
+                    })
+                    load_staff_data.clear()
+                    status_bus.publish(staff_id, new_status)
                     st.success("Staff details updated successfully!")
                     st.rerun()
 
@@ -661,20 +911,58 @@ def manager_dashboard():
                     st.error("You cannot remove yourself")
                 else:
                     # Remove from CSV
-                    staff_df = staff_df[staff_df['staff_id'] != staff_id]
-                    staff_df.to_csv(STAFF_FILE, index=False)
+                    get_staff_repository(STAFF_FILE).remove(staff_id)
+                    load_staff_data.clear()
+                    get_leaderboard(STAFF_FILE).remove(staff_id)
 
                     # Update manager's staff list
-                    if staff_id in manager.staff_list:
-                        manager.staff_list.remove(staff_id)
+                    manager.staff_list.discard(staff_id)
+                    get_membership_table(MEMBERSHIP_FILE).remove(manager.id, staff_id)
 
                     st.success("Staff member removed successfully!")
                     st.rerun()
 
 
+@st.cache_resource(ttl=24 * 3600)
+def compact_calls(archive_after_days: int, retain_days: int | None):
+    """Archive old call partitions at most once a day per server process."""
+    # Inside a journal transaction so journaled writers in other processes wait too
+    with get_journal(STAFF_FILE).transaction():
+        return compact(CALLS_DIR, RetentionPolicy(archive_after_days, retain_days))
+
+
+@st.cache_resource
+def open_journal(staff_file: str):
+    """Replay the write-ahead log once per server process, journaling new data directories from now on."""
+    journal = get_journal(staff_file)
+    if not journal.enabled:
+        journal.enable()
+    return journal.recover()
+
+
+@st.cache_resource
+def start_forecasts(calls_dir: str):
+    """Start the forecast job once per server process."""
+    return get_forecaster(calls_dir).start()
+
+
+@st.cache_resource
+def start_api(port: int):
+    """Start the REST API once per server process, sharing its status bus."""
+    return api.start_in_thread(port=port, data=api.TrackerData(STAFF_FILE, CALLS_DIR, TEAMS_FILE))
+
+
 # Main app
 def main():
     initialize_files()
+    open_journal(STAFF_FILE)
+    compact_calls(int(os.environ.get('TRACKER_ARCHIVE_AFTER_DAYS', 31)),
+                  int(os.environ['TRACKER_RETAIN_DAYS']) if os.environ.get('TRACKER_RETAIN_DAYS') else None)
+    start_forecasts(CALLS_DIR)
+
+    # Opt-in JSON API for wallboards and integrations
+    if os.environ.get('TRACKER_API_PORT'):
+        start_api(int(os.environ['TRACKER_API_PORT']))
 
     if not st.session_state.authenticated:
         login_page()
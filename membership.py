@@ -0,0 +1,195 @@
+"""
+Normalized manager-staff membership table.
+
+Each row of the membership file records one (manager_id, staff_id) pair and
+whether it is active. The file is append-only: adding or removing a member
+appends a single row and the last row for a pair wins. compact() rewrites
+the file with only the active pairs once tombstones pile up.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from classes import handle_csv
+from storage import MEMBERSHIP_FILE, MEMBERSHIP_COLUMNS, atomic_write
+
+
+class MembershipTable:
+    def __init__(self, filename: str = MEMBERSHIP_FILE) -> None:
+        """
+        In-memory view of the membership file.
+
+        Args:
+            filename: Name of the membership CSV file.
+        """
+        self.filename = filename
+        self._members: Dict[int, Set[int]] = {}
+        self._manager_of: Dict[int, int] = {}
+        self._rows_on_disk = 0
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    def reload(self) -> None:
+        """Re-read the membership file, resolving each pair to its last row."""
+        self._members = {}
+        self._manager_of = {}
+        self._rows_on_disk = 0
+        if os.path.exists(self.filename):
+            df = pd.read_csv(self.filename, dtype='int64')
+            self._rows_on_disk = len(df)
+            df = df.drop_duplicates(['manager_id', 'staff_id'], keep='last')
+            df = df[df['active'] == 1]
+            for manager_id, staff_ids in df.groupby('manager_id')['staff_id']:
+                self._members[int(manager_id)] = set(staff_ids.tolist())
+            self._manager_of = dict(zip(df['staff_id'].tolist(), df['manager_id'].tolist()))
+        self._loaded = True
+
+    def members(self, manager_id: int) -> Set[int]:
+        """
+        Staff IDs currently under a manager.
+
+        The returned set is the table's own, so it stays current as members
+        are added or removed through the table.
+
+        Args:
+            manager_id: ID of the manager.
+
+        Returns:
+            Set of staff IDs.
+        """
+        self._ensure_loaded()
+        return self._members.setdefault(int(manager_id), set())
+
+    def manager_of(self, staff_id: int) -> Optional[int]:
+        """Return the manager a staff member reports to, or None."""
+        self._ensure_loaded()
+        return self._manager_of.get(int(staff_id))
+
+    def __contains__(self, pair: object) -> bool:
+        self._ensure_loaded()
+        manager_id, staff_id = pair
+        return staff_id in self._members.get(manager_id, ())
+
+    def add(self, manager_id: int, staff_id: int) -> bool:
+        """Add one staff member to a manager's team; False if already there."""
+        return bool(self.add_many([(manager_id, staff_id)]))
+
+    def add_many(self, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Add several memberships with a single append to the file.
+
+        Args:
+            pairs: (manager_id, staff_id) pairs.
+
+        Returns:
+            The pairs that were not already present.
+        """
+        self._ensure_loaded()
+        added = []
+        for manager_id, staff_id in pairs:
+            manager_id, staff_id = int(manager_id), int(staff_id)
+            members = self._members.setdefault(manager_id, set())
+            if staff_id not in members:
+                members.add(staff_id)
+                self._manager_of[staff_id] = manager_id
+                added.append((manager_id, staff_id))
+        self._append(added, active=1)
+        return added
+
+    def remove(self, manager_id: int, staff_id: int) -> bool:
+        """Remove one staff member from a manager's team; False if not there."""
+        return bool(self.remove_many([(manager_id, staff_id)]))
+
+    def remove_many(self, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Remove several memberships with a single append to the file.
+
+        Args:
+            pairs: (manager_id, staff_id) pairs.
+
+        Returns:
+            The pairs that were present and have been removed.
+        """
+        self._ensure_loaded()
+        removed = []
+        for manager_id, staff_id in pairs:
+            manager_id, staff_id = int(manager_id), int(staff_id)
+            members = self._members.get(manager_id)
+            if members is not None and staff_id in members:
+                members.discard(staff_id)
+                if self._manager_of.get(staff_id) == manager_id:
+                    del self._manager_of[staff_id]
+                removed.append((manager_id, staff_id))
+        self._append(removed, active=0)
+        return removed
+
+    def _append(self, pairs: List[Tuple[int, int]], active: int) -> None:
+        if not pairs:
+            return
+        rows = [{'manager_id': m, 'staff_id': s, 'active': active} for m, s in pairs]
+        mode = 'a' if os.path.exists(self.filename) else 'w'
+        handle_csv(self.filename, mode, rows, MEMBERSHIP_COLUMNS)
+        self._rows_on_disk += len(rows)
+        if self._rows_on_disk > 2 * max(len(self._manager_of), 1000):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the membership file with only the active pairs."""
+        self._ensure_loaded()
+        rows = [{'manager_id': m, 'staff_id': s, 'active': 1}
+                for m, members in sorted(self._members.items()) for s in sorted(members)]
+        handle_csv(self.filename, 'w', rows, MEMBERSHIP_COLUMNS)
+        self._rows_on_disk = len(rows)
+
+
+def migrate_legacy_staff_lists(managers_file: str, membership_file: str = MEMBERSHIP_FILE) -> bool:
+    """
+    Move the old 'staff_list' column of the managers file into the membership table.
+
+    The column holds Python list reprs such as "[101, 102]"; they are parsed
+    with vectorized string operations rather than eval. The managers file is
+    rewritten once without the column.
+
+    Args:
+        managers_file: Manager CSV file that may still carry 'staff_list'.
+        membership_file: Membership CSV file to populate.
+
+    Returns:
+        True if a migration took place.
+    """
+    df = pd.read_csv(managers_file)
+    if 'staff_list' not in df.columns:
+        return False
+
+    staff = (df.set_index('manager_id')['staff_list'].astype(str)
+             .str.strip('[]{}() ').str.split(',').explode().str.strip())
+    staff = pd.to_numeric(staff, errors='coerce').dropna().astype('int64')
+    pairs = list(zip(staff.index.tolist(), staff.tolist()))
+
+    get_membership_table(membership_file).add_many(pairs)
+    with atomic_write(managers_file) as f:
+        df.drop(columns='staff_list').to_csv(f, index=False)
+    return True
+
+
+_membership_tables: Dict[str, MembershipTable] = {}
+
+
+def get_membership_table(filename: str = MEMBERSHIP_FILE) -> MembershipTable:
+    """
+    Return the membership table shared by everything that reads the given file.
+
+    Args:
+        filename: Name of the membership CSV file.
+
+    Returns:
+        The MembershipTable for that file, created on first use.
+    """
+    key = os.path.abspath(filename)
+    if key not in _membership_tables:
+        _membership_tables[key] = MembershipTable(filename)
+    return _membership_tables[key]
@@ -0,0 +1,176 @@
+"""
+Shared cache of per-team dashboard query results.
+
+Every manager and staff member of a team asks the same questions on each
+rerun: the team's calls, its daily satisfaction averages, its success
+counts for a window. Results are cached under
+
+    (query, team_id, window, team version)
+
+where the team version is bumped whenever something is written for that
+team (a call ends, a staff row changes). A write therefore only drops
+that team's entries and every other team keeps hitting. Entries also
+expire after a TTL, which bounds staleness from writers in other
+processes, and the least recently used entries are evicted past
+max_entries.
+
+There is one cache per data directory, so shards never invalidate each
+other.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Set, Tuple, TypeVar
+
+MAX_ENTRIES = 2048
+TTL_SECONDS = 300.0
+
+T = TypeVar('T')
+Key = Tuple[str, Optional[int], Hashable, int]
+
+
+class CacheStats(NamedTuple):
+    """Counters of a QueryCache since it was created."""
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS) -> None:
+        """
+        Thread-safe LRU/TTL cache of query results, invalidated per team.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted.
+            ttl: Seconds an entry stays valid.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Key, Tuple[float, object]]' = OrderedDict()
+        self._by_team: Dict[Optional[int], Set[Key]] = {}
+        self._versions: Dict[Optional[int], int] = {}
+        self._generation = 0  # bumped by clear(), which invalidates every team
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def version(self, team_id: Optional[int]) -> int:
+        """Number of times a team's entries have been invalidated."""
+        return self._generation + self._versions.get(team_id, 0)
+
+    def _drop(self, key: Key) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_team.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+
+    def get_or_compute(self, query: str, team_id: Optional[int], window: Hashable,
+                       compute: Callable[[], T]) -> T:
+        """
+        Return a cached result, computing and storing it on a miss.
+
+        Cached values are shared between callers and must not be mutated.
+
+        Args:
+            query: Name of the query, e.g. 'team_daily_avg'.
+            team_id: Team the result belongs to, or None for cross-team results
+                (invalidated by every write).
+            window: Anything else the result depends on, e.g. the time window.
+            compute: Function producing the result.
+
+        Returns:
+            The cached or freshly computed result.
+        """
+        team_id = int(team_id) if team_id is not None else None
+        with self._lock:
+            key = (query, team_id, window, self.version(team_id))
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self._misses += 1
+
+        # Computed outside the lock; concurrent misses may both compute
+        value = compute()
+        with self._lock:
+            if key[3] != self.version(team_id):
+                return value  # invalidated while computing: do not store stale data
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._by_team.setdefault(team_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+        return value
+
+    def invalidate_team(self, team_id: Optional[int]) -> int:
+        """
+        Drop a team's entries and the cross-team ones after a write for that team.
+
+        Args:
+            team_id: Team written to; None only drops the cross-team entries.
+
+        Returns:
+            Number of entries dropped.
+        """
+        team_id = int(team_id) if team_id is not None else None
+        with self._lock:
+            dropped = 0
+            for team in {team_id, None}:
+                self._versions[team] = self._versions.get(team, 0) + 1
+                keys = self._by_team.pop(team, set())
+                for key in keys:
+                    self._entries.pop(key, None)
+                dropped += len(keys)
+            self._invalidations += 1
+            return dropped
+
+    def invalidate_teams(self, team_ids: Iterable[int]) -> int:
+        """invalidate_team() for each distinct team; returns entries dropped."""
+        return sum(self.invalidate_team(team_id) for team_id in set(int(t) for t in team_ids))
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_team.clear()
+
+    def stats(self) -> CacheStats:
+        """Hit, miss, eviction and invalidation counts and the current size."""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._invalidations,
+                              len(self._entries))
+
+
+_caches: Dict[str, QueryCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_cache(path: str) -> QueryCache:
+    """
+    Return the query cache of the data directory holding a table.
+
+    Args:
+        path: Any table file (or the calls directory) of the data directory.
+
+    Returns:
+        The QueryCache for that directory, created on first use.
+    """
+    key = os.path.dirname(os.path.abspath(path))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = QueryCache()
+        return _caches[key]
@@ -0,0 +1,234 @@
+"""
+Explicit in-memory schema of the tracker tables.
+
+Without it pandas infers int64/float64/object for everything. Here IDs
+and counters get the narrowest integer type that fits, scores are
+float32, statuses are fixed categoricals and names are categoricals
+(staff share a small pool of first and last names). Calls keep only the
+parsed 'datetime' column in memory; the 'date' string is rebuilt from it
+when writing.
+
+Usage:
+    python schema.py 1000000    # memory report at 1M calls
+"""
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Column order of each table on disk
+STAFF_COLUMNS = ['staff_id', 'first_name', 'last_name', 'manager_id', 'calls_taken',
+                 'successful_calls', 'failed_calls', 'target_successful_calls',
+                 'working_time_elapsed', 'avg_sat_score', 'status', 'team_id']
+CALL_COLUMNS = ['call_id', 'status', 'time_elapsed', 'sat_score', 'handler_id', 'date', 'team_id']
+TEAM_COLUMNS = ['team_id', 'team_name', 'manager_id']
+MANAGER_COLUMNS = ['manager_id', 'manager_first_name', 'manager_last_name']
+MEMBERSHIP_COLUMNS = ['manager_id', 'staff_id', 'active']
+SESSION_COLUMNS = ['staff_id', 'team_id', 'started_at', 'ended_at']  # local wall-clock seconds
+
+STAFF_STATUSES = ['Free', 'On Call', 'Lunch', 'Out of Office']
+STAFF_STATUS_FALLBACK = 'Out of Office'   # staff whose status is unknown are not offered calls
+CALL_STATUSES = ['Successful', 'Failed', 'Completed', 'Pending', 'In Progress', 'Incoming']
+
+DATE_FORMAT = '%d/%m/%Y %H:%M'
+
+STAFF_STATUS = pd.CategoricalDtype(STAFF_STATUSES)
+CALL_STATUS = pd.CategoricalDtype(CALL_STATUSES)
+
+STAFF_DTYPES: Dict[str, object] = {
+    'staff_id': 'int32',
+    'first_name': 'category',
+    'last_name': 'category',
+    'manager_id': 'int32',
+    'calls_taken': 'int32',
+    'successful_calls': 'int32',
+    'failed_calls': 'int32',
+    'target_successful_calls': 'int32',
+    'working_time_elapsed': 'float32',
+    'avg_sat_score': 'float32',
+    'status': STAFF_STATUS,
+    'team_id': 'int16',
+}
+
+# call_id stays int64: snowflake IDs use 63 bits
+CALL_DTYPES: Dict[str, object] = {
+    'call_id': 'int64',
+    'status': CALL_STATUS,
+    'time_elapsed': 'int32',
+    'sat_score': 'float32',
+    'handler_id': 'int32',
+    'team_id': 'int16',
+}
+
+TEAM_DTYPES: Dict[str, object] = {
+    'team_id': 'int16',
+    'team_name': 'category',
+    'manager_id': 'int32',
+}
+
+MANAGER_DTYPES: Dict[str, object] = {
+    'manager_id': 'int32',
+    'manager_first_name': 'category',
+    'manager_last_name': 'category',
+}
+
+MEMBERSHIP_DTYPES: Dict[str, object] = {
+    'manager_id': 'int32',
+    'staff_id': 'int32',
+    'active': 'int8',
+}
+
+SESSION_DTYPES: Dict[str, object] = {
+    'staff_id': 'int32',
+    'team_id': 'int16',
+    'started_at': 'int64',
+    'ended_at': 'int64',
+}
+
+SCHEMAS = {
+    'staff': (STAFF_COLUMNS, STAFF_DTYPES),
+    'calls': (CALL_COLUMNS, CALL_DTYPES),
+    'teams': (TEAM_COLUMNS, TEAM_DTYPES),
+    'managers': (MANAGER_COLUMNS, MANAGER_DTYPES),
+    'membership': (MEMBERSHIP_COLUMNS, MEMBERSHIP_DTYPES),
+    'sessions': (SESSION_COLUMNS, SESSION_DTYPES),
+}
+
+
+def read_dtypes(table: str) -> Dict[str, object]:
+    """
+    dtype mapping to pass to pd.read_csv for a table.
+
+    Categorical and float columns are typed while parsing so the wide
+    object/float64 versions never exist; enforce() narrows the integers
+    afterwards.
+
+    Args:
+        table: One of the SCHEMAS keys.
+
+    Returns:
+        Mapping of column name to dtype.
+    """
+    _, dtypes = SCHEMAS[table]
+    return {c: t for c, t in dtypes.items()
+            if t == 'category' or isinstance(t, pd.CategoricalDtype) or str(t).startswith('float')}
+
+
+def enforce(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Cast a frame to a table's schema.
+
+    Statuses outside the fixed category lists become missing, except staff
+    statuses, which become STAFF_STATUS_FALLBACK. For calls the 'date'
+    string is parsed into 'datetime' (if not already present) and dropped.
+
+    Args:
+        df: Frame holding the table's columns.
+        table: One of the SCHEMAS keys.
+
+    Returns:
+        The typed frame.
+
+    Raises:
+        ValueError: If an integer column holds a value its narrowed type
+            cannot represent (astype would wrap it silently).
+    """
+    _, dtypes = SCHEMAS[table]
+    df = df.copy()
+    for column, dtype in dtypes.items():
+        if column in df.columns and isinstance(dtype, pd.CategoricalDtype) and df[column].dtype != dtype:
+            # Values outside a fixed category list become missing
+            df[column] = df[column].where(df[column].isin(dtype.categories))
+        elif column in df.columns and str(dtype).startswith('int') and df[column].dtype != dtype:
+            values, limits = pd.to_numeric(df[column]), np.iinfo(dtype)
+            if values.min() < limits.min or values.max() > limits.max:
+                raise ValueError(f"{table}.{column} has values outside the {dtype} range")
+    if table == 'staff' and 'status' in df.columns:
+        df['status'] = df['status'].fillna(STAFF_STATUS_FALLBACK)
+    df = df.astype({c: t for c, t in dtypes.items() if c in df.columns})
+    if table == 'calls' and 'date' in df.columns:
+        if 'datetime' not in df.columns:
+            df['datetime'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+        df = df.drop(columns='date')
+    return df
+
+
+def for_disk(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Convert a typed frame back to its on-disk column layout.
+
+    Args:
+        df: Typed frame.
+        table: One of the SCHEMAS keys.
+
+    Returns:
+        Frame with exactly the table's columns, in file order.
+    """
+    columns, _ = SCHEMAS[table]
+    if table == 'calls' and 'date' not in df.columns:
+        # Dates are to the minute, so format each distinct minute once
+        codes, minutes = pd.factorize(df['datetime'])
+        formatted = np.append(minutes.strftime(DATE_FORMAT).to_numpy(dtype=object), np.nan)
+        df = df.assign(date=formatted[codes])  # code -1 (NaT) picks the trailing NaN
+    return df[columns]
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """Deep memory footprint of a frame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def memory_report(n_calls: int = 1_000_000, n_staff: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """
+    Compare inferred and schema-typed memory use on synthetic tables.
+
+    Args:
+        n_calls: Number of calls to generate.
+        n_staff: Number of staff to generate.
+        seed: RNG seed.
+
+    Returns:
+        One row per table with the inferred and typed size in MB.
+    """
+    rng = np.random.default_rng(seed)
+    first = np.array(['John', 'Jane', 'Mike', 'Amy', 'Raj', 'Li', 'Sara', 'Tom'])
+    last = np.array(['Doe', 'Smith', 'Johnson', 'Patel', 'Chen', 'Brown', 'Khan', 'Lee'])
+    staff = pd.DataFrame({
+        'staff_id': np.arange(n_staff) + 100,
+        'first_name': first[rng.integers(0, len(first), n_staff)].astype(object),
+        'last_name': last[rng.integers(0, len(last), n_staff)].astype(object),
+        'manager_id': rng.integers(1, 50, n_staff),
+        'calls_taken': rng.integers(0, 5000, n_staff),
+        'successful_calls': rng.integers(0, 2500, n_staff),
+        'failed_calls': rng.integers(0, 2500, n_staff),
+        'target_successful_calls': np.full(n_staff, 10),
+        'working_time_elapsed': rng.random(n_staff) * 30000,
+        'avg_sat_score': rng.random(n_staff),
+        'status': np.array(STAFF_STATUSES, dtype=object)[rng.integers(0, 4, n_staff)],
+        'team_id': rng.integers(1, 50, n_staff),
+    })
+
+    moments = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n_calls), unit='min')
+    calls = pd.DataFrame({
+        'call_id': np.arange(n_calls, dtype='int64') + (1 << 40),
+        'status': np.array(['Successful', 'Failed'], dtype=object)[rng.integers(0, 2, n_calls)],
+        'time_elapsed': rng.integers(10, 1800, n_calls),
+        'sat_score': rng.random(n_calls).round(2),
+        'handler_id': rng.integers(100, 100 + n_staff, n_calls),
+        'date': moments.strftime(DATE_FORMAT).astype(object),
+        'team_id': rng.integers(1, 50, n_calls),
+    })
+    calls['datetime'] = moments
+
+    rows = []
+    for table, df in (('staff', staff), ('calls', calls)):
+        inferred, typed = memory_usage(df), memory_usage(enforce(df, table))
+        rows.append({'table': table, 'rows': len(df), 'inferred_mb': inferred / 2 ** 20,
+                     'typed_mb': typed / 2 ** 20, 'saving': 1 - typed / inferred})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(memory_report(n).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
@@ -0,0 +1,220 @@
+"""
+Per-site sharding of the data directory.
+
+Each shard is a directory holding its own staff, calls, teams, managers and
+membership tables:
+
+    data/shards/north/staff_details.csv
+    data/shards/north/calls/2025-07-19.csv
+    data/shards/south/...
+
+A process serves one shard (chosen with the TRACKER_SHARD environment
+variable), so its writes, write lock, data version and caches never touch
+another site's files. Without a shard the tables live directly in the data
+directory, as before. Cross-site views fan out over the shards on a thread
+pool and merge the per-shard results.
+
+Usage:
+    python shards.py list
+    python shards.py teams --days 30
+"""
+import argparse
+import datetime
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+from call_store import read_calls
+from storage import DATA_DIR, SUCCESS_THRESHOLD, data_version, read_teams
+
+SHARDS_DIR = os.path.join(DATA_DIR, "shards")
+MAX_WORKERS = 8
+
+T = TypeVar('T')
+
+
+class ShardPaths(NamedTuple):
+    """Table locations of one shard."""
+    name: str
+    root: str
+    staff_file: str
+    calls_dir: str
+    teams_file: str
+    managers_file: str
+    membership_file: str
+    sessions_file: str
+
+
+def data_paths(root: str, name: str = '') -> ShardPaths:
+    """
+    Table locations inside a data directory.
+
+    Args:
+        root: The data directory.
+        name: Shard name to record, if the directory is a shard.
+
+    Returns:
+        ShardPaths: The directory's table paths.
+    """
+    return ShardPaths(
+        name=name,
+        root=root,
+        staff_file=os.path.join(root, "staff_details.csv"),
+        calls_dir=os.path.join(root, "calls"),
+        teams_file=os.path.join(root, "team_details.csv"),
+        managers_file=os.path.join(root, "manager_details.csv"),
+        membership_file=os.path.join(root, "manager_staff.csv"),
+        sessions_file=os.path.join(root, "workday_sessions.csv"),
+    )
+
+
+def shard_paths(name: Optional[str] = None, shards_dir: str = SHARDS_DIR) -> ShardPaths:
+    """
+    Table locations of a shard.
+
+    Args:
+        name: Shard (site or team group) name, or None for the unsharded
+            data directory.
+        shards_dir: Directory holding the shard directories.
+
+    Returns:
+        ShardPaths: The shard's directory and table paths.
+    """
+    if name and (os.sep in name or name.startswith('.')):
+        raise ValueError(f"Invalid shard name: {name!r}")
+    return data_paths(os.path.join(shards_dir, name) if name else DATA_DIR, name or '')
+
+
+def current_shard() -> ShardPaths:
+    """Table locations of the shard named by TRACKER_SHARD (unsharded if unset)."""
+    return shard_paths(os.environ.get('TRACKER_SHARD') or None)
+
+
+def list_shards(shards_dir: str = SHARDS_DIR) -> List[ShardPaths]:
+    """
+    Every shard under the shards directory.
+
+    Returns:
+        The shards in name order, or just the unsharded data directory if
+        there are none.
+    """
+    if not os.path.isdir(shards_dir):
+        return [shard_paths(None)]
+    names = sorted(e.name for e in os.scandir(shards_dir) if e.is_dir() and not e.name.startswith('.'))
+    return [shard_paths(n, shards_dir) for n in names] or [shard_paths(None)]
+
+
+def map_shards(func: Callable[[ShardPaths], T], shards: Iterable[ShardPaths],
+               max_workers: int = MAX_WORKERS) -> List[T]:
+    """
+    Run a function on every shard in parallel.
+
+    pandas releases the GIL while parsing CSVs, so reading shards on a
+    thread pool overlaps their I/O and parsing.
+
+    Args:
+        func: Called with each shard's paths.
+        shards: Shards to visit.
+        max_workers: Thread pool size.
+
+    Returns:
+        The results, in shard order.
+    """
+    shards = list(shards)
+    if len(shards) <= 1:
+        return [func(s) for s in shards]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(shards)),
+                            thread_name_prefix="shard") as pool:
+        return list(pool.map(func, shards))
+
+
+_team_stats: Dict[Tuple[str, Optional[datetime.date]], Tuple[str, pd.DataFrame]] = {}
+_team_stats_lock = threading.Lock()
+
+
+def shard_team_stats(shard: ShardPaths, start: Optional[datetime.date] = None) -> pd.DataFrame:
+    """
+    Call totals per team of one shard.
+
+    Results are cached per shard and data version, so a write on one shard
+    only recomputes that shard.
+
+    Args:
+        shard: Shard to summarise.
+        start: Only count calls on or after this day.
+
+    Returns:
+        pd.DataFrame with shard, team_id, team_name, calls and successful
+        columns.
+    """
+    version = data_version(shard.calls_dir, shard.teams_file)
+    key = (shard.root, start)
+    with _team_stats_lock:
+        cached = _team_stats.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    columns = ['shard', 'team_id', 'team_name', 'calls', 'successful']
+    if not os.path.exists(shard.teams_file):
+        return pd.DataFrame(columns=columns)
+    since = datetime.datetime.combine(start, datetime.time()) if start is not None else None
+    calls = read_calls(shard.calls_dir, start=since, columns=['team_id', 'sat_score', 'date'])
+    calls['success'] = calls['sat_score'] >= SUCCESS_THRESHOLD
+    totals = calls.groupby('team_id', observed=True).agg(calls=('success', 'size'), successful=('success', 'sum'))
+    teams = read_teams(shard.teams_file)[['team_id', 'team_name']]
+    stats = teams.join(totals, on='team_id').fillna({'calls': 0, 'successful': 0})
+    stats = stats.astype({'calls': 'int64', 'successful': 'int64', 'team_name': str})
+    stats.insert(0, 'shard', shard.name)
+
+    with _team_stats_lock:
+        _team_stats[key] = (version, stats)
+    return stats
+
+
+def compare_teams(shards: Optional[Iterable[ShardPaths]] = None,
+                  start: Optional[datetime.date] = None,
+                  max_workers: int = MAX_WORKERS) -> pd.DataFrame:
+    """
+    Success rate of every team across shards.
+
+    Args:
+        shards: Shards to include; defaults to all of them.
+        start: Only count calls on or after this day.
+        max_workers: Thread pool size.
+
+    Returns:
+        pd.DataFrame with one row per (shard, team) and a success_rate column.
+    """
+    shards = list_shards() if shards is None else list(shards)
+    parts = map_shards(lambda s: shard_team_stats(s, start), shards, max_workers)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=['shard', 'team_id', 'team_name', 'calls', 'successful'])
+    df['success_rate'] = df['successful'] / df['calls'].where(df['calls'] > 0)
+    return df
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Data shard tools")
+    parser.add_argument('--shards-dir', default=SHARDS_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List shards and their table locations")
+    teams = commands.add_parser('teams', help="Compare teams across shards")
+    teams.add_argument('--days', type=int, help="Only the last N days (including today)")
+    args = parser.parse_args(argv)
+
+    shards = list_shards(args.shards_dir)
+    if args.command == 'list':
+        for shard in shards:
+            print(f"{shard.name or '(unsharded)'}: {shard.root}")
+    else:
+        start = datetime.date.today() - datetime.timedelta(days=args.days - 1) if args.days else None
+        print(compare_teams(shards, start).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Workday sessions and shift-time analytics.
+
+Every ended workday is appended to the sessions table as an interval:
+
+    staff_id,team_id,started_at,ended_at
+    101,1,1751360400,1751389200
+
+so history is kept instead of one overwritten duration. Times are whole
+seconds since 1970-01-01 on the local wall clock, the same clock call
+dates are recorded on. Shift statistics
+join those intervals against call intervals in one vectorised pass:
+sessions are sorted by (staff, start), each call is matched to the last
+session of its handler that started before it ended with a searchsorted,
+and the call's overlap with that session is its busy time. That gives
+worked time, busy (on-call) time, idle time, occupancy and calls per
+working hour per staff member or team.
+
+Call dates are recorded to the minute, so a call is taken to end at the
+last second of its recorded minute and is clipped to its session.
+
+Usage:
+    python shifts.py --days 7 --by team
+    python shifts.py bench --staff 2000 --days 30
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from call_store import read_calls
+from schema import SESSION_COLUMNS, enforce, read_dtypes
+from storage import CALLS_DIR, SESSIONS_FILE, write_lock
+
+MINUTE = 60
+
+SHIFT_COLUMNS = ['sessions', 'worked_seconds', 'busy_seconds', 'idle_seconds',
+                 'calls', 'occupancy', 'calls_per_hour']
+
+
+def _seconds(moment: datetime.datetime) -> int:
+    # Wall-clock seconds since 1970-01-01, the same clock call dates use
+    return int(pd.Timestamp(moment).floor('s').value // 10 ** 9)
+
+
+def record_session(staff_id: int, team_id: int, started_at: datetime.datetime,
+                   ended_at: datetime.datetime, sessions_file: str = SESSIONS_FILE) -> None:
+    """
+    Append one ended workday to the sessions table.
+
+    Args:
+        staff_id: Staff member who worked.
+        team_id: Their team.
+        started_at: Local time the workday started.
+        ended_at: Local time the workday ended.
+
+    Raises:
+        ValueError: If the session ends before it starts.
+    """
+    if ended_at < started_at:
+        raise ValueError("Workday cannot end before it starts")
+    row = pd.DataFrame([[int(staff_id), int(team_id), _seconds(started_at), _seconds(ended_at)]],
+                       columns=SESSION_COLUMNS)
+    with write_lock(sessions_file):
+        exists = os.path.exists(sessions_file)
+        row.to_csv(sessions_file, mode='a' if exists else 'w', header=not exists, index=False)
+
+
+def read_sessions(sessions_file: str = SESSIONS_FILE) -> pd.DataFrame:
+    """Read the sessions table; empty if no workday has ended yet."""
+    if not os.path.exists(sessions_file):
+        return enforce(pd.DataFrame(columns=SESSION_COLUMNS), 'sessions')
+    return enforce(pd.read_csv(sessions_file, dtype=read_dtypes('sessions')), 'sessions')
+
+
+def _merge_overlaps(staff: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    # Sessions sorted by (staff, start); a staff member's overlapping sessions
+    # (e.g. two open tabs) are merged so their time is only counted once
+    running_end = pd.Series(ends).groupby(staff).cummax().to_numpy()
+    new = np.ones(len(staff), dtype=bool)
+    new[1:] = (staff[1:] != staff[:-1]) | (starts[1:] > running_end[:-1])
+    first = np.flatnonzero(new)
+    return first, np.maximum.reduceat(ends, first) if len(first) else ends[:0]
+
+
+def shift_stats(sessions: pd.DataFrame, calls: pd.DataFrame,
+                start: Optional[datetime.datetime] = None,
+                end: Optional[datetime.datetime] = None,
+                by: str = 'staff',
+                team_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    Worked, busy and idle time per staff member or team.
+
+    Args:
+        sessions: Workday sessions as returned by read_sessions().
+        calls: Calls with handler_id, time_elapsed and datetime columns.
+        start: Only count time at or after this, or None for no lower bound.
+        end: Only count time before this, or None for no upper bound.
+        by: 'staff' or 'team'.
+        team_id: Only include sessions worked for this team.
+
+    Returns:
+        pd.DataFrame indexed by staff_id or team_id with the SHIFT_COLUMNS.
+        Times are in seconds, occupancy is busy / worked time and calls
+        only counts calls taken during a workday.
+    """
+    if by not in ('staff', 'team'):
+        raise ValueError("by must be 'staff' or 'team'")
+    group_field = 'staff_id' if by == 'staff' else 'team_id'
+    if team_id is not None:
+        sessions = sessions[sessions['team_id'] == team_id]
+
+    # Clip sessions to the window and sort by (staff, start)
+    lo = _seconds(start) if start is not None else np.iinfo('int64').min
+    hi = _seconds(end) if end is not None else np.iinfo('int64').max
+    starts = np.maximum(sessions['started_at'].to_numpy('int64'), lo)
+    ends = np.minimum(sessions['ended_at'].to_numpy('int64'), hi)
+    keep = ends > starts
+    staff = sessions['staff_id'].to_numpy('int64')[keep]
+    teams = sessions['team_id'].to_numpy('int64')[keep]
+    starts, ends = starts[keep], ends[keep]
+    order = np.lexsort((starts, staff))
+    staff, teams, starts, ends = staff[order], teams[order], starts[order], ends[order]
+
+    first, ends = _merge_overlaps(staff, starts, ends)
+    staff, teams, starts = staff[first], teams[first], starts[first]
+    if not len(staff):
+        return pd.DataFrame(columns=SHIFT_COLUMNS, index=pd.Index([], name=group_field))
+
+    # Match each call to the latest session of its handler starting before the call ended
+    call_staff = calls['handler_id'].to_numpy('int64')
+    call_end = calls['datetime'].to_numpy('datetime64[s]').astype('int64') + (MINUTE - 1)
+    call_start = call_end - calls['time_elapsed'].to_numpy('int64')
+    session_keys = (staff << 32) | (starts - starts.min())
+    call_keys = (call_staff << 32) | np.clip(call_end - starts.min(), 0, (1 << 32) - 1)
+    index = np.searchsorted(session_keys, call_keys, side='right') - 1
+    matched = index >= 0
+    index = np.where(matched, index, 0)
+    matched &= (staff[index] == call_staff) & (starts[index] <= call_end)
+    matched &= call_end - (MINUTE - 1) < ends[index]
+    busy = np.minimum(call_end, ends[index]) - np.maximum(call_start, starts[index])
+    busy = np.where(matched, np.maximum(busy, 0), 0)
+
+    per_session = pd.DataFrame({
+        'staff_id': staff,
+        'team_id': teams,
+        'sessions': 1,
+        'worked_seconds': ends - starts,
+        'busy_seconds': np.bincount(index, weights=busy, minlength=len(staff)).astype('int64'),
+        'calls': np.bincount(index[matched], minlength=len(staff)),
+    })
+    df = per_session.groupby(group_field)[['sessions', 'worked_seconds', 'busy_seconds', 'calls']].sum()
+    df['idle_seconds'] = df['worked_seconds'] - df['busy_seconds']
+    df['occupancy'] = df['busy_seconds'] / df['worked_seconds']
+    df['calls_per_hour'] = df['calls'] / (df['worked_seconds'] / 3600)
+    return df[SHIFT_COLUMNS]
+
+
+def shift_report(sessions_file: str = SESSIONS_FILE, calls_path: str = CALLS_DIR,
+                 start: Optional[datetime.datetime] = None,
+                 end: Optional[datetime.datetime] = None,
+                 by: str = 'staff',
+                 team_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    shift_stats() over the tables on disk, reading only the call partitions in the window.
+
+    Args:
+        sessions_file: Sessions table.
+        calls_path: Calls directory, or a single call CSV file.
+        start: Window start, or None for no lower bound.
+        end: Window end (exclusive), or None for no upper bound.
+        by: 'staff' or 'team'.
+        team_id: Only include sessions worked for this team.
+
+    Returns:
+        pd.DataFrame: As for shift_stats().
+    """
+    calls = read_calls(calls_path, start, end, columns=['handler_id', 'time_elapsed', 'date'])
+    return shift_stats(read_sessions(sessions_file), calls, start, end, by, team_id)
+
+
+def benchmark(n_staff: int = 2000, days: int = 30, calls_per_day: int = 60, seed: int = 0) -> dict:
+    """
+    Time shift_stats() on a synthetic floor.
+
+    Every staff member works one 8 hour session a day and takes calls_per_day
+    calls spread through it.
+
+    Args:
+        n_staff: Number of staff.
+        days: Number of days.
+        calls_per_day: Calls per staff member per day.
+        seed: RNG seed.
+
+    Returns:
+        Row counts and the seconds taken by the staff and team reports.
+    """
+    rng = np.random.default_rng(seed)
+    day_starts = _seconds(datetime.datetime(2025, 7, 1, 9)) + np.arange(days) * 86400
+    staff_ids = np.arange(n_staff) + 100
+    started = (day_starts[None, :] + rng.integers(-1800, 1800, (n_staff, days))).ravel()
+    sessions = pd.DataFrame({
+        'staff_id': np.repeat(staff_ids, days),
+        'team_id': np.repeat(staff_ids % 50 + 1, days),
+        'started_at': started,
+        'ended_at': started + 8 * 3600,
+    })
+    n_calls = len(sessions) * calls_per_day
+    ended = np.repeat(started, calls_per_day) + rng.integers(300, 8 * 3600, n_calls)
+    calls = pd.DataFrame({
+        'handler_id': np.repeat(sessions['staff_id'].to_numpy(), calls_per_day),
+        'time_elapsed': rng.integers(30, 600, n_calls),
+        'datetime': pd.to_datetime((ended // MINUTE) * MINUTE, unit='s'),
+    })
+    sessions, calls = enforce(sessions, 'sessions'), enforce(calls, 'calls')
+
+    results = {'sessions': len(sessions), 'calls': n_calls}
+    for by in ('staff', 'team'):
+        began = time.perf_counter()
+        shift_stats(sessions, calls, by=by)
+        results[f"{by}_seconds"] = time.perf_counter() - began
+    return results
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['bench']:
+        parser = argparse.ArgumentParser(description="Time shift statistics on a synthetic floor")
+        parser.add_argument('--staff', type=int, default=2000)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--calls-per-day', type=int, default=60)
+        args = parser.parse_args(argv[1:])
+        for name, value in benchmark(args.staff, args.days, args.calls_per_day).items():
+            print(f"{name}: {value:,.3f}" if isinstance(value, float) else f"{name}: {value:,}")
+        return 0
+
+    parser = argparse.ArgumentParser(description="Occupancy, idle time and calls per working hour")
+    parser.add_argument('--sessions-file', default=SESSIONS_FILE)
+    parser.add_argument('--calls-path', default=CALLS_DIR)
+    parser.add_argument('--by', choices=['staff', 'team'], default='team')
+    parser.add_argument('--days', type=int, help="Only the last N days (including today)")
+    parser.add_argument('--team-id', type=int)
+    args = parser.parse_args(argv)
+
+    start = None
+    if args.days:
+        start = datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=args.days - 1),
+                                          datetime.time())
+    report = shift_report(args.sessions_file, args.calls_path, start, by=args.by, team_id=args.team_id)
+    print(report.to_string(float_format=lambda x: f"{x:,.2f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
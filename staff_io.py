@@ -0,0 +1,221 @@
+"""
+Bulk import and export of staff records.
+
+Usage:
+    python staff_io.py import new_staff.csv --manager-id 1 --team-id 1
+    python staff_io.py export team1.csv --team-id 1
+"""
+import argparse
+import os
+import sys
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO
+
+import pandas as pd
+
+from classes import Manager, get_staff_repository
+from event_log import log_event
+from leaderboard import get_leaderboard
+from query_cache import get_query_cache
+from wal import get_journal
+from membership import get_membership_table
+from storage import STAFF_FILE, MANAGERS_FILE, MEMBERSHIP_FILE, STAFF_COLUMNS, STAFF_STATUSES, atomic_write
+
+REQUIRED_COLUMNS = ['staff_id', 'first_name', 'last_name']
+
+# Values used for columns the uploaded file leaves out
+STAFF_DEFAULTS = {
+    'calls_taken': 0,
+    'successful_calls': 0,
+    'failed_calls': 0,
+    'target_successful_calls': 10,
+    'working_time_elapsed': 0,
+    'avg_sat_score': 0,
+    'status': 'Free',
+}
+
+
+class ImportResult(NamedTuple):
+    """Outcome of a bulk staff import."""
+    accepted: pd.DataFrame
+    rejected: pd.DataFrame
+
+
+def validate_staff_batch(batch: pd.DataFrame,
+                         existing_ids: Iterable[int],
+                         known_manager_ids: Optional[Iterable[int]] = None,
+                         manager_id: Optional[int] = None,
+                         team_id: Optional[int] = None) -> ImportResult:
+    """Check a batch of staff rows in one vectorized pass.
+
+    Args:
+        batch: Rows to import; needs at least staff_id, first_name and last_name.
+        existing_ids: Staff IDs already present in the staff table.
+        known_manager_ids: Manager IDs rows may refer to; not checked if None.
+        manager_id: Manager to assign rows that do not name one.
+        team_id: Team to assign rows that do not name one.
+
+    Returns:
+        ImportResult: Rows ready to write (in STAFF_COLUMNS order) and rejected
+        rows with an 'error' column explaining why.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    df = batch.copy()
+    for column, value in (('manager_id', manager_id), ('team_id', team_id)):
+        if column not in df.columns:
+            df[column] = value
+        elif value is not None:
+            df[column] = df[column].fillna(value)
+    for column, value in STAFF_DEFAULTS.items():
+        if column not in df.columns:
+            df[column] = value
+        else:
+            df[column] = df[column].fillna(value)
+
+    for column in ('staff_id', 'manager_id', 'team_id', 'target_successful_calls'):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['first_name'] = df['first_name'].fillna('').astype(str).str.strip()
+    df['last_name'] = df['last_name'].fillna('').astype(str).str.strip()
+
+    error = pd.Series('', index=df.index, dtype=object)
+
+    def flag(mask: pd.Series, message: str) -> None:
+        error[mask & (error == '')] = message
+
+    flag(df['staff_id'].isna() | (df['staff_id'] <= 0) | (df['staff_id'] % 1 != 0), "invalid staff_id")
+    flag(df['first_name'].eq('') | df['last_name'].eq(''), "missing name")
+    flag(df['staff_id'].isin(list(existing_ids)), "staff_id already exists")
+    flag(df['staff_id'].duplicated(keep='first'), "duplicate staff_id in batch")
+    flag(df['manager_id'].isna() | df['team_id'].isna(), "missing manager_id or team_id")
+    if known_manager_ids is not None:
+        flag(~df['manager_id'].isin(list(known_manager_ids)), "unknown manager_id")
+    flag(~df['status'].isin(STAFF_STATUSES), "invalid status")
+
+    ok = error == ''
+    accepted = df.loc[ok, STAFF_COLUMNS].copy()
+    for column in ('staff_id', 'manager_id', 'team_id', 'target_successful_calls'):
+        accepted[column] = accepted[column].astype(int)
+    rejected = batch.loc[~ok].assign(error=error[~ok])
+    return ImportResult(accepted, rejected)
+
+
+def import_staff(batch: pd.DataFrame,
+                 staff_file: str = STAFF_FILE,
+                 managers_file: str = MANAGERS_FILE,
+                 membership_file: str = MEMBERSHIP_FILE,
+                 manager_id: Optional[int] = None,
+                 team_id: Optional[int] = None,
+                 managers: Iterable[Manager] = ()) -> ImportResult:
+    """Validate a batch of staff rows and commit the valid ones.
+
+    The staff table is written once and the membership table gets a single
+    append, however many rows the batch holds.
+
+    Args:
+        batch: Rows to import.
+        staff_file: Staff CSV file to append to.
+        managers_file: Manager CSV file holding the known manager IDs.
+        membership_file: Manager-staff membership file to append to.
+        manager_id: Manager to assign rows that do not name one.
+        team_id: Team to assign rows that do not name one.
+        managers: Live Manager objects whose staff_list should be updated.
+
+    Returns:
+        ImportResult: The rows written and the rows rejected.
+    """
+    with get_journal(staff_file).transaction() as journal:
+        staff_df = pd.read_csv(staff_file) if os.path.exists(staff_file) else pd.DataFrame(columns=STAFF_COLUMNS)
+        manager_df = pd.read_csv(managers_file)
+
+        result = validate_staff_batch(batch, staff_df['staff_id'], manager_df['manager_id'],
+                                      manager_id=manager_id, team_id=team_id)
+        if result.accepted.empty:
+            return result
+
+        journal.append('staff_add', {'rows': result.accepted.to_dict('records')})
+        with atomic_write(staff_file) as f:
+            pd.concat([staff_df, result.accepted], ignore_index=True).to_csv(f, index=False)
+        get_staff_repository(staff_file).reload()
+        get_leaderboard(staff_file).update_frame(result.accepted)
+
+    get_membership_table(membership_file).add_many(
+        zip(result.accepted['manager_id'], result.accepted['staff_id']))
+
+    live = {m.id: m for m in managers}
+    for mid, ids in result.accepted.groupby('manager_id')['staff_id']:
+        if mid in live:
+            live[mid].staff_list.update(ids.tolist())
+    get_query_cache(staff_file).invalidate_teams(result.accepted['team_id'])
+    log_event('staff.imported', staff_file=staff_file, accepted=len(result.accepted),
+              rejected=len(result.rejected))
+    return result
+
+
+def iter_staff_export(staff_file: str = STAFF_FILE,
+                      team_id: Optional[int] = None,
+                      chunksize: int = 10000) -> Iterator[str]:
+    """Stream the staff table as CSV text, one chunk at a time.
+
+    Args:
+        staff_file: Staff CSV file to export.
+        team_id: Only export staff from this team if given.
+        chunksize: Rows read per chunk.
+
+    Yields:
+        str: CSV text; the first chunk carries the header.
+    """
+    header = True
+    for chunk in pd.read_csv(staff_file, chunksize=chunksize):
+        if team_id is not None:
+            chunk = chunk[chunk['team_id'] == team_id]
+        if chunk.empty and not header:
+            continue
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+
+
+def export_staff(out: TextIO, staff_file: str = STAFF_FILE,
+                 team_id: Optional[int] = None, chunksize: int = 10000) -> None:
+    """Write the staff table to an open text file in bounded memory."""
+    for text in iter_staff_export(staff_file, team_id, chunksize):
+        out.write(text)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk staff import/export")
+    parser.add_argument('--staff-file', default=STAFF_FILE)
+    parser.add_argument('--managers-file', default=MANAGERS_FILE)
+    parser.add_argument('--membership-file', default=MEMBERSHIP_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    imp = commands.add_parser('import', help="Import staff rows from a CSV file")
+    imp.add_argument('path')
+    imp.add_argument('--manager-id', type=int)
+    imp.add_argument('--team-id', type=int)
+
+    exp = commands.add_parser('export', help="Export staff rows to a CSV file")
+    exp.add_argument('path', nargs='?', default='-')
+    exp.add_argument('--team-id', type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        result = import_staff(pd.read_csv(args.path), args.staff_file, args.managers_file,
+                              args.membership_file, manager_id=args.manager_id, team_id=args.team_id)
+        print(f"Imported {len(result.accepted)} staff, rejected {len(result.rejected)}.")
+        if not result.rejected.empty:
+            result.rejected.to_csv(sys.stderr, index=False)
+        return 1 if not result.rejected.empty else 0
+
+    if args.path == '-':
+        export_staff(sys.stdout, args.staff_file, args.team_id)
+    else:
+        with open(args.path, 'w', newline='') as f:
+            export_staff(f, args.staff_file, args.team_id)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
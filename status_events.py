@@ -0,0 +1,136 @@
+"""
+In-process publish/subscribe of staff status changes.
+
+Staff objects publish here whenever their status changes. Every Streamlit
+session runs in a thread of the same server process, so one shared bus
+lets a manager's status board see changes made in any staff session.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class StatusEvent(NamedTuple):
+    """A single staff status change."""
+    version: int
+    staff_id: int
+    status: str
+    previous: Optional[str]
+    timestamp: float
+
+
+class StatusBus:
+    def __init__(self, history: int = 10000) -> None:
+        """
+        Thread-safe status store with change notification.
+
+        Args:
+            history: Number of recent events kept for changes_since().
+        """
+        self._lock = threading.Lock()
+        self._statuses: Dict[int, str] = {}
+        self._events: List[StatusEvent] = []
+        self._history = history
+        self._version = 0
+        self._subscribers: List[Callable[[StatusEvent], None]] = []
+
+    @property
+    def version(self) -> int:
+        """Number of status changes published so far."""
+        return self._version
+
+    def publish(self, staff_id: int, status: str) -> Optional[StatusEvent]:
+        """
+        Record a staff member's new status and notify subscribers.
+
+        Args:
+            staff_id: ID of the staff member.
+            status: The new status.
+
+        Returns:
+            The published event, or None if the status did not change.
+        """
+        staff_id = int(staff_id)
+        with self._lock:
+            previous = self._statuses.get(staff_id)
+            if previous == status:
+                return None
+            self._version += 1
+            event = StatusEvent(self._version, staff_id, status, previous, time.time())
+            self._statuses[staff_id] = status
+            self._events.append(event)
+            if len(self._events) > self._history:
+                del self._events[:len(self._events) - self._history]
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+        return event
+
+    def seed(self, statuses: Dict[int, str]) -> None:
+        """Fill in statuses for staff the bus has not heard from yet, without events."""
+        with self._lock:
+            for staff_id, status in statuses.items():
+                self._statuses.setdefault(int(staff_id), status)
+
+    def status_of(self, staff_id: int, default: Optional[str] = None) -> Optional[str]:
+        """Return the last known status of a staff member."""
+        return self._statuses.get(int(staff_id), default)
+
+    def snapshot(self) -> Tuple[int, Dict[int, str]]:
+        """Return the current version and a copy of every known status."""
+        with self._lock:
+            return self._version, dict(self._statuses)
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Dict[int, str]]]:
+        """
+        Return the statuses that changed after a given version.
+
+        Args:
+            version: Version the caller last saw.
+
+        Returns:
+            The current version and a mapping of changed staff to their latest
+            status. The mapping is None if the events have been trimmed from
+            history, in which case the caller should take a full snapshot().
+        """
+        with self._lock:
+            if version >= self._version:
+                return self._version, {}
+            if not self._events or self._events[0].version > version + 1:
+                return self._version, None
+            start = version - self._events[0].version + 1
+            return self._version, {e.staff_id: e.status for e in self._events[start:]}
+
+    def subscribe(self, callback: Optional[Callable[[StatusEvent], None]] = None
+                  ) -> Tuple[Callable[[StatusEvent], None], Optional['queue.Queue[StatusEvent]']]:
+        """
+        Register for status events.
+
+        Callbacks run on the publishing thread, so they should be quick. With
+        no callback a queue is created and returned for a consumer thread to
+        drain.
+
+        Args:
+            callback: Function called with each StatusEvent.
+
+        Returns:
+            The registered callback (to pass to unsubscribe) and the queue, if any.
+        """
+        events = None
+        if callback is None:
+            events = queue.Queue()
+            callback = events.put
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback, events
+
+    def unsubscribe(self, callback: Callable[[StatusEvent], None]) -> None:
+        """Stop delivering events to a callback returned by subscribe()."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+
+# Shared by every session in the process
+status_bus = StatusBus()
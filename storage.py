@@ -0,0 +1,129 @@
+"""
+Locations of the tracker's CSV tables and their typed readers.
+
+Column layouts and dtypes live in schema and are re-exported here.
+Shared by the Streamlit app and the command line tools so both read and
+write the same files.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, TextIO, Tuple
+
+import pandas as pd
+
+from schema import (CALL_COLUMNS, CALL_STATUSES, DATE_FORMAT, MANAGER_COLUMNS, MEMBERSHIP_COLUMNS,
+                    SESSION_COLUMNS, STAFF_COLUMNS, STAFF_STATUS_FALLBACK, STAFF_STATUSES, TEAM_COLUMNS,
+                    enforce, read_dtypes)
+
+DATA_DIR = "data"
+
+# File paths
+STAFF_FILE = os.path.join(DATA_DIR, "staff_details.csv")
+CALLS_FILE = os.path.join(DATA_DIR, "call_details.csv")  # pre-partitioning flat call table
+CALLS_DIR = os.path.join(DATA_DIR, "calls")
+TEAMS_FILE = os.path.join(DATA_DIR, "team_details.csv")
+MANAGERS_FILE = os.path.join(DATA_DIR, "manager_details.csv")
+MEMBERSHIP_FILE = os.path.join(DATA_DIR, "manager_staff.csv")
+SESSIONS_FILE = os.path.join(DATA_DIR, "workday_sessions.csv")
+
+# Calls scoring at or above this are counted as successful
+SUCCESS_THRESHOLD = 0.8
+
+
+_write_locks: Dict[str, threading.RLock] = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(path: str) -> threading.RLock:
+    """
+    Lock serialising read-modify-write cycles on the tables in one directory.
+
+    Locks are per directory, so each data shard is its own lock domain and
+    writers on one shard never wait for another.
+
+    Args:
+        path: Any table file (or the calls directory) of the shard.
+
+    Returns:
+        The shard's re-entrant lock.
+    """
+    key = os.path.dirname(os.path.abspath(path))
+    with _write_locks_guard:
+        if key not in _write_locks:
+            _write_locks[key] = threading.RLock()
+        return _write_locks[key]
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[TextIO]:
+    """
+    Open a text file for writing so readers only ever see the old or the new content.
+
+    Writes go to a temporary file in the same directory, which is flushed
+    to disk and then renamed over the target. A crash mid-write leaves the
+    original file untouched.
+
+    Args:
+        path: File to replace.
+
+    Yields:
+        The temporary file, opened for writing with newline=''.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_staff(staff_file: str = STAFF_FILE) -> pd.DataFrame:
+    """Read the staff table."""
+    return enforce(pd.read_csv(staff_file, dtype=read_dtypes('staff')), 'staff')
+
+
+def read_teams(teams_file: str = TEAMS_FILE) -> pd.DataFrame:
+    """Read the team table."""
+    return enforce(pd.read_csv(teams_file, dtype=read_dtypes('teams')), 'teams')
+
+
+def read_managers(managers_file: str = MANAGERS_FILE) -> pd.DataFrame:
+    """Read the manager table."""
+    return enforce(pd.read_csv(managers_file, dtype=read_dtypes('managers')), 'managers')
+
+
+def data_version(*files: str) -> str:
+    """
+    Cheap fingerprint of the given files that changes whenever one is written.
+
+    Args:
+        files: Paths to fingerprint; directories are fingerprinted by the
+            files directly inside them. Defaults to the four main tables.
+
+    Returns:
+        A short string usable as an HTTP ETag or cache key.
+    """
+    parts: Tuple = ()
+    for path in files or (STAFF_FILE, CALLS_DIR, TEAMS_FILE, MANAGERS_FILE):
+        if os.path.isdir(path):
+            for entry in sorted(os.scandir(path), key=lambda e: e.name):
+                if entry.is_file():
+                    stat = entry.stat()
+                    parts += (entry.name, stat.st_mtime_ns, stat.st_size)
+            continue
+        try:
+            stat = os.stat(path)
+            parts += (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            parts += (0, 0)
+    # A fixed digest rather than hash(), which is salted per process for strings
+    return hashlib.blake2b(repr(parts).encode(), digest_size=6).hexdigest()
@@ -0,0 +1,364 @@
+"""
+Deterministic synthetic datasets for scale testing.
+
+Generates consistent staff, teams, managers, membership and calls tables:
+every call's team is its handler's team, and every staff member's
+counters and average satisfaction match the calls generated for them.
+Three on-disk layouts are supported:
+
+    flat          out/call_details.csv plus the other tables in out/
+    partitioned   out/calls/YYYY-MM-DD.csv plus the other tables in out/
+    sharded       out/shards/siteNN/... (teams spread over n_shards shards)
+
+Calls are generated on a process pool in tasks of whole days. A task
+holds about chunk_calls calls, and a busy day is split at minute
+boundaries into several chunks that its task generates and writes one
+after another, so each day is written in order by one worker. Every
+chunk gets its own RNG stream from SeedSequence.spawn, so the output is
+identical for any number of workers. Memory is bounded by chunk_calls
+plus the calls of one minute, and a few arrays per staff member.
+
+Call volume favours weekdays and business hours, handlers differ in how
+many calls they take, satisfaction scores follow a per-staff Beta
+distribution rounded to two decimals, and handle times are log-normal.
+
+Usage:
+    python synthetic.py out --staff 100000 --calls 100000000 --workers 8
+    python synthetic.py out --layout sharded --shards 4
+"""
+import argparse
+import datetime
+import functools
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from call_store import append_calls
+from schema import for_disk
+from shards import ShardPaths, data_paths, shard_paths
+from storage import (CALL_COLUMNS, MANAGER_COLUMNS, MEMBERSHIP_COLUMNS, STAFF_COLUMNS,
+                     SUCCESS_THRESHOLD, TEAM_COLUMNS)
+
+LAYOUTS = ('flat', 'partitioned', 'sharded')
+CALL_ID_BASE = 1 << 40      # clear of the IDs the seed data and tests use
+FIRST_STAFF_ID = 100
+
+FIRST_NAMES = np.array(['John', 'Jane', 'Mike', 'Amy', 'Raj', 'Li', 'Sara', 'Tom', 'Ana', 'Omar',
+                        'Chloe', 'Ivan', 'Maya', 'Noah', 'Zoe', 'Ben'])
+LAST_NAMES = np.array(['Doe', 'Smith', 'Johnson', 'Patel', 'Chen', 'Brown', 'Khan', 'Lee', 'Garcia',
+                       'Novak', 'Okafor', 'Silva', 'Kim', 'Murphy', 'Rossi', 'Weber'])
+
+# Relative call volume by weekday (Monday first) and by hour of day
+WEEKDAY_WEIGHTS = np.array([1.0, 1.0, 1.0, 1.0, 0.9, 0.35, 0.2])
+HOUR_WEIGHTS = np.array([0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.5, 1.5, 4, 7, 8, 7.5,
+                         5, 6, 7.5, 7, 6, 4, 2, 1.2, 0.8, 0.6, 0.4, 0.3])
+
+
+class DatasetSpec(NamedTuple):
+    """Size and shape of a synthetic dataset."""
+    n_staff: int = 1000
+    n_calls: int = 100_000
+    staff_per_team: int = 20
+    days: int = 90
+    end: datetime.date = datetime.date(2025, 7, 31)     # last day with calls
+    seed: int = 0
+    chunk_calls: int = 500_000
+
+    @property
+    def n_teams(self) -> int:
+        return max(1, -(-self.n_staff // self.staff_per_team))
+
+
+class Dataset(NamedTuple):
+    """What generate() wrote."""
+    layout: str
+    tables: List[ShardPaths]     # one entry, or one per shard
+    staff: int
+    calls: int
+    seconds: float
+
+
+class _Staff(NamedTuple):
+    team: np.ndarray             # team_id of each staff member
+    weight: np.ndarray           # probability of handling a given call
+    sat_a: np.ndarray            # Beta(a, 2) satisfaction shape
+
+
+class _Chunk(NamedTuple):
+    index: int
+    first_minute: int            # offset from the start of the window
+    minute_counts: np.ndarray    # calls in each minute from first_minute on
+    first_call: int              # calls generated by earlier chunks
+
+
+def _seeds(spec: DatasetSpec, n_chunks: int = 0
+           ) -> Tuple[np.random.SeedSequence, np.random.SeedSequence, List[np.random.SeedSequence]]:
+    # Independent streams for staff profiles, the other tables, the call
+    # counts per minute (calls[0]) and each chunk of calls (calls[1:])
+    staff_seed, tables_seed, calls_seed = np.random.SeedSequence(spec.seed).spawn(3)
+    return staff_seed, tables_seed, calls_seed.spawn(n_chunks + 1)
+
+
+@functools.lru_cache(maxsize=4)
+def _staff_profile(spec: DatasetSpec) -> _Staff:
+    # Rebuilt from the seed in each worker rather than shipped with every task
+    rng = np.random.default_rng(_seeds(spec)[0])
+    weight = rng.gamma(4.0, 0.25, spec.n_staff)
+    return _Staff(team=np.arange(spec.n_staff) % spec.n_teams + 1,
+                  weight=weight / weight.sum(),
+                  sat_a=np.clip(rng.normal(6.0, 1.5, spec.n_staff), 2.0, 12.0))
+
+
+def _tasks(spec: DatasetSpec) -> List[List[_Chunk]]:
+    # Calls per minute, then consecutive days grouped into tasks of about
+    # chunk_calls; a task is cut at minute boundaries into chunks of at most
+    # chunk_calls plus the calls of the minute that crosses the limit
+    first = spec.end - datetime.timedelta(days=spec.days - 1)
+    day_weights = WEEKDAY_WEIGHTS[(np.arange(spec.days) + first.weekday()) % 7]
+    weights = np.outer(day_weights, np.repeat(HOUR_WEIGHTS, 60)).ravel()
+    rng = np.random.default_rng(_seeds(spec)[2][0])
+    per_minute = rng.multinomial(spec.n_calls, weights / weights.sum())
+    per_day = per_minute.reshape(spec.days, 1440).sum(axis=1)
+
+    tasks: List[List[_Chunk]] = []
+    start, index, total = 0, 0, 0
+    for day in range(spec.days):
+        if per_day[start:day + 1].sum() >= spec.chunk_calls or day == spec.days - 1:
+            minutes = per_minute[start * 1440:(day + 1) * 1440]
+            running = np.cumsum(minutes)
+            cuts = np.searchsorted(running, np.arange(spec.chunk_calls, running[-1], spec.chunk_calls)) + 1
+            edges = np.unique(np.concatenate([[0], cuts, [len(minutes)]]))
+            task = []
+            for lo, hi in zip(edges[:-1], edges[1:]):
+                task.append(_Chunk(index, start * 1440 + int(lo), minutes[lo:hi].copy(), total))
+                index += 1
+                total += int(minutes[lo:hi].sum())
+            tasks.append(task)
+            start = day + 1
+    return tasks
+
+
+def generate_calls(spec: DatasetSpec, chunk: _Chunk, seed: np.random.SeedSequence) -> pd.DataFrame:
+    """
+    Generate one chunk of calls, ordered by time.
+
+    Args:
+        spec: Dataset being generated.
+        chunk: The minutes and call counts of this chunk.
+        seed: The chunk's RNG stream.
+
+    Returns:
+        Typed calls (with 'datetime' in place of 'date').
+    """
+    rng = np.random.default_rng(seed)
+    staff = _staff_profile(spec)
+    first = spec.end - datetime.timedelta(days=spec.days - 1)
+
+    minutes = np.repeat(np.arange(len(chunk.minute_counts)) + chunk.first_minute, chunk.minute_counts)
+    moment = np.datetime64(first, 'm') + minutes.astype('timedelta64[m]')
+    n = len(minutes)
+
+    handler = rng.choice(spec.n_staff, n, p=staff.weight)
+    sat = np.round(rng.beta(staff.sat_a[handler], 2.0), 2)
+    handle = np.clip(rng.lognormal(np.log(240), 0.6, n), 10, 3600).astype('int32')
+    return pd.DataFrame({
+        'call_id': CALL_ID_BASE + chunk.first_call + np.arange(n, dtype='int64'),
+        'status': pd.Categorical.from_codes((sat < SUCCESS_THRESHOLD).astype('int8'), ['Successful', 'Failed']),
+        'time_elapsed': handle,
+        'sat_score': sat.astype('float32'),
+        'handler_id': (handler + FIRST_STAFF_ID).astype('int32'),
+        'datetime': moment.astype('datetime64[ns]'),
+        'team_id': staff.team[handler].astype('int16'),
+    })
+
+
+def _shard_of(team_id: np.ndarray, n_shards: int) -> np.ndarray:
+    return (np.asarray(team_id) - 1) % n_shards
+
+
+def _write_chunk(spec: DatasetSpec, chunk: _Chunk, seed: np.random.SeedSequence,
+                 layout: str, tables: List[ShardPaths], part_dir: str) -> np.ndarray:
+    # Worker: generate and write one chunk; returns per-staff calls, successes and sat sums
+    calls = generate_calls(spec, chunk, seed)
+    if layout == 'flat':
+        part = os.path.join(part_dir, f"{chunk.index:06d}.csv")
+        for_disk(calls, 'calls').to_csv(part, header=False, index=False)
+    elif layout == 'partitioned':
+        append_calls(calls, tables[0].calls_dir)
+    else:
+        shard = _shard_of(calls['team_id'].to_numpy(), len(tables))
+        for i, paths in enumerate(tables):
+            if (shard == i).any():
+                append_calls(calls[shard == i], paths.calls_dir)
+
+    handler = calls['handler_id'].to_numpy() - FIRST_STAFF_ID
+    sat = calls['sat_score'].to_numpy('float64')
+    return np.stack([np.bincount(handler, minlength=spec.n_staff),
+                     np.bincount(handler, weights=sat >= SUCCESS_THRESHOLD, minlength=spec.n_staff),
+                     np.bincount(handler, weights=sat, minlength=spec.n_staff)])
+
+
+def _write_task(spec: DatasetSpec, chunks: List[_Chunk], seeds: List[np.random.SeedSequence],
+                layout: str, tables: List[ShardPaths], part_dir: str) -> np.ndarray:
+    # Worker: write a task's chunks in order, holding one chunk at a time
+    totals = np.zeros((3, spec.n_staff))
+    for chunk, seed in zip(chunks, seeds):
+        totals += _write_chunk(spec, chunk, seed, layout, tables, part_dir)
+    return totals
+
+
+def staff_tables(spec: DatasetSpec, totals: Optional[np.ndarray] = None
+                 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Staff, team, manager and membership tables of a dataset.
+
+    Team t is run by manager t, and staff member i is in team i mod n_teams.
+
+    Args:
+        spec: Dataset being generated.
+        totals: (3, n_staff) calls, successful calls and satisfaction sums
+            per staff member; zeros if not given.
+
+    Returns:
+        The staff, teams, managers and membership frames.
+    """
+    rng = np.random.default_rng(_seeds(spec)[1])
+    staff = _staff_profile(spec)
+    totals = totals if totals is not None else np.zeros((3, spec.n_staff))
+    calls = totals[0].astype('int64')
+    successful = totals[1].round().astype('int64')
+    staff_df = pd.DataFrame({
+        'staff_id': np.arange(spec.n_staff) + FIRST_STAFF_ID,
+        'first_name': FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), spec.n_staff)],
+        'last_name': LAST_NAMES[rng.integers(0, len(LAST_NAMES), spec.n_staff)],
+        'manager_id': staff.team,
+        'calls_taken': calls,
+        'successful_calls': successful,
+        'failed_calls': calls - successful,
+        'target_successful_calls': rng.integers(5, 30, spec.n_staff),
+        'working_time_elapsed': np.round(calls * 600 + rng.random(spec.n_staff) * 3600, 1),
+        'avg_sat_score': np.round(np.divide(totals[2], calls, out=np.zeros(spec.n_staff), where=calls > 0), 4),
+        'status': 'Out of Office',
+        'team_id': staff.team,
+    }, columns=STAFF_COLUMNS)
+    team_ids = np.arange(spec.n_teams) + 1
+    teams_df = pd.DataFrame({'team_id': team_ids, 'team_name': [f"Team {t}" for t in team_ids],
+                             'manager_id': team_ids}, columns=TEAM_COLUMNS)
+    managers_df = pd.DataFrame({
+        'manager_id': team_ids,
+        'manager_first_name': FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), spec.n_teams)],
+        'manager_last_name': LAST_NAMES[rng.integers(0, len(LAST_NAMES), spec.n_teams)],
+    }, columns=MANAGER_COLUMNS)
+    membership_df = pd.DataFrame({'manager_id': staff.team, 'staff_id': staff_df['staff_id'], 'active': 1},
+                                 columns=MEMBERSHIP_COLUMNS)
+    return staff_df, teams_df, managers_df, membership_df
+
+
+def _concat_parts(part_dir: str, n_parts: int, out_file: str) -> None:
+    # Stream the per-chunk call files into one table, in chunk order
+    with open(out_file, 'w', newline='') as out:
+        out.write(','.join(CALL_COLUMNS) + '\n')
+        for i in range(n_parts):
+            with open(os.path.join(part_dir, f"{i:06d}.csv"), 'r', newline='') as part:
+                shutil.copyfileobj(part, out, 1 << 20)
+    shutil.rmtree(part_dir)
+
+
+def _layout_tables(out_dir: str, layout: str, n_shards: int) -> List[ShardPaths]:
+    if layout == 'sharded':
+        shards_dir = os.path.join(out_dir, 'shards')
+        return [shard_paths(f"site{i + 1:02d}", shards_dir) for i in range(n_shards)]
+    return [data_paths(out_dir)]
+
+
+def generate(out_dir: str, spec: DatasetSpec = DatasetSpec(), layout: str = 'partitioned',
+             n_shards: int = 4, workers: Optional[int] = None) -> Dataset:
+    """
+    Write a synthetic dataset.
+
+    Args:
+        out_dir: Directory to create; must not already hold tables.
+        spec: Dataset size, date range and seed.
+        layout: 'flat', 'partitioned' or 'sharded'.
+        n_shards: Number of shards for the sharded layout.
+        workers: Worker processes; 0 generates in this process, None uses
+            one per CPU. The output does not depend on it.
+
+    Returns:
+        Dataset: The table locations written and the time taken.
+
+    Raises:
+        ValueError: For an unknown layout.
+        FileExistsError: If out_dir already holds a dataset.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}")
+    began = time.perf_counter()
+    tables = _layout_tables(out_dir, layout, n_shards)
+    for paths in tables:
+        if os.path.exists(paths.staff_file):
+            raise FileExistsError(paths.staff_file)
+        os.makedirs(paths.root, exist_ok=True)
+    part_dir = os.path.join(out_dir, '.call_parts')
+    if layout == 'flat':
+        os.makedirs(part_dir, exist_ok=True)
+
+    tasks = _tasks(spec)
+    n_chunks = sum(len(task) for task in tasks)
+    _, _, seeds = _seeds(spec, n_chunks)
+    args = [(spec, task, [seeds[chunk.index + 1] for chunk in task], layout, tables, part_dir)
+            for task in tasks]
+    totals = np.zeros((3, spec.n_staff))
+    if workers == 0:
+        for a in args:
+            totals += _write_task(*a)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_write_task, *zip(*args)):
+                totals += result
+
+    if layout == 'flat':
+        _concat_parts(part_dir, n_chunks, os.path.join(out_dir, "call_details.csv"))
+    staff_df, teams_df, managers_df, membership_df = staff_tables(spec, totals)
+    for i, paths in enumerate(tables):
+        teams = teams_df[_shard_of(teams_df['team_id'], len(tables)) == i]
+        staff = staff_df[staff_df['team_id'].isin(teams['team_id'])]
+        staff.to_csv(paths.staff_file, index=False)
+        teams.to_csv(paths.teams_file, index=False)
+        managers_df[managers_df['manager_id'].isin(teams['manager_id'])].to_csv(paths.managers_file, index=False)
+        membership_df[membership_df['staff_id'].isin(staff['staff_id'])].to_csv(paths.membership_file,
+                                                                                index=False)
+    return Dataset(layout, tables, spec.n_staff, int(totals[0].sum()), time.perf_counter() - began)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic dataset")
+    parser.add_argument('out_dir')
+    parser.add_argument('--staff', type=int, default=defaults.n_staff)
+    parser.add_argument('--calls', type=int, default=defaults.n_calls)
+    parser.add_argument('--days', type=int, default=defaults.days)
+    parser.add_argument('--end', type=datetime.date.fromisoformat, default=defaults.end)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-calls', type=int, default=defaults.chunk_calls)
+    parser.add_argument('--layout', choices=LAYOUTS, default='partitioned')
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(args.staff, args.calls, days=args.days, end=args.end, seed=args.seed,
+                       chunk_calls=args.chunk_calls)
+    dataset = generate(args.out_dir, spec, args.layout, args.shards, args.workers)
+    print(f"Wrote {dataset.calls:,} calls for {dataset.staff:,} staff ({dataset.layout}, "
+          f"{len(dataset.tables)} table set(s)) in {dataset.seconds:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
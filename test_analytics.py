@@ -0,0 +1,78 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from analytics import SketchStore, percentiles, SAT_VALUES
+from call_store import append_calls
+from classes import Call, Staff
+from storage import CALL_COLUMNS
+
+
+def test_percentiles_merge_across_days(tmp_path):
+    """Test that merged day histograms give the percentiles of the raw calls"""
+    rng = np.random.default_rng(0)
+    n = 5000
+    days = np.array(['01/07/2025 09:00', '02/07/2025 09:00', '03/07/2025 09:00'])[rng.integers(0, 3, n)]
+    calls = pd.DataFrame({
+        'call_id': np.arange(n), 'status': 'Successful',
+        'time_elapsed': rng.integers(10, 1800, n), 'sat_score': rng.random(n).round(2),
+        'handler_id': rng.integers(101, 104, n), 'date': days, 'team_id': 1,
+    })[CALL_COLUMNS]
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(calls, calls_dir)
+
+    store = SketchStore(calls_dir)
+    window = calls[calls['date'] >= '02/07/2025']
+    summary = store.summary('team', start=datetime.date(2025, 7, 2))
+    assert summary.loc[1, 'calls'] == len(window)
+    exact = np.percentile(window['time_elapsed'], [50, 90, 99], method='inverted_cdf')
+    approx = summary.loc[1, ['handle_p50', 'handle_p90', 'handle_p99']].to_numpy(dtype=float)
+    assert np.all(np.abs(approx - exact) / exact < 0.03)
+    assert summary.loc[1, 'sat_p90'] == np.percentile(window['sat_score'], 90, method='inverted_cdf')
+
+    by_staff = store.summary('staff')
+    assert by_staff['calls'].sum() == n
+    assert list(by_staff.index) == [101, 102, 103]
+
+
+def test_appended_rows_are_sketched_incrementally(tmp_path, monkeypatch):
+    """Test that growing today's partition only sketches the new rows and matches a full rebuild"""
+    calls_dir = str(tmp_path / 'calls')
+    rows = lambda ids, score: pd.DataFrame([[i, 'Successful', 60 * i, score, 101, '01/07/2025 09:00', 1]
+                                            for i in ids], columns=CALL_COLUMNS)
+    append_calls(rows(range(1, 4), 0.9), calls_dir)
+    store = SketchStore(calls_dir)
+    assert store.summary('staff').loc[101, 'calls'] == 3
+
+    sketched = []
+    original = analytics._sketch_csv
+    monkeypatch.setattr(analytics, '_sketch_csv', lambda data: sketched.append(data) or original(data))
+    append_calls(rows(range(4, 6), 0.5), calls_dir)
+    partition = os.path.join(calls_dir, '2025-07-01.csv')
+    with open(partition, 'a') as f:
+        f.write('6,Successful,60')  # a row still being written
+    incremental = store.summary('staff')
+
+    assert len(sketched) == 1 and sketched[0].count(b'\n') == 3   # header + the two new rows
+    pd.testing.assert_frame_equal(incremental, SketchStore(calls_dir).summary('staff'))
+    assert incremental.loc[101, 'calls'] == 5
+
+
+def test_empty_histogram_gives_nan():
+    """Test that groups without calls have no percentiles"""
+    counts = np.zeros((1, len(SAT_VALUES)), dtype='int64')
+    assert np.isnan(percentiles(counts, SAT_VALUES)).all()
+
+
+def test_end_call_counts_threshold_as_success():
+    """Test that a call scoring exactly the success threshold counts as successful"""
+    staff = Staff(id=1, first_name="A", last_name="B", manager_id=1, calls_taken=0,
+                  successful_calls=0, failed_calls=0, target_successful_calls=1,
+                  working_time_elapsed=0, avg_sat_score=0, status="Free")
+    call = Call(id=1, status="Incoming")
+    staff.accept_call(call)
+    staff.end_call(call, 0.8)
+    assert staff.successful_calls == 1 and call.status == "Successful"
@@ -0,0 +1,111 @@
+import asyncio
+import http.client
+import json
+import os
+import subprocess
+import sys
+from functools import partial
+
+import pandas as pd
+
+from api import TrackerData, handle_connection
+from storage import CALL_COLUMNS, STAFF_COLUMNS, data_version
+
+
+def make_tables(tmp_path):
+    staff_file, calls_file, teams_file = (str(tmp_path / name) for name in
+                                          ('staff.csv', 'calls.csv', 'teams.csv'))
+    pd.DataFrame([[101, 'John', 'Doe', 1, 2, 1, 1, 10, 0, 0.8, 'Free', 1]],
+                 columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame([[1, 'Successful', 120, 0.9, 101, '26/06/2025 15:36', 1],
+                  [2, 'Failed', 60, 0.5, 101, '27/06/2025 10:00', 1]],
+                 columns=CALL_COLUMNS).to_csv(calls_file, index=False)
+    pd.DataFrame({'team_id': [1], 'team_name': ['East'], 'manager_id': [1]}).to_csv(teams_file, index=False)
+    return TrackerData(staff_file, calls_file, teams_file)
+
+
+def run_against_server(data, client):
+    async def main():
+        server = await asyncio.start_server(partial(handle_connection, data), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.get_running_loop().run_in_executor(None, client, port)
+    return asyncio.run(main())
+
+
+def test_api_etag_and_keep_alive(tmp_path):
+    """Test that repeat polls on one connection get 304 until data changes"""
+    data = make_tables(tmp_path)
+
+    def client(port):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('GET', '/teams')
+        first = conn.getresponse()
+        teams = json.loads(first.read())
+        etag = first.getheader('ETag')
+
+        conn.request('GET', '/teams', headers={'If-None-Match': etag})
+        second = conn.getresponse()
+        second.read()
+
+        conn.request('POST', '/calls', body=json.dumps(
+            {'call_id': 3, 'status': 'Successful', 'time_elapsed': 30,
+             'sat_score': 1.0, 'handler_id': 101, 'team_id': 1}))
+        posted = conn.getresponse()
+        posted.read()
+
+        conn.request('GET', '/teams', headers={'If-None-Match': etag})
+        third = conn.getresponse()
+        teams_after = json.loads(third.read())
+
+        conn.request('GET', '/staff/999')
+        missing = conn.getresponse()
+        missing.read()
+        return teams, second.status, posted.status, third.status, teams_after, missing.status
+
+    teams, second, posted, third, teams_after, missing = run_against_server(data, client)
+    assert teams[0]['calls'] == 2 and teams[0]['success_rate'] == 0.5
+    assert second == 304
+    assert posted == 201
+    assert third == 200 and teams_after[0]['calls'] == 3
+    assert missing == 404
+
+
+def test_api_windowed_team_stats(tmp_path):
+    """Test that the days window filters calls before aggregating"""
+    data = make_tables(tmp_path)
+
+    def client(port):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('GET', '/teams/1/stats')
+        all_time = json.loads(conn.getresponse().read())
+        conn.request('GET', '/teams/1/stats?days=7')
+        recent = json.loads(conn.getresponse().read())
+        conn.request('GET', '/teams/1/stats?days=1e12')
+        huge = json.loads(conn.getresponse().read())
+        statuses = []
+        for days in ('-1', 'nan', 'soon'):
+            conn.request('GET', f'/teams/1/stats?days={days}')
+            response = conn.getresponse()
+            response.read()
+            statuses.append(response.status)
+        return all_time, recent, huge, statuses
+
+    all_time, recent, huge, statuses = run_against_server(data, client)
+    assert all_time['summary']['calls'] == 2
+    assert len(all_time['daily']) == 2
+    assert recent['summary'] == {'calls': 0}
+    assert huge['summary']['calls'] == 2
+    assert statuses == [400, 400, 400]
+
+
+def test_etag_is_stable_across_processes(tmp_path):
+    """Test that the data version does not depend on the process's hash seed"""
+    data = make_tables(tmp_path)
+    files = [*data.files, str(tmp_path)]
+    script = f"from storage import data_version; print(data_version(*{files!r}))"
+    versions = {subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env={**os.environ, 'PYTHONHASHSEED': seed}).stdout.strip()
+                for seed in ('1', '2')}
+    assert versions == {data_version(*files)}
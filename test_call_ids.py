@@ -0,0 +1,55 @@
+import datetime
+import multiprocessing
+import threading
+
+from call_ids import CallIdGenerator, claim_worker_id, id_range, id_to_datetime
+
+
+def claim_in_child(lease_dir, results):
+    worker_id, _ = claim_worker_id(lease_dir)
+    results.put(worker_id)
+
+
+def test_ids_unique_across_threads():
+    """Test that concurrent threads never receive the same ID"""
+    generator = CallIdGenerator(worker_id=3)
+    results = [[] for _ in range(8)]
+
+    def work(out):
+        for _ in range(5000):
+            out.append(generator.next_id())
+        out.extend(generator.next_ids(5000))
+
+    threads = [threading.Thread(target=work, args=(out,)) for out in results]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ids = [i for out in results for i in out]
+    assert len(set(ids)) == len(ids) == 80000
+    assert all(out == sorted(out) for out in results)
+
+
+def test_worker_leases_unique_across_processes(tmp_path):
+    """Test that a live lease is never handed to another process"""
+    lease_dir = str(tmp_path)
+    mine, _ = claim_worker_id(lease_dir)
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=claim_in_child, args=(lease_dir, results))
+    child.start()
+    child.join()
+    assert results.get(timeout=5) != mine
+
+
+def test_id_range_matches_issue_time():
+    """Test that IDs fall inside the range computed for their issue time"""
+    generator = CallIdGenerator(worker_id=1)
+    before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    call_id = generator.next_id()
+    after = before + datetime.timedelta(seconds=5)
+
+    low, high = id_range(before, after)
+    assert low <= call_id <= high
+    assert before <= id_to_datetime(call_id) < after
+    assert call_id > 1752000000004  # newer than any legacy ID
@@ -0,0 +1,72 @@
+import pandas as pd
+
+from call_ingest import ingest_calls, read_cdr
+from storage import CALL_COLUMNS, STAFF_COLUMNS
+
+
+def make_tables(tmp_path):
+    staff_file, calls_file, teams_file = (str(tmp_path / name) for name in
+                                          ('staff.csv', 'calls.csv', 'teams.csv'))
+    pd.DataFrame([[101, 'John', 'Doe', 1, 1, 1, 0, 10, 0, 0.9, 'Free', 1],
+                  [201, 'Mike', 'Johnson', 2, 0, 0, 0, 10, 0, 0.0, 'Free', 2]],
+                 columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame([[1, 'Successful', 120, 0.9, 101, '26/06/2025 15:36', 1]],
+                 columns=CALL_COLUMNS).to_csv(calls_file, index=False)
+    pd.DataFrame({'team_id': [1, 2], 'team_name': ['East', 'West'],
+                  'manager_id': [1, 2]}).to_csv(teams_file, index=False)
+    return calls_file, staff_file, teams_file
+
+
+def test_ingest_calls_validates_and_rolls_up(tmp_path):
+    """Test that a batch is validated, de-duplicated and rolled into staff counters"""
+    calls_file, staff_file, teams_file = make_tables(tmp_path)
+    batch = pd.DataFrame({
+        'call_id': [1, 2, 3, 3, 4, 5, 6],
+        'status': ['Successful', 'Failed', 'Successful', 'Successful', 'Bogus', 'Failed', 'Failed'],
+        'time_elapsed': [60, 30, 90, 90, 10, 10, 45],
+        'sat_score': [0.9, 0.3, 0.8, 0.8, 0.5, 1.5, 0.6],
+        'handler_id': [101, 101, 201, 201, 101, 101, 999],
+    })
+    result = ingest_calls(batch, calls_file, staff_file, teams_file)
+
+    assert list(result.accepted['call_id']) == [2, 3]
+    assert list(result.accepted['team_id']) == [1, 2]
+    assert list(result.rejected['error']) == [
+        "duplicate call_id", "duplicate call_id in batch", "invalid status",
+        "sat_score out of range", "unknown handler_id"]
+
+    assert len(pd.read_csv(calls_file)) == 3
+    staff = pd.read_csv(staff_file).set_index('staff_id')
+    assert staff.loc[101, 'calls_taken'] == 2
+    assert staff.loc[101, 'failed_calls'] == 1
+    assert abs(staff.loc[101, 'avg_sat_score'] - 0.6) < 1e-9
+    assert staff.loc[201, 'successful_calls'] == 1
+
+
+def test_read_cdr_jsonl(tmp_path):
+    """Test that JSON-lines batches are read like CSV ones"""
+    path = tmp_path / 'batch.jsonl'
+    path.write_text('{"call_id": 7, "status": "Failed", "time_elapsed": 5, '
+                    '"sat_score": 0.1, "handler_id": 101, "date": "01/07/2025 09:00"}\n')
+    calls_file, staff_file, teams_file = make_tables(tmp_path)
+    result = ingest_calls(read_cdr(str(path)), calls_file, staff_file, teams_file)
+    assert len(result.accepted) == 1 and result.rejected.empty
+
+
+def test_mixed_numbered_and_unnumbered_batch_keeps_ids_exact(tmp_path, monkeypatch):
+    """Test that 63-bit call IDs survive a batch where some rows have no call_id"""
+    monkeypatch.chdir(tmp_path)  # the ID generator leases a worker ID under ./data
+    calls_file, staff_file, teams_file = make_tables(tmp_path)
+    path = tmp_path / 'batch.csv'
+    path.write_text('call_id,status,time_elapsed,sat_score,handler_id,date\n'
+                    '237776828683530241,Successful,60,0.9,101,01/07/2025 09:00\n'
+                    '237776828683530240,Successful,60,0.9,101,01/07/2025 09:00\n'
+                    ',Failed,30,0.2,201,01/07/2025 09:05\n'
+                    '12x,Failed,30,0.2,201,01/07/2025 09:05\n')
+    result = ingest_calls(read_cdr(str(path)), calls_file, staff_file, teams_file)
+
+    ids = set(result.accepted['call_id'])
+    assert {237776828683530240, 237776828683530241} < ids and len(ids) == 3
+    assert list(result.rejected['error']) == ["invalid call_id"]
+    stored = pd.read_csv(calls_file, dtype={'call_id': str})['call_id']
+    assert {'237776828683530240', '237776828683530241'} <= set(stored)
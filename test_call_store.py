@@ -0,0 +1,72 @@
+import datetime
+import os
+import threading
+
+import pandas as pd
+
+from call_store import (RetentionPolicy, append_calls, compact, existing_call_ids,
+                        migrate_single_file, partition_files, read_calls)
+from storage import CALL_COLUMNS, write_lock
+
+
+def make_calls(rows):
+    return pd.DataFrame([[i, 'Successful', 60, 0.9, 101, date, 1] for i, date in rows],
+                        columns=CALL_COLUMNS)
+
+
+def test_append_partitions_by_day_and_prunes_reads(tmp_path):
+    """Test that a window only opens the day partitions it overlaps"""
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(make_calls([(1, '30/06/2025 23:59'), (2, '01/07/2025 08:00'),
+                             (3, '01/07/2025 09:00'), (4, '03/07/2025 12:00')]), calls_dir)
+
+    assert sorted(os.listdir(calls_dir)) == ['2025-06-30.csv', '2025-07-01.csv', '2025-07-03.csv']
+    window = partition_files(calls_dir, datetime.datetime(2025, 7, 1, 8, 30))
+    assert [os.path.basename(f) for f in window] == ['2025-07-01.csv', '2025-07-03.csv']
+
+    calls = read_calls(calls_dir, start=datetime.datetime(2025, 7, 1, 8, 30))
+    assert list(calls['call_id']) == [3, 4]
+    assert list(existing_call_ids(calls_dir, pd.Series(['01/07/2025 10:00']))) == [2, 3]
+
+
+def test_compact_and_retention(tmp_path):
+    """Test that old days fold into monthly archives and expired archives go"""
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(make_calls([(1, '15/03/2025 10:00'), (2, '02/06/2025 10:00'),
+                             (3, '20/06/2025 10:00'), (4, '18/07/2025 10:00')]), calls_dir)
+
+    compact(calls_dir, RetentionPolicy(archive_after_days=20, retain_days=100),
+            today=datetime.date(2025, 7, 19))
+
+    assert sorted(os.listdir(os.path.join(calls_dir, 'archive'))) == ['2025-06.csv.gz']
+    assert sorted(f for f in os.listdir(calls_dir) if f.endswith('.csv')) == ['2025-07-18.csv']
+    assert list(read_calls(calls_dir)['call_id']) == [2, 3, 4]
+    june = read_calls(calls_dir, start=datetime.datetime(2025, 6, 10), end=datetime.datetime(2025, 7, 1))
+    assert list(june['call_id']) == [3]
+
+
+def test_compact_waits_for_writers(tmp_path):
+    """Test that compaction does not fold a day while a writer holds the directory's lock"""
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(make_calls([(1, '02/06/2025 10:00')]), calls_dir)
+    policy, today = RetentionPolicy(archive_after_days=20), datetime.date(2025, 7, 19)
+
+    with write_lock(calls_dir):
+        worker = threading.Thread(target=compact, args=(calls_dir, policy, today))
+        worker.start()
+        append_calls(make_calls([(2, '02/06/2025 11:00')]), calls_dir)
+        worker.join(timeout=0.2)
+        assert worker.is_alive()
+    worker.join()
+    assert list(read_calls(calls_dir)['call_id']) == [1, 2]
+
+
+def test_migrate_single_file(tmp_path):
+    """Test that the flat call table is split into partitions"""
+    calls_file = str(tmp_path / 'call_details.csv')
+    calls_dir = str(tmp_path / 'calls')
+    make_calls([(1, '26/06/2025 15:36'), (2, '19/07/2025 18:16')]).to_csv(calls_file, index=False)
+
+    assert migrate_single_file(calls_file, calls_dir)
+    assert not os.path.exists(calls_file)
+    assert len(read_calls(calls_dir)) == 2
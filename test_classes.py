@@ -1,5 +1,6 @@
 import csv
 import os
+import pickle
 import time
 from classes import *
 
@@ -50,6 +51,57 @@ def test_manager_functions():
     manager.view_staff_detail(103)
 
 
+def test_manager_bulk_functions(tmp_path):
+    """Test the bulk Manager functions against an isolated staff file"""
+    print("\n=== TESTING MANAGER BULK FUNCTIONS ===")
+
+    staff_file = str(tmp_path / 'staff_details.csv')
+    repository = StaffRepository(staff_file)
+    manager = Manager(id=1, first_name="Alice", last_name="Johnson", staff_list=[],
+                      repository=repository)
+
+    writes = []
+    original_save = repository.save
+    repository.save = lambda: (writes.append(1), original_save())
+
+    added = manager.add_staff_many([(201, "Ann", "Lee"), (202, "Ben", "Ray"), (201, "Ann", "Lee")])
+    assert added == [201, 202]
+    assert manager.staff_list == {201, 202}
+    assert len(writes) == 1
+
+    updated = manager.edit_many({201: {'first_name': 'Anne'}, 999: {'first_name': 'Nobody'}})
+    assert updated == [201]
+    assert len(writes) == 2
+
+    removed = manager.remove_staff_many([202, 999])
+    assert removed == [202]
+    assert len(writes) == 3
+
+    reloaded = StaffRepository(staff_file)
+    assert 202 not in reloaded
+    assert reloaded.get(201)['first_name'] == 'Anne'
+
+
+def test_manager_copies_share_the_repository(tmp_path):
+    """Test that a pickled Manager (as cached by the dashboard) writes through the shared repository"""
+    staff_file = str(tmp_path / 'staff_details.csv')
+    manager = pickle.loads(pickle.dumps(Manager(id=1, first_name="Alice", last_name="Johnson", staff_list=[],
+                                                staff_file=staff_file)))
+    assert manager.repository is get_staff_repository(staff_file)
+
+    # An ID already in the staff table (e.g. in another team) is not claimed
+    get_staff_repository(staff_file).add({'staff_id': 201, 'first_name': 'Ann', 'last_name': 'Lee'})
+    assert not manager.add_staff(201, 'Ann', 'Lee') and 201 not in manager.staff_list
+
+
+def test_end_workday_without_start():
+    """Test that ending a workday that was never started records nothing"""
+    staff = Staff(id=101, first_name="John", last_name="Doe", manager_id=1)
+    assert staff.end_workday() == 0.0 and staff.working_time_elapsed == 0
+    staff.start_workday()
+    assert staff.end_workday() >= 0 and staff.workday_started_at is None
+
+
 def test_staff_functions():
     print("\n=== TESTING STAFF FUNCTIONS ===")
 
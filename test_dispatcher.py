@@ -0,0 +1,63 @@
+import time
+
+from classes import Call, Staff
+from dispatcher import CallDispatcher, PRIORITY_TARGET
+
+
+def make_staff(staff_id, status="Free", successful=0):
+    return Staff(id=staff_id, first_name="Test", last_name=str(staff_id), manager_id=1,
+                 successful_calls=successful, target_successful_calls=10, status=status)
+
+
+def test_dispatch_longest_idle_first():
+    """Test that calls go to the staff member who has been free longest"""
+    dispatcher = CallDispatcher()
+    first, second = make_staff(7001), make_staff(7002)
+    dispatcher.register(first, 1)
+    time.sleep(0.01)
+    dispatcher.register(second, 1)
+    dispatcher.register(make_staff(7003), 2)
+
+    calls = [Call(id=i, status="Incoming") for i in range(3)]
+    for call in calls:
+        dispatcher.submit(call, 1)
+    assignments = dispatcher.dispatch(1)
+
+    assert [a.staff.id for a in assignments] == [7001, 7002]
+    assert calls[0].handler_id == 7001 and first.status == "On Call"
+    assert dispatcher.claim(7002) is calls[1]
+    assert dispatcher.metrics(1).queue_depth == 1
+
+    # Ending a call puts the staff member back in the free heap
+    first.end_call(calls[0], 0.9)
+    assert [a.staff.id for a in dispatcher.dispatch(1)] == [7001]
+    assert dispatcher.queue_depth() == 0
+    dispatcher.close()
+
+
+def test_dispatch_by_target_progress():
+    """Test that the target ordering favours staff furthest behind target"""
+    dispatcher = CallDispatcher(priority=PRIORITY_TARGET)
+    dispatcher.register(make_staff(7101, successful=8), 1)
+    dispatcher.register(make_staff(7102, successful=2), 1)
+    dispatcher.register(make_staff(7103, status="Lunch"), 1)
+
+    dispatcher.submit(Call(id=1, status="Incoming"), 1)
+    assert [a.staff.id for a in dispatcher.dispatch(1)] == [7102]
+    assert dispatcher.metrics(1).free_staff == 1
+    dispatcher.close()
+
+
+def test_wait_metrics_per_team():
+    """Test that a team's wait statistics only count its own assignments"""
+    dispatcher = CallDispatcher()
+    dispatcher.register(make_staff(7201), 1)
+    dispatcher.submit(Call(id=1, status="Incoming"), 1)
+    dispatcher.submit(Call(id=2, status="Incoming"), 2)
+    time.sleep(0.05)
+    dispatcher.dispatch(1)
+
+    assert dispatcher.metrics(1).assigned == 1 and dispatcher.metrics(1).avg_wait >= 0.05
+    assert dispatcher.metrics(2).assigned == 0 and dispatcher.metrics(2).avg_wait == 0.0
+    assert dispatcher.metrics().assigned == 1
+    dispatcher.close()
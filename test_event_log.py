@@ -0,0 +1,54 @@
+import json
+import logging
+
+import event_log
+from classes import Call, Staff
+from event_log import configure, log_event, shutdown
+
+
+def read_events(path):
+    shutdown()
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_call_events_are_json_lines(tmp_path):
+    """Test that accepted/ended calls are logged and construction is silent at INFO"""
+    path = str(tmp_path / 'events.jsonl')
+    configure(logging.INFO, path, sample_rates={})
+    staff = Staff(101, 'John', 'Doe', 1)
+    call = Call(7, 'Incoming')
+    staff.accept_call(call)
+    staff.end_call(call, 0.9)
+
+    events = read_events(path)
+    assert [e['event'] for e in events] == ['call.accepted', 'call.ended']
+    assert events[1]['staff_id'] == 101 and events[1]['status'] == 'Successful'
+    assert events[1]['level'] == 'INFO'
+
+
+def test_sampling_and_levels(tmp_path, monkeypatch):
+    """Test that sampled events carry their rate and debug events need DEBUG"""
+    path = str(tmp_path / 'events.jsonl')
+    configure(logging.DEBUG, path, sample_rates={'call.accepted': 0.25})
+    draws = iter([0.1, 0.9])
+    monkeypatch.setattr(event_log.random, 'random', lambda: next(draws))
+    assert log_event('call.accepted', call_id=1)
+    assert not log_event('call.accepted', call_id=2)
+    assert log_event('staff.created', logging.DEBUG, staff_id=101)
+
+    events = read_events(path)
+    assert events[0] == {**events[0], 'event': 'call.accepted', 'call_id': 1, 'sample_rate': 0.25}
+    assert events[1]['event'] == 'staff.created' and 'sample_rate' not in events[1]
+
+
+def test_call_events_sampled_by_default(tmp_path, monkeypatch):
+    """Test that per-call events are sampled unless configured otherwise"""
+    monkeypatch.delenv('TRACKER_LOG_SAMPLE', raising=False)
+    path = str(tmp_path / 'events.jsonl')
+    configure(logging.INFO, path)
+    monkeypatch.setattr(event_log.random, 'random', lambda: 0.5)
+    assert not log_event('call.accepted', call_id=1)
+    assert not log_event('call.ended', call_id=1)
+    assert log_event('workday.ended', staff_id=101)
+    assert [e['event'] for e in read_events(path)] == ['workday.ended']
@@ -0,0 +1,46 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from call_store import append_calls
+from forecast import Forecaster, fit_forecast, holt
+from storage import CALL_COLUMNS
+
+TODAY = datetime.date(2025, 7, 21)  # a Monday
+
+
+def test_holt_follows_a_linear_trend():
+    """Test that level and trend converge on a straight line"""
+    level, trend = holt(np.array([10.0 + 2 * np.arange(200)]), alpha=0.5, beta=0.3)
+    assert abs(level[0] - 408) < 0.5 and abs(trend[0] - 2) < 0.01
+
+
+def test_weekly_pattern_is_forecast():
+    """Test that weekday seasonality and the success rate carry into the forecast"""
+    days = pd.date_range(end=TODAY - datetime.timedelta(days=1), periods=56)
+    volume = np.where(days.weekday < 5, 100, 20)
+    daily = pd.DataFrame({'team_id': 1, 'day': days, 'calls': volume, 'successful': volume * 3 // 4})
+    forecast = fit_forecast(daily, TODAY)
+
+    assert list(forecast['date'].dt.date) == [TODAY + datetime.timedelta(days=d) for d in range(1, 8)]
+    weekday = forecast[forecast['date'].dt.weekday < 5]['calls']
+    weekend = forecast[forecast['date'].dt.weekday >= 5]['calls']
+    assert np.allclose(weekday, 100, rtol=0.05) and np.allclose(weekend, 20, rtol=0.05)
+    assert np.allclose(forecast['success_rate'], 0.75)
+
+
+def test_forecaster_refits_only_when_calls_change(tmp_path):
+    """Test the cached per-team forecast read by the dashboard"""
+    calls_dir = str(tmp_path / 'calls')
+    rows = [[i, 'Successful', 60, 0.9 if i % 2 else 0.5, 101, f"{d:02d}/07/2025 10:00", 1 + i % 2]
+            for d in range(1, 21) for i in range(4)]
+    append_calls(pd.DataFrame(rows, columns=CALL_COLUMNS), calls_dir)
+
+    forecaster = Forecaster(calls_dir)
+    assert forecaster.forecast(1) is None
+    assert forecaster.refresh(TODAY) and not forecaster.refresh(TODAY)
+    team = forecaster.forecast(2)
+    assert len(team.days) == 7 and team.days['success_rate'].iloc[0] == 1.0
+    assert forecaster.forecast(1).days['success_rate'].iloc[0] == 0.0
+    assert team.next_week == team.days['calls'].sum()
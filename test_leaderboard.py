@@ -0,0 +1,77 @@
+import random
+
+import pandas as pd
+
+from call_ingest import ingest_calls
+from leaderboard import Leaderboard, RankedList, get_leaderboard
+from storage import STAFF_COLUMNS, TEAM_COLUMNS
+
+
+def test_ranked_list_matches_sorted_list():
+    """Test positional access and ranks against a plain sorted list"""
+    rng = random.Random(0)
+    ranked, reference = RankedList(seed=0), []
+    for i in range(3000):
+        if reference and rng.random() < 0.3:
+            key = reference.pop(rng.randrange(len(reference)))
+            ranked.remove(key)
+        else:
+            key = (rng.random(), i)
+            reference.append(key)
+            ranked.insert(key)
+    reference.sort()
+    assert len(ranked) == len(reference)
+    assert [ranked[i] for i in range(0, len(reference), 97)] == reference[::97]
+    assert all(ranked.index(k) == i for i, k in enumerate(reference[:200]))
+    assert list(ranked.iter_from(len(reference) - 3)) == reference[-3:]
+
+
+def test_leaderboard_orders_by_rate_calls_then_satisfaction(tmp_path):
+    """Test ranks, top/bottom K and percentiles per team and overall"""
+    board = Leaderboard(str(tmp_path / 'missing.csv'))
+    board.update(1, 1, 10, 8, 0.7)
+    board.update(2, 1, 20, 16, 0.6)   # same rate, more calls
+    board.update(3, 2, 5, 1, 0.9)
+    board.update(4, 2, 0, 0, 0)       # no calls yet, not ranked
+
+    assert [s.staff_id for s in board.top(3)] == [2, 1, 3]
+    assert [s.staff_id for s in board.bottom(1, team_id=1)] == [1]
+    assert board.rank(1) == 2 and board.rank(1, within_team=True) == 2
+    assert board.rank(4) is None
+    assert board.percentile(2) == 100 * 2 / 3
+
+    board.update(3, 2, 6, 6, 0.9)
+    assert board.rank(3) == 1
+    assert board.remove(2) and board.size(team_id=1) == 1
+
+
+def test_ingest_moves_handler_up(tmp_path, monkeypatch):
+    """Test that ending calls updates the shard's leaderboard"""
+    monkeypatch.chdir(tmp_path)  # the ID generator leases a worker ID under ./data
+    staff_file, teams_file = str(tmp_path / 'staff.csv'), str(tmp_path / 'teams.csv')
+    pd.DataFrame([[101, 'A', 'B', 1, 2, 0, 2, 10, 0, 0.5, 'Free', 1],
+                  [102, 'C', 'D', 1, 2, 1, 1, 10, 0, 0.9, 'Free', 1]],
+                 columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame([[1, 'Team', 1]], columns=TEAM_COLUMNS).to_csv(teams_file, index=False)
+    board = get_leaderboard(staff_file)
+    assert board.rank(101) == 2
+
+    batch = pd.DataFrame({'status': ['Successful'] * 6, 'time_elapsed': 60, 'sat_score': 0.95,
+                          'handler_id': 101, 'date': '01/07/2025 09:00'})
+    ingest_calls(batch, str(tmp_path / 'calls'), staff_file, teams_file)
+    assert board.rank(101) == 1
+    assert board.standing(101).calls_taken == 8
+
+
+def test_update_frame_first_loads_the_whole_file(tmp_path):
+    """Test that a partial batch as the first use of a board keeps the rows it did not touch"""
+    staff_file = str(tmp_path / 'staff.csv')
+    staff = pd.DataFrame([[101, 'A', 'B', 1, 2, 0, 2, 10, 0, 0.5, 'Free', 1],
+                          [102, 'C', 'D', 1, 2, 1, 1, 10, 0, 0.9, 'Free', 1]], columns=STAFF_COLUMNS)
+    staff.to_csv(staff_file, index=False)
+
+    board = Leaderboard(staff_file)
+    board.update_frame(staff[staff['staff_id'] == 101].assign(calls_taken=3, failed_calls=3))
+    assert board.size(1) == 2
+    assert board.standing(102) is not None
+    assert board.standing(101).calls_taken == 3
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from membership import MembershipTable, migrate_legacy_staff_lists
+
+
+def test_membership_appends_single_rows(tmp_path):
+    """Test that adding and removing members only appends to the file"""
+    filename = str(tmp_path / 'manager_staff.csv')
+    table = MembershipTable(filename)
+
+    assert table.add_many([(1, 101), (1, 102), (2, 201)]) == [(1, 101), (1, 102), (2, 201)]
+    assert not table.add(1, 101)
+    assert table.remove(1, 102)
+    assert not table.remove(2, 102)
+
+    assert len(pd.read_csv(filename)) == 4
+    assert table.members(1) == {101}
+    assert table.manager_of(201) == 2
+
+    reloaded = MembershipTable(filename)
+    assert reloaded.members(1) == {101}
+    assert (2, 201) in reloaded
+    assert (1, 102) not in reloaded
+
+    reloaded.compact()
+    assert len(pd.read_csv(filename)) == 2
+
+
+def test_migrate_legacy_staff_lists(tmp_path):
+    """Test that the old list repr column is moved into the membership table"""
+    managers_file = tmp_path / 'manager_details.csv'
+    membership_file = str(tmp_path / 'manager_staff.csv')
+    pd.DataFrame({'manager_id': [1, 2, 3], 'manager_first_name': ['David', 'Shirley', 'Sam'],
+                  'manager_last_name': ['Cooper', 'McDonald', 'Vale'],
+                  'staff_list': ['[101, 102]', '[201]', '[]']}).to_csv(managers_file, index=False)
+
+    assert migrate_legacy_staff_lists(str(managers_file), membership_file)
+    assert not migrate_legacy_staff_lists(str(managers_file), membership_file)
+
+    assert 'staff_list' not in pd.read_csv(managers_file).columns
+    table = MembershipTable(membership_file)
+    assert table.members(1) == {101, 102}
+    assert table.members(2) == {201}
+    assert table.members(3) == set()
@@ -0,0 +1,60 @@
+import pandas as pd
+
+import query_cache
+from call_ingest import ingest_calls
+from query_cache import QueryCache, get_query_cache
+from storage import CALL_COLUMNS, STAFF_COLUMNS
+
+
+def make_tables(tmp_path):
+    staff_file, calls_file, teams_file = (str(tmp_path / name) for name in
+                                          ('staff.csv', 'calls.csv', 'teams.csv'))
+    pd.DataFrame([[101, 'John', 'Doe', 1, 1, 1, 0, 10, 0, 0.9, 'Free', 1],
+                  [201, 'Mike', 'Johnson', 2, 0, 0, 0, 10, 0, 0.0, 'Free', 2]],
+                 columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame([[1, 'Successful', 120, 0.9, 101, '26/06/2025 15:36', 1]],
+                 columns=CALL_COLUMNS).to_csv(calls_file, index=False)
+    pd.DataFrame({'team_id': [1, 2], 'team_name': ['East', 'West'],
+                  'manager_id': [1, 2]}).to_csv(teams_file, index=False)
+    return calls_file, staff_file, teams_file
+
+
+def test_lru_eviction_ttl_and_stats(monkeypatch):
+    """Test that the least recently used entry is evicted and expired entries are recomputed"""
+    now = [0.0]
+    monkeypatch.setattr(query_cache.time, 'monotonic', lambda: now[0])
+    cache = QueryCache(max_entries=2, ttl=10)
+    calls = []
+    compute = lambda value: lambda: calls.append(value) or value
+
+    assert cache.get_or_compute('q', 1, 'a', compute('a')) == 'a'
+    cache.get_or_compute('q', 1, 'b', compute('b'))
+    cache.get_or_compute('q', 1, 'a', compute('a'))      # hit; 'b' is now least recent
+    cache.get_or_compute('q', 1, 'c', compute('c'))      # evicts 'b'
+    cache.get_or_compute('q', 1, 'b', compute('b'))
+    assert calls == ['a', 'b', 'c', 'b']
+
+    now[0] = 11
+    cache.get_or_compute('q', 1, 'b', compute('b'))
+    assert calls[-1] == 'b' and len(calls) == 5
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 5, 2, 2)
+
+
+def test_ingest_invalidates_only_the_written_team(tmp_path):
+    """Test that calls ingested for one team leave the other team's results cached"""
+    calls_file, staff_file, teams_file = make_tables(tmp_path)
+    cache = get_query_cache(staff_file)
+    computed = []
+    team_calls = lambda team_id: cache.get_or_compute(
+        'team_calls', team_id, None, lambda: computed.append(team_id) or team_id)
+
+    team_calls(1), team_calls(2), team_calls(1), team_calls(2)
+    assert computed == [1, 2]
+
+    ingest_calls(pd.DataFrame({'call_id': [2], 'status': ['Successful'], 'time_elapsed': [60],
+                               'sat_score': [0.9], 'handler_id': [101]}),
+                 calls_file, staff_file, teams_file)
+    team_calls(1), team_calls(2)
+    assert computed == [1, 2, 1]
+    assert cache.stats().invalidations == 1
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from call_store import append_calls, read_calls
+from schema import CALL_COLUMNS, STAFF_STATUS_FALLBACK, enforce, for_disk, memory_report
+from storage import read_staff
+
+
+def test_readers_apply_schema(tmp_path):
+    """Test that loaded tables get narrow dtypes and calls drop the date string"""
+    staff_file = tmp_path / 'staff.csv'
+    staff_file.write_text("staff_id,first_name,last_name,manager_id,calls_taken,successful_calls,"
+                          "failed_calls,target_successful_calls,working_time_elapsed,avg_sat_score,status,team_id\n"
+                          "101,John,Doe,1,3,2,1,10,0.0,0.75,Free,1\n")
+    staff = read_staff(str(staff_file))
+    assert staff['staff_id'].dtype == 'int32'
+    assert staff['avg_sat_score'].dtype == 'float32'
+    assert list(staff['status'].cat.categories) == ['Free', 'On Call', 'Lunch', 'Out of Office']
+
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(pd.DataFrame([[1 << 40, 'Successful', 60, 0.9, 101, '01/07/2025 09:00', 1]],
+                              columns=CALL_COLUMNS), calls_dir)
+    calls = read_calls(calls_dir)
+    assert 'date' not in calls.columns
+    assert calls['call_id'].iloc[0] == 1 << 40
+    assert calls['handler_id'].dtype == 'int32'
+    assert calls['status'].dtype == 'category'
+
+    # Typed rows round-trip to the on-disk layout
+    append_calls(calls, calls_dir)
+    assert for_disk(read_calls(calls_dir), 'calls')['date'].tolist() == ['01/07/2025 09:00'] * 2
+
+
+def test_enforce_rejects_unknown_status():
+    """Test that a status outside the schema never becomes a new category"""
+    typed = enforce(pd.DataFrame({'status': ['Free', 'Asleep']}), 'staff')
+    assert typed['status'].tolist() == ['Free', STAFF_STATUS_FALLBACK]
+    typed = enforce(pd.DataFrame({'status': ['Failed', 'Lost']}), 'calls')
+    assert typed['status'].isna().tolist() == [False, True]
+
+
+def test_enforce_refuses_to_wrap_narrowed_integers():
+    """Test that an ID too large for its column raises rather than wrapping"""
+    with pytest.raises(ValueError, match='team_id'):
+        enforce(pd.DataFrame({'team_id': [1, 40000]}), 'teams')
+    assert enforce(pd.DataFrame({'target_successful_calls': [40000]}), 'staff').iloc[0, 0] == 40000
+
+
+def test_memory_report_shows_saving():
+    """Test that typed call tables are much smaller than inferred ones"""
+    report = memory_report(n_calls=20000, n_staff=200).set_index('table')
+    assert report.loc['calls', 'saving'] > 0.5
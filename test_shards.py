@@ -0,0 +1,44 @@
+import pandas as pd
+
+import shards
+from call_store import append_calls
+from shards import compare_teams, list_shards, shard_paths, shard_team_stats
+from storage import CALL_COLUMNS, TEAM_COLUMNS, write_lock
+
+
+def make_shard(shards_dir, name, team_id, scores):
+    shard = shard_paths(name, str(shards_dir))
+    append_calls(pd.DataFrame([[i, 'Successful', 60, s, 101, '01/07/2025 09:00', team_id]
+                               for i, s in enumerate(scores)], columns=CALL_COLUMNS), shard.calls_dir)
+    pd.DataFrame([[team_id, f"Team {name}", 1]], columns=TEAM_COLUMNS).to_csv(shard.teams_file, index=False)
+    return shard
+
+
+def test_compare_teams_across_shards(tmp_path):
+    """Test that team stats from every shard are merged"""
+    make_shard(tmp_path, 'north', 1, [0.9, 0.5])
+    make_shard(tmp_path, 'south', 2, [0.9, 0.9, 0.1, 0.8])
+
+    found = list_shards(str(tmp_path))
+    assert [s.name for s in found] == ['north', 'south']
+    df = compare_teams(found).set_index('shard')
+    assert df.loc['north', 'success_rate'] == 0.5
+    assert df.loc['south', 'calls'] == 4 and df.loc['south', 'successful'] == 3
+
+
+def test_shards_are_independent(tmp_path, monkeypatch):
+    """Test that shards have separate write locks and a write only recomputes its own shard"""
+    north = make_shard(tmp_path, 'north', 1, [0.9])
+    south = make_shard(tmp_path, 'south', 2, [0.9])
+    assert write_lock(north.staff_file) is not write_lock(south.staff_file)
+    assert write_lock(north.staff_file) is write_lock(north.teams_file)
+
+    compare_teams([north, south])
+    computed = []
+    original = shards.read_calls
+    monkeypatch.setattr(shards, 'read_calls', lambda path, **kw: computed.append(path) or original(path, **kw))
+    append_calls(pd.DataFrame([[9, 'Failed', 60, 0.2, 101, '02/07/2025 09:00', 1]], columns=CALL_COLUMNS),
+                 north.calls_dir)
+    stats = pd.concat([shard_team_stats(north), shard_team_stats(south)])
+    assert computed == [north.calls_dir]
+    assert list(stats['calls']) == [2, 1]
@@ -0,0 +1,50 @@
+import datetime
+
+import pandas as pd
+
+from call_store import append_calls
+from shifts import read_sessions, record_session, shift_report, shift_stats
+from storage import CALL_COLUMNS
+
+
+def at(hour, minute=0, day=1):
+    return datetime.datetime(2025, 7, day, hour, minute)
+
+
+def test_occupancy_and_idle_time(tmp_path):
+    """Test busy time is the overlap of calls with their handler's sessions"""
+    sessions_file = str(tmp_path / 'sessions.csv')
+    record_session(101, 1, at(9), at(13), sessions_file)
+    record_session(101, 1, at(12), at(17), sessions_file)   # overlaps the first: merged
+    record_session(102, 1, at(9), at(11), sessions_file)
+    record_session(103, 2, at(9), at(10), sessions_file)
+    assert len(read_sessions(sessions_file)) == 4
+
+    calls_dir = str(tmp_path / 'calls')
+    append_calls(pd.DataFrame([
+        [1, 'Successful', 1800, 0.9, 101, '01/07/2025 10:29', 1],   # 30 min, inside
+        [2, 'Failed', 600, 0.2, 101, '01/07/2025 09:04', 1],       # ends 09:04:59, started before the workday
+        [3, 'Successful', 600, 0.9, 102, '01/07/2025 12:00', 1],   # after 102's workday
+        [4, 'Successful', 3600, 0.9, 102, '01/07/2025 10:00', 1],  # 1 hour, inside
+    ], columns=CALL_COLUMNS), calls_dir)
+
+    staff = shift_report(sessions_file, calls_dir, team_id=1)
+    assert list(staff.index) == [101, 102]
+    assert staff.loc[101, 'sessions'] == 1 and staff.loc[101, 'worked_seconds'] == 8 * 3600
+    assert staff.loc[101, 'busy_seconds'] == 1800 + 299 and staff.loc[101, 'calls'] == 2
+    assert staff.loc[102, 'calls'] == 1 and staff.loc[102, 'occupancy'] == 0.5
+    assert staff.loc[102, 'idle_seconds'] == 3600 and staff.loc[102, 'calls_per_hour'] == 0.5
+
+    teams = shift_report(sessions_file, calls_dir, by='team')
+    assert teams.loc[1, 'worked_seconds'] == 10 * 3600 and teams.loc[2, 'calls'] == 0
+
+
+def test_window_clips_sessions():
+    """Test that only the part of a workday inside the window counts"""
+    sessions = pd.DataFrame({'staff_id': [101, 101], 'team_id': 1,
+                             'started_at': [0, 86400], 'ended_at': [3600, 86400 + 7200]})
+    calls = pd.DataFrame({'handler_id': [101], 'time_elapsed': [60],
+                          'datetime': [pd.Timestamp('1970-01-02 01:30')]})
+    df = shift_stats(sessions, calls, start=datetime.datetime(1970, 1, 2, 1))
+    assert df.loc[101, 'worked_seconds'] == 3600 and df.loc[101, 'calls'] == 1
+    assert shift_stats(sessions, calls, end=datetime.datetime(1970, 1, 1)).empty
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from staff_io import import_staff, iter_staff_export, validate_staff_batch
+from storage import STAFF_COLUMNS
+
+
+def test_validate_staff_batch():
+    """Test that one pass flags every kind of bad row"""
+    batch = pd.DataFrame({
+        'staff_id': [101, 300, 301, 302, 302, 'x'],
+        'first_name': ['John', 'Ann', '', 'Ben', 'Ben', 'Eve'],
+        'last_name': ['Doe', 'Lee', 'Ray', 'Fox', 'Fox', 'Kim'],
+    })
+    result = validate_staff_batch(batch, existing_ids=[101], manager_id=1, team_id=1)
+
+    assert list(result.accepted['staff_id']) == [300, 302]
+    assert list(result.accepted.columns) == STAFF_COLUMNS
+    assert list(result.rejected['error']) == [
+        "staff_id already exists", "missing name", "duplicate staff_id in batch", "invalid staff_id"]
+
+
+def test_import_and_export_staff(tmp_path):
+    """Test that an import writes the staff file once and records memberships"""
+    staff_file = tmp_path / 'staff_details.csv'
+    managers_file = tmp_path / 'manager_details.csv'
+    membership_file = tmp_path / 'manager_staff.csv'
+    pd.DataFrame(columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame({'manager_id': [1], 'manager_first_name': ['David'],
+                  'manager_last_name': ['Cooper']}).to_csv(managers_file, index=False)
+
+    batch = pd.DataFrame({'staff_id': range(500, 800), 'first_name': 'New', 'last_name': 'Hire'})
+    result = import_staff(batch, str(staff_file), str(managers_file), str(membership_file),
+                          manager_id=1, team_id=1)
+
+    assert len(result.accepted) == 300
+    assert len(pd.read_csv(staff_file)) == 300
+    assert len(pd.read_csv(membership_file)) == 300
+
+    exported = "".join(iter_staff_export(str(staff_file), team_id=1, chunksize=64))
+    assert exported.count('\n') == 301
@@ -0,0 +1,46 @@
+import threading
+
+from classes import Staff, Call
+from status_events import StatusBus, status_bus
+
+
+def test_status_bus_changes_since():
+    """Test that readers only receive the staff whose status changed"""
+    bus = StatusBus(history=3)
+    bus.seed({101: 'Free', 102: 'Free'})
+    assert bus.version == 0
+
+    start = bus.version
+    bus.publish(101, 'On Call')
+    assert bus.publish(101, 'On Call') is None
+    version, changed = bus.changes_since(start)
+    assert version == 1 and changed == {101: 'On Call'}
+
+    for status in ['Lunch', 'Free', 'On Call', 'Free']:
+        bus.publish(102, status)
+    assert bus.changes_since(start)[1] is None
+    assert bus.snapshot() == (5, {101: 'On Call', 102: 'Free'})
+
+
+def test_status_bus_subscribers_across_threads():
+    """Test that events published from other threads reach a queue subscriber"""
+    bus = StatusBus()
+    callback, events = bus.subscribe()
+    threads = [threading.Thread(target=bus.publish, args=(i, 'Free')) for i in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    bus.unsubscribe(callback)
+    bus.publish(999, 'Lunch')
+    assert events.qsize() == 50
+
+
+def test_staff_publishes_status():
+    """Test that accepting and ending a call publishes both status changes"""
+    staff = Staff(id=901, first_name="John", last_name="Doe", manager_id=1)
+    call = Call(id=1, status="Pending")
+    staff.accept_call(call)
+    assert status_bus.status_of(901) == "On Call"
+    staff.end_call(call, 0.9)
+    assert status_bus.status_of(901) == "Free"
@@ -0,0 +1,63 @@
+import filecmp
+import os
+
+import pandas as pd
+
+from call_store import read_calls
+from shards import list_shards
+from storage import read_staff
+from synthetic import DatasetSpec, _tasks, generate
+
+SPEC = DatasetSpec(n_staff=60, n_calls=5000, staff_per_team=10, days=20, chunk_calls=1000, seed=7)
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    """Test that serial and process-pool generation write identical files"""
+    serial = generate(str(tmp_path / 'serial'), SPEC, workers=0)
+    pooled = generate(str(tmp_path / 'pooled'), SPEC, workers=2)
+    assert serial.calls == pooled.calls == SPEC.n_calls
+    files = sorted(os.listdir(serial.tables[0].calls_dir))
+    assert len(files) == SPEC.days
+    match, mismatch, errors = filecmp.cmpfiles(serial.tables[0].calls_dir, pooled.tables[0].calls_dir, files,
+                                               shallow=False)
+    assert not mismatch and not errors
+    assert filecmp.cmp(serial.tables[0].staff_file, pooled.tables[0].staff_file, shallow=False)
+
+
+def test_tables_are_consistent(tmp_path):
+    """Test that staff counters, teams and shards agree with the calls"""
+    flat = generate(str(tmp_path / 'flat'), SPEC, layout='flat', workers=0)
+    calls = read_calls(os.path.join(flat.tables[0].root, 'call_details.csv'))
+    staff = read_staff(flat.tables[0].staff_file).set_index('staff_id')
+    assert calls['call_id'].is_unique and calls['datetime'].is_monotonic_increasing
+    assert (calls['team_id'].to_numpy() == staff.loc[calls['handler_id'], 'team_id'].to_numpy()).all()
+    per_staff = calls.groupby('handler_id')['sat_score'].agg(['size', 'mean'])
+    assert (staff.loc[per_staff.index, 'calls_taken'] == per_staff['size']).all()
+    assert ((staff.loc[per_staff.index, 'avg_sat_score'] - per_staff['mean']).abs() < 1e-3).all()
+
+    sharded = generate(str(tmp_path / 'sharded'), SPEC, layout='sharded', n_shards=3, workers=0)
+    shards = list_shards(str(tmp_path / 'sharded' / 'shards'))
+    assert [s.name for s in shards] == ['site01', 'site02', 'site03']
+    total = 0
+    for shard in shards:
+        teams = set(pd.read_csv(shard.teams_file)['team_id'])
+        shard_calls = read_calls(shard.calls_dir)
+        assert set(shard_calls['team_id']) <= teams
+        total += len(shard_calls)
+    assert total == sharded.calls == SPEC.n_calls
+
+
+def test_busy_day_is_split_into_chunks(tmp_path):
+    """Test that a day with more than chunk_calls calls is generated in several ordered chunks"""
+    spec = SPEC._replace(n_calls=3000, days=1, chunk_calls=200)
+    tasks = _tasks(spec)
+    assert len(tasks) == 1 and len(tasks[0]) > 1
+    assert all(c.minute_counts.sum() < spec.chunk_calls + c.minute_counts.max() for c in tasks[0])
+    serial = generate(str(tmp_path / 'serial'), spec, workers=0)
+    pooled = generate(str(tmp_path / 'pooled'), spec, workers=2)
+    [day] = os.listdir(serial.tables[0].calls_dir)
+    assert filecmp.cmp(os.path.join(serial.tables[0].calls_dir, day),
+                       os.path.join(pooled.tables[0].calls_dir, day), shallow=False)
+    calls = read_calls(serial.tables[0].calls_dir)
+    assert len(calls) == spec.n_calls and calls['datetime'].is_monotonic_increasing
+    assert calls['call_id'].is_unique
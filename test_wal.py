@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import shutil
+
+import pandas as pd
+
+from call_ingest import ingest_calls
+from call_store import read_calls
+from classes import StaffRepository
+from storage import MEMBERSHIP_COLUMNS, STAFF_COLUMNS, TEAM_COLUMNS
+from wal import Journal, get_journal
+
+
+def make_tables(tmp_path):
+    staff_file = str(tmp_path / 'staff_details.csv')
+    teams_file = str(tmp_path / 'team_details.csv')
+    pd.DataFrame([[101, 'John', 'Doe', 1, 2, 1, 1, 10, 0, 0.5, 'Free', 1]],
+                 columns=STAFF_COLUMNS).to_csv(staff_file, index=False)
+    pd.DataFrame([[1, 'Team', 1]], columns=TEAM_COLUMNS).to_csv(teams_file, index=False)
+    return staff_file, teams_file
+
+
+def test_recover_replays_log_after_crash(tmp_path):
+    """Test that losing table writes after the log append is undone by recovery"""
+    staff_file, teams_file = make_tables(tmp_path)
+    calls_dir = str(tmp_path / 'calls')
+    get_journal(staff_file).enable()
+    before_crash = str(tmp_path / 'staff_before.csv')
+    shutil.copy(staff_file, before_crash)
+
+    repository = StaffRepository(staff_file)
+    repository.add({**dict(zip(STAFF_COLUMNS, [102, 'Jane', 'Smith', 1, 0, 0, 0, 10, 0, 0, 'Free', 1]))})
+    repository.update(101, {'working_time_elapsed': 3600}, op='workday_end')
+    ingest_calls(pd.DataFrame({'call_id': [1, 2], 'status': 'Successful', 'time_elapsed': 60,
+                               'sat_score': [0.9, 0.3], 'handler_id': 101, 'date': '01/07/2025 09:00'}),
+                 calls_dir, staff_file, teams_file)
+    expected = pd.read_csv(staff_file)
+
+    # Crash: the staff table writes never reached disk and the last call row was torn
+    shutil.copy(before_crash, staff_file)
+    partition = os.path.join(calls_dir, '2025-07-01.csv')
+    with open(partition, 'rb+') as f:
+        f.truncate(os.path.getsize(partition) - 5)
+
+    result = Journal(staff_file).recover()
+    assert result.replayed == 3 and result.calls_restored == 1
+    pd.testing.assert_frame_equal(pd.read_csv(staff_file), expected)
+    assert sorted(read_calls(calls_dir)['call_id']) == [1, 2]
+
+    # The log was folded into a fresh snapshot
+    assert Journal(staff_file).recover().replayed == 0
+
+
+def test_unjournaled_directory_is_untouched(tmp_path):
+    """Test that appends are no-ops until journaling is enabled"""
+    staff_file, _ = make_tables(tmp_path)
+    journal = Journal(staff_file)
+    assert journal.append('staff_remove', {'staff_id': 101}) == 0
+    assert not os.path.exists(tmp_path / 'wal')
+
+
+def test_snapshot_taken_after_enough_records(tmp_path):
+    """Test that the log is truncated once snapshot_every records build up"""
+    staff_file, _ = make_tables(tmp_path)
+    journal = Journal(staff_file, snapshot_every=2, fsync=False)
+    journal.enable()
+    for i in range(3):
+        with journal.transaction():
+            journal.append('staff_update', {'staff_id': 101, 'fields': {'status': 'Lunch'}})
+    with open(journal.log_file) as f:
+        assert len(f.readlines()) == 1
+
+
+def append_updates(staff_file, n):
+    journal = Journal(staff_file, fsync=False)
+    for _ in range(n):
+        with journal.transaction():
+            journal.append('staff_update', {'staff_id': 101, 'fields': {'status': 'Busy'}})
+
+
+def test_writer_processes_share_the_sequence(tmp_path):
+    """Test that journals in other processes continue the sequence instead of reusing it"""
+    staff_file, _ = make_tables(tmp_path)
+    journal = Journal(staff_file, fsync=False)
+    journal.enable()
+    journal.append('staff_update', {'staff_id': 101, 'fields': {'status': 'Lunch'}})
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=append_updates, args=(staff_file, 50)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    assert journal.append('staff_update', {'staff_id': 101, 'fields': {'status': 'Free'}}) == 102
+    assert [record['seq'] for record in journal._records()] == list(range(1, 103))
+
+
+def test_snapshot_restores_membership(tmp_path):
+    """Test that a lost membership table is rebuilt from the snapshot"""
+    staff_file, _ = make_tables(tmp_path)
+    membership_file = tmp_path / 'manager_staff.csv'
+    pd.DataFrame([[1, 101, 1]], columns=MEMBERSHIP_COLUMNS).to_csv(membership_file, index=False)
+    get_journal(staff_file).enable()
+
+    os.remove(membership_file)
+    Journal(staff_file).recover()
+    assert pd.read_csv(membership_file).values.tolist() == [[1, 101, 1]]
@@ -0,0 +1,612 @@
+"""
+Crash-safe persistence of the staff table: snapshots plus a write-ahead log.
+
+Each mutation is appended to an append-only JSON-lines log, and flushed to
+disk, before the tables are touched:
+
+    staff_add     new staff rows
+    staff_update  changed fields of one staff member
+    staff_remove  a staff member leaving
+    workday_end   a staff member's working time at the end of a workday
+    call_end      a batch of finished calls (counters and call rows)
+
+Every so often the current staff, manager and membership tables are
+written to a compact snapshot and the log is truncated. After a crash, recover()
+loads the latest snapshot and replays the log tail on top of it. It then
+rewrites the staff table and re-appends any logged calls missing from the
+call partitions. The call partitions are append-only, so they are not
+copied into snapshots; recovery just trims a torn last line.
+
+Journaling is switched on per data directory by enable(), which creates
+a 'wal' directory next to the tables. After that, every process writing
+that directory logs its mutations. Writers in different processes (the
+dashboard, the API server, the ingest and import CLIs) take turns through
+an exclusive lock on wal/lock, and each re-reads the last sequence number
+from the log when it gets the lock, so records are numbered in order and
+a checkpoint never truncates records another process has not applied.
+
+Usage:
+    python wal.py enable
+    python wal.py checkpoint
+    python wal.py recover
+    python wal.py bench --staff 100000 --ops 20000
+"""
+import argparse
+import csv
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import call_store  # module import: call_store's CLI journals compaction, so the two import each other
+from storage import (STAFF_FILE, MANAGERS_FILE, MEMBERSHIP_FILE, SUCCESS_THRESHOLD, atomic_write,
+                     write_lock)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+WAL_DIR = 'wal'
+LOG_NAME = 'log.jsonl'
+SNAPSHOT_NAME = 'snapshot.pkl'
+LOCK_NAME = 'lock'
+
+# Log records between automatic snapshots
+SNAPSHOT_EVERY = 1000
+
+OPS = ('staff_add', 'staff_update', 'staff_remove', 'workday_end', 'call_end')
+
+
+class RecoveryResult(NamedTuple):
+    """What recover() found and redid."""
+    snapshot_seq: int
+    replayed: int
+    calls_restored: int
+    seconds: float
+
+
+def _json_default(value: object) -> object:
+    # numpy scalars from DataFrame rows
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _lock_file(fd: int) -> None:
+    """Block until this process holds the exclusive lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK gives up after ten seconds
+                continue
+
+
+def _unlock_file(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class _FileLock:
+    """An exclusive lock on a file, re-entrant within this process."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._held = 0
+
+    def acquire(self) -> None:
+        # Callers hold the directory's write lock, so only one thread gets here at a time
+        if self._held == 0:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+            try:
+                _lock_file(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        self._held += 1
+
+    def release(self) -> None:
+        self._held -= 1
+        if self._held == 0:
+            fd, self._fd = self._fd, None
+            _unlock_file(fd)
+            os.close(fd)
+
+
+_file_locks: Dict[str, _FileLock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(path: str) -> _FileLock:
+    """The lock object every Journal of this process uses for a lock file."""
+    key = os.path.abspath(path)
+    with _file_locks_guard:
+        if key not in _file_locks:
+            _file_locks[key] = _FileLock(key)
+        return _file_locks[key]
+
+
+def _repair_tail(path: str) -> bool:
+    """Cut a torn last line off a text file; True if anything was removed."""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return False
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return False
+        block = 4096
+        position = size
+        while position > 0:
+            start = max(position - block, 0)
+            f.seek(start)
+            chunk = f.read(position - start)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return True
+            position = start
+        f.truncate(0)
+        return True
+
+
+# A table held as its header and its rows of strings, first column as the key
+Table = Tuple[List[str], List[List[str]]]
+
+
+def _read_table(path: str) -> Table:
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        return next(reader, []), list(reader)
+
+
+def _read_optional(path: str) -> Optional[Table]:
+    return _read_table(path) if os.path.exists(path) else None
+
+
+def _write_table(path: str, table: Table) -> None:
+    fieldnames, rows = table
+    with atomic_write(path) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
+
+
+def apply_record(fieldnames: List[str], rows: Dict[str, List[str]], record: Dict) -> None:
+    """
+    Redo one logged mutation on staff rows held as strings keyed by staff_id.
+
+    Args:
+        fieldnames: Staff table columns; extended if a new row adds some.
+        rows: Staff rows, modified in place.
+        record: Log record with 'op' and 'data'.
+    """
+    op, data = record['op'], record['data']
+
+    def set_fields(row: List[str], fields: Dict[str, object]) -> None:
+        for name, value in fields.items():
+            if name not in fieldnames:
+                fieldnames.append(name)
+            index = fieldnames.index(name)
+            row.extend([''] * (index + 1 - len(row)))
+            row[index] = str(value)
+
+    def number(row: List[str], name: str) -> float:
+        index = fieldnames.index(name)
+        return float(row[index] or 0) if index < len(row) else 0.0
+
+    if op == 'staff_add':
+        for new in data['rows']:
+            key = str(new['staff_id'])
+            if key not in rows:
+                rows[key] = []
+                set_fields(rows[key], new)
+    elif op in ('staff_update', 'workday_end'):
+        row = rows.get(str(data['staff_id']))
+        if row is not None:
+            set_fields(row, data['fields'])
+    elif op == 'staff_remove':
+        rows.pop(str(data['staff_id']), None)
+    elif op == 'call_end':
+        totals: Dict[str, List[float]] = {}
+        for call in data['calls']:
+            entry = totals.setdefault(str(call['handler_id']), [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += call['sat_score'] >= SUCCESS_THRESHOLD
+            entry[2] += call['sat_score']
+        for key, (calls, successful, sat_sum) in totals.items():
+            row = rows.get(key)
+            if row is None:
+                continue
+            old = int(number(row, 'calls_taken'))
+            set_fields(row, {
+                'calls_taken': old + calls,
+                'successful_calls': int(number(row, 'successful_calls')) + successful,
+                'failed_calls': int(number(row, 'failed_calls')) + calls - successful,
+                'avg_sat_score': (number(row, 'avg_sat_score') * old + sat_sum) / (old + calls),
+            })
+    else:
+        raise ValueError(f"Unknown log operation: {op}")
+
+
+class Journal:
+    def __init__(self, staff_file: str = STAFF_FILE, snapshot_every: int = SNAPSHOT_EVERY,
+                 fsync: bool = True) -> None:
+        """
+        Write-ahead log and snapshots for the tables in one data directory.
+
+        Args:
+            staff_file: Staff CSV file; the log lives in a 'wal' directory
+                beside it.
+            snapshot_every: Log records between automatic snapshots.
+            fsync: Force each record to disk before the write it describes.
+                Turning this off trades durability for speed.
+        """
+        self.staff_file = staff_file
+        directory = os.path.dirname(os.path.abspath(staff_file))
+        self.managers_file = os.path.join(directory, os.path.basename(MANAGERS_FILE))
+        self.membership_file = os.path.join(directory, os.path.basename(MEMBERSHIP_FILE))
+        self.wal_dir = os.path.join(directory, WAL_DIR)
+        self.log_file = os.path.join(self.wal_dir, LOG_NAME)
+        self.snapshot_file = os.path.join(self.wal_dir, SNAPSHOT_NAME)
+        self.lock_file = os.path.join(self.wal_dir, LOCK_NAME)
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._log = None
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._depth = 0
+        self._lock = write_lock(staff_file)
+        self._held = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether this data directory is journaled."""
+        return os.path.isdir(self.wal_dir)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        # Threads of this process queue on the directory's write lock; the outermost
+        # holder also takes the journal's file lock, which other processes wait on
+        with self._lock:
+            file_lock = _file_lock(self.lock_file) if self.enabled else None
+            if file_lock is not None:
+                file_lock.acquire()
+            try:
+                if self._held == 0 and file_lock is not None:
+                    self._sync()
+                self._held += 1
+                try:
+                    yield
+                finally:
+                    self._held -= 1
+            finally:
+                if file_lock is not None:
+                    file_lock.release()
+
+    def _sync(self) -> None:
+        # Another process may have logged or checkpointed since this one last held the lock
+        _repair_tail(self.log_file)
+        if os.path.exists(self.snapshot_file):
+            self._snapshot_seq = self._load_snapshot(header_only=True)['seq']
+        self._seq = max(self._snapshot_seq, self._last_logged_seq())
+
+    def _last_logged_seq(self) -> int:
+        # Records are appended in sequence order, so the last line holds the highest one
+        if not os.path.exists(self.log_file):
+            return 0
+        with open(self.log_file, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                start = max(position - 4096, 0)
+                f.seek(start)
+                tail = f.read(position - start) + tail
+                position = start
+                lines = tail.rstrip(b'\n').rsplit(b'\n', 1)
+                if len(lines) == 2 or position == 0:
+                    try:
+                        return json.loads(lines[-1])['seq'] if lines[-1] else 0
+                    except ValueError:
+                        return max((record['seq'] for record in self._records()), default=0)
+        return 0
+
+    def _open(self) -> None:
+        if self._log is None:
+            self._log = open(self.log_file, 'a', encoding='utf-8')
+
+    def _records(self, after: int = 0) -> Iterator[Dict]:
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn final record: it never completed, so nothing was applied
+                if record['seq'] > after:
+                    yield record
+
+    def _load_snapshot(self, header_only: bool = False) -> Dict:
+        # A small header pickle comes first so the sequence number is cheap to read
+        with open(self.snapshot_file, 'rb') as f:
+            snapshot = pickle.load(f)
+            if not header_only:
+                snapshot.update(pickle.load(f))
+            return snapshot
+
+    def _write_snapshot(self, staff: Optional[Table], managers: Optional[Table],
+                        membership: Optional[Table]) -> None:
+        tmp = self.snapshot_file + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump({'seq': self._seq, 'created': time.time()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump({'staff': staff, 'managers': managers, 'membership': membership}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_file)
+        self._snapshot_seq = self._seq
+
+        # Records up to the snapshot are no longer needed. The handle stays in append
+        # mode so writes land at the end even after other processes have appended.
+        self._log.close()
+        open(self.log_file, 'w').close()
+        self._log = open(self.log_file, 'a', encoding='utf-8')
+
+    @contextmanager
+    def transaction(self) -> Iterator['Journal']:
+        """
+        Hold the data directory's write lock around a group of mutations.
+
+        Once the directory is journaled the lock is shared with other
+        processes. A snapshot is taken on leaving the outermost transaction
+        once enough records have built up, so snapshots never see
+        half-applied work.
+        """
+        with self._exclusive():
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            if self._depth == 0 and self.enabled and self._seq - self._snapshot_seq >= self.snapshot_every:
+                self.checkpoint()
+
+    def append(self, op: str, data: Dict) -> int:
+        """
+        Durably log a mutation before it is applied.
+
+        Does nothing if the data directory is not journaled.
+
+        Args:
+            op: One of OPS.
+            data: JSON-able description of the mutation.
+
+        Returns:
+            The record's sequence number, or 0 if not journaled.
+        """
+        if op not in OPS:
+            raise ValueError(f"Unknown log operation: {op}")
+        if not self.enabled:
+            return 0
+        with self._exclusive():
+            self._open()
+            self._seq += 1
+            self._log.write(json.dumps({'seq': self._seq, 'op': op, 'data': data},
+                                       default=_json_default) + '\n')
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            return self._seq
+
+    def checkpoint(self) -> str:
+        """
+        Snapshot the current tables and truncate the log.
+
+        Returns:
+            Path of the snapshot file.
+        """
+        os.makedirs(self.wal_dir, exist_ok=True)
+        with self._exclusive():
+            self._open()
+            self._write_snapshot(_read_optional(self.staff_file), _read_optional(self.managers_file),
+                                 _read_optional(self.membership_file))
+            return self.snapshot_file
+
+    def enable(self) -> str:
+        """Start journaling this data directory, with the current tables as the base snapshot."""
+        return self.checkpoint()
+
+    def recover(self) -> RecoveryResult:
+        """
+        Rebuild the tables from the latest snapshot and the log tail.
+
+        Safe to run at every start: with an empty log tail it only checks
+        that the tables exist.
+
+        Returns:
+            RecoveryResult: The snapshot used and how much was redone.
+        """
+        start = time.perf_counter()
+        with self._exclusive():
+            if not os.path.exists(self.snapshot_file):
+                return RecoveryResult(0, 0, 0, time.perf_counter() - start)
+            self._open()
+            snapshot = self._load_snapshot()
+            tail = list(self._records(after=snapshot['seq']))
+
+            if snapshot['managers'] is not None and not os.path.exists(self.managers_file):
+                _write_table(self.managers_file, snapshot['managers'])
+            # Snapshots from before the membership table was included have no entry
+            membership = snapshot.get('membership')
+            if membership is not None:
+                _repair_tail(self.membership_file)
+                if not os.path.exists(self.membership_file):
+                    _write_table(self.membership_file, membership)
+            if not tail:
+                if snapshot['staff'] is not None and not os.path.exists(self.staff_file):
+                    _write_table(self.staff_file, snapshot['staff'])
+                return RecoveryResult(snapshot['seq'], 0, 0, time.perf_counter() - start)
+
+            fieldnames, rows = snapshot['staff'] or ([], [])
+            keyed = {row[0]: row for row in rows}
+            for record in tail:
+                apply_record(fieldnames, keyed, record)
+            restored = self._restore_calls(r for r in tail if r['op'] == 'call_end')
+            staff = (fieldnames, [row + [''] * (len(fieldnames) - len(row)) for row in keyed.values()])
+            _write_table(self.staff_file, staff)
+            self._write_snapshot(staff, snapshot['managers'], _read_optional(self.membership_file))
+            return RecoveryResult(snapshot['seq'], len(tail), restored, time.perf_counter() - start)
+
+    @staticmethod
+    def _restore_calls(records: Iterable[Dict]) -> int:
+        by_path: Dict[str, List[Dict]] = {}
+        for record in records:
+            by_path.setdefault(record['data']['calls_path'], []).extend(record['data']['calls'])
+        restored = 0
+        for calls_path, calls in by_path.items():
+            calls = pd.DataFrame(calls)
+            if os.path.isdir(calls_path):
+                for name in os.listdir(calls_path):
+                    if name.endswith('.csv'):
+                        _repair_tail(os.path.join(calls_path, name))
+            else:
+                _repair_tail(calls_path)
+            missing = calls[~calls['call_id'].isin(call_store.existing_call_ids(calls_path, calls['date']))]
+            if not missing.empty:
+                call_store.append_calls(missing, calls_path)
+                restored += len(missing)
+        return restored
+
+
+_journals: Dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(staff_file: str = STAFF_FILE) -> Journal:
+    """
+    Return the journal shared by everything that writes the given staff file's directory.
+
+    Args:
+        staff_file: Staff CSV file.
+
+    Returns:
+        The Journal for that data directory, created on first use.
+    """
+    key = os.path.abspath(staff_file)
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = Journal(staff_file)
+        return _journals[key]
+
+
+def benchmark(n_staff: int = 100_000, n_ops: int = 20_000, fsync: bool = True) -> pd.DataFrame:
+    """
+    Time logging, snapshots and recovery against re-parsing the staff table.
+
+    Args:
+        n_staff: Staff rows in the synthetic table.
+        n_ops: Mutations logged before recovering.
+        fsync: Whether log appends are forced to disk.
+
+    Returns:
+        One row per measured step with its time in seconds.
+    """
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp(prefix='wal-bench-')
+    try:
+        staff_file = os.path.join(directory, os.path.basename(STAFF_FILE))
+        pd.DataFrame({
+            'staff_id': np.arange(n_staff) + 100, 'first_name': 'Jane', 'last_name': 'Smith',
+            'manager_id': 1, 'calls_taken': 0, 'successful_calls': 0, 'failed_calls': 0,
+            'target_successful_calls': 10, 'working_time_elapsed': 0.0, 'avg_sat_score': 0.0,
+            'status': 'Free', 'team_id': 1,
+        }).to_csv(staff_file, index=False)
+        calls_dir = os.path.join(directory, 'calls')
+        os.makedirs(calls_dir)
+
+        journal = Journal(staff_file, snapshot_every=n_ops + 1, fsync=fsync)
+        timings = []
+
+        t = time.perf_counter()
+        journal.enable()
+        timings.append(('snapshot', time.perf_counter() - t))
+
+        handlers = rng.integers(100, 100 + n_staff, n_ops)
+        scores = rng.random(n_ops).round(2)
+        t = time.perf_counter()
+        for i in range(n_ops):
+            if i % 4 == 0:
+                journal.append('workday_end', {'staff_id': int(handlers[i]),
+                                               'fields': {'working_time_elapsed': 28800.0}})
+            else:
+                journal.append('call_end', {'calls_path': calls_dir, 'calls': [{
+                    'call_id': i, 'status': 'Successful', 'time_elapsed': 60, 'sat_score': scores[i],
+                    'handler_id': handlers[i], 'date': '01/07/2025 09:00', 'team_id': 1}]})
+        timings.append((f"log {n_ops} records", time.perf_counter() - t))
+
+        t = time.perf_counter()
+        result = Journal(staff_file).recover()
+        timings.append((f"recover ({result.replayed} replayed)", time.perf_counter() - t))
+
+        t = time.perf_counter()
+        Journal(staff_file)._load_snapshot()
+        timings.append(('load snapshot', time.perf_counter() - t))
+
+        t = time.perf_counter()
+        pd.read_csv(staff_file)
+        timings.append(('parse staff CSV', time.perf_counter() - t))
+        return pd.DataFrame(timings, columns=['step', 'seconds'])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write-ahead log maintenance")
+    parser.add_argument('--staff-file', default=STAFF_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('enable', help="Start journaling the data directory")
+    commands.add_parser('checkpoint', help="Snapshot the tables and truncate the log")
+    commands.add_parser('recover', help="Replay the log on top of the latest snapshot")
+    bench = commands.add_parser('bench', help="Benchmark logging, snapshots and recovery")
+    bench.add_argument('--staff', type=int, default=100_000)
+    bench.add_argument('--ops', type=int, default=20_000)
+    bench.add_argument('--no-fsync', action='store_true')
+    args = parser.parse_args(argv)
+
+    journal = get_journal(args.staff_file)
+    if args.command == 'enable':
+        print(f"Journaling enabled, snapshot at {journal.enable()}")
+    elif args.command == 'checkpoint':
+        print(f"Snapshot written to {journal.checkpoint()}")
+    elif args.command == 'recover':
+        result = journal.recover()
+        print(f"Replayed {result.replayed} records on snapshot {result.snapshot_seq}, "
+              f"restored {result.calls_restored} calls in {result.seconds:.2f}s.")
+    else:
+        print(benchmark(args.staff, args.ops, not args.no_fsync).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())